@@ -1,6 +1,5 @@
 from flask import Flask, jsonify, render_template, request, redirect, url_for, send_from_directory, session, make_response
 from flask_apscheduler import APScheduler
-import pandas as pd
 import threading
 import datetime
 from datetime import date, timedelta
@@ -131,8 +130,9 @@ os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
 
 # 添加上级目录到 path 以导入 scraper 和 utils
 sys.path.append(os.path.join(BASE_DIR, '..'))
-import scraper
-from dashboard.utils.comparator import ComparisonLimitError, compare_documents
+# scraper（bs4/pandas/openpyxl）与 comparator（PyMuPDF）只在对应接口首次调用时导入，
+# 缩短 gunicorn worker 启动与 OOM 重启时间；启动耗时见 scripts/startup_benchmark.py。
+import scrape_queue
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
@@ -151,9 +151,6 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 # --- 定时任务日志存储 (改为文件存储以解决多进程/线程问题) ---
 LOG_FILE = os.path.join(DATA_DIR, 'scheduler.log')
 VISITOR_DB = os.path.join(DATA_DIR, 'visitor_logs.db')
-print(f"DEBUG: BASE_DIR={BASE_DIR}")
-print(f"DEBUG: LOG_FILE={LOG_FILE}")
-print(f"DEBUG: VISITOR_DB={VISITOR_DB}")
 
 def init_visitor_db():
     try:
@@ -204,14 +201,12 @@ def log_scheduler(msg):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] {msg}"
     print(log_entry) # 打印到控制台
-    print(f"DEBUG_LOG: 准备写入文件: {LOG_FILE}")
     
     # 追加写入文件，立即刷新缓冲区 - 移除异常捕获以便看到真正的错误
     with open(LOG_FILE, 'a', encoding='utf-8', buffering=1) as f:
         f.write(log_entry + '\n')
         f.flush()  # 强制刷新到磁盘
         os.fsync(f.fileno())  # 确保写入磁盘
-    print(f"DEBUG_LOG: 写入完成")
 
 @app.route('/api/scheduler/logs')
 def api_scheduler_logs():
@@ -304,9 +299,10 @@ def get_available_dates():
     dates.sort(reverse=True)
     return dates
 
-def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
-    """后台运行爬虫的线程函数"""
+def run_auto_scrape_thread(process_lock=None):
+    """后台运行爬虫的线程函数：启动采集子进程，按入队顺序排空持久化队列。"""
     global SCRAPER_STATUS
+    session_state = {"processed": 0, "scheduled": False}
 
     def status_callback(msg):
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
@@ -315,8 +311,9 @@ def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
             if len(SCRAPER_STATUS["logs"]) > 100:
                 SCRAPER_STATUS["logs"].pop(0)
 
-    def record_result(date_str_iso, result):
+    def record_result(date_str_iso, result, is_scheduled_task=False):
         result_status = result.get("status", "failed")
+        session_state["processed"] += 1
         with SCRAPER_STATE_LOCK:
             SCRAPER_STATUS["date_results"].append({
                 "date": date_str_iso,
@@ -334,6 +331,7 @@ def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
             SCRAPER_STATUS["progress"] = len(SCRAPER_STATUS["date_results"])
 
         if is_scheduled_task:
+            session_state["scheduled"] = True
             if result_status == "no_data":
                 log_scheduler(f"   [无数据] {date_str_iso} 已确认无招标数据。")
             elif result_status == "failed":
@@ -343,27 +341,18 @@ def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
 
     worker = None
     try:
-        status_callback(f"任务开始，计划采集 {len(dates)} 个日期")
-        date_args = [day.strftime("%Y-%m-%d") for day in dates]
+        status_callback(f"任务开始，队列中 {scrape_queue.pending_count()} 个日期待采集")
         worker_path = os.path.abspath(os.path.join(BASE_DIR, "..", "scrape_worker.py"))
         if not os.path.isfile(worker_path):
             error_message = f"采集子进程脚本不存在: {worker_path}"
             status_callback(error_message)
-            for day in dates:
-                date_str_iso = day.strftime("%Y年%m月%d日")
-                record_result(date_str_iso, {
-                    "status": "failed",
-                    "total": 0,
-                    "file": None,
-                    "error": error_message,
-                })
             with SCRAPER_STATE_LOCK:
                 SCRAPER_STATUS["result_status"] = "failed"
-            if is_scheduled_task:
-                log_scheduler(f"   [错误] {error_message}")
+                SCRAPER_STATUS["errors"].append(error_message)
+            log_scheduler(f"   [错误] {error_message}")
             return
         worker = subprocess.Popen(
-            [sys.executable, "-u", worker_path, *date_args],
+            [sys.executable, "-u", worker_path, "--queue"],
             cwd=os.path.abspath(os.path.join(BASE_DIR, "..")),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
@@ -373,7 +362,7 @@ def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
             env={**os.environ, "PYTHONUNBUFFERED": "1", "PYTHONIOENCODING": "utf-8"},
             creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
         )
-        completed_dates = set()
+        current_job = None
         for raw_line in worker.stdout:
             line = raw_line.rstrip()
             if not line:
@@ -385,30 +374,40 @@ def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
                     status_callback(f"无法解析采集进程事件: {line[:200]}")
                     continue
                 if event.get("type") == "date_start":
+                    current_job = event
                     with SCRAPER_STATE_LOCK:
                         SCRAPER_STATUS["current_date"] = event["date"]
+                        SCRAPER_STATUS["total"] = max(
+                            event["total"], SCRAPER_STATUS["progress"] + 1
+                        )
                     status_callback(
                         f"正在处理: {event['date']} ({event['index']}/{event['total']})"
                     )
                 elif event.get("type") == "date_result":
-                    completed_dates.add(event["date"])
-                    record_result(event["date"], event["result"])
+                    current_job = None
+                    record_result(event["date"], event["result"], event.get("scheduled", False))
                 continue
             status_callback(line)
         return_code = worker.wait()
 
-        for day in dates:
-            date_str_iso = day.strftime("%Y年%m月%d日")
-            if date_str_iso not in completed_dates:
-                record_result(date_str_iso, {
-                    "status": "failed", "total": 0, "file": None,
-                    "error": f"采集子进程异常退出，返回码 {return_code}",
-                })
+        if current_job is not None:
+            # 子进程在单个日期中途退出（如 OOM）：该日期记为失败，避免下次排空时反复重试同一崩溃日期。
+            result = {
+                "status": "failed", "total": 0, "file": None,
+                "error": f"采集子进程异常退出，返回码 {return_code}",
+            }
+            if current_job.get("job_id") is not None:
+                scrape_queue.finish_job(current_job["job_id"], result)
+            record_result(current_job["date"], result, current_job.get("scheduled", False))
+        elif return_code and not session_state["processed"]:
+            with SCRAPER_STATE_LOCK:
+                SCRAPER_STATUS["errors"].append(f"采集子进程异常退出，返回码 {return_code}")
 
         with SCRAPER_STATE_LOCK:
-            failed_count = sum(1 for item in SCRAPER_STATUS["date_results"] if item["status"] == "failed")
-            partial_count = sum(1 for item in SCRAPER_STATUS["date_results"] if item["status"] == "partial")
-            if failed_count == len(dates):
+            results = SCRAPER_STATUS["date_results"]
+            failed_count = sum(1 for item in results if item["status"] == "failed")
+            partial_count = sum(1 for item in results if item["status"] == "partial")
+            if (results and failed_count == len(results)) or (not results and return_code):
                 SCRAPER_STATUS["result_status"] = "failed"
             elif failed_count or partial_count:
                 SCRAPER_STATUS["result_status"] = "partial"
@@ -416,7 +415,7 @@ def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
                 SCRAPER_STATUS["result_status"] = "success"
         status_callback(f"任务结束，状态: {SCRAPER_STATUS['result_status']}")
 
-        if is_scheduled_task:
+        if session_state["scheduled"]:
             files_count = len(SCRAPER_STATUS["completed_files"])
             log_msg = f"   [报告] 后台采集任务结束，状态 {SCRAPER_STATUS['result_status']}，生成 {files_count} 个文件。"
             log_scheduler(log_msg)
@@ -432,28 +431,35 @@ def run_auto_scrape_thread(dates, is_scheduled_task=False, process_lock=None):
             SCRAPER_STATUS["result_status"] = "failed"
             SCRAPER_STATUS["errors"].append(str(e))
         print(f"Scrape thread error: {e}")
-        if is_scheduled_task:
-            log_scheduler(f"   [错误] 后台采集线程发生异常: {str(e)}")
+        log_scheduler(f"   [错误] 后台采集线程发生异常: {str(e)}")
     finally:
         with SCRAPER_STATE_LOCK:
             SCRAPER_STATUS["is_running"] = False
             SCRAPER_STATUS["current_date"] = None
         release_process_lock(process_lock)
+        # 释放锁之后再检查队列：子进程判空退出与新请求入队之间的日期由这里接力，
+        # 不会因两边都以为对方会处理而滞留。本轮没有任何进展时不重启，避免崩溃循环。
+        try:
+            if session_state["processed"] and scrape_queue.pending_count():
+                start_scrape_drainer()
+        except Exception as e:
+            print(f"Scrape queue restart error: {e}")
 
 
-def start_scrape_task(dates, is_scheduled_task=False):
+def start_scrape_drainer():
+    """拿到采集进程锁时启动排空线程；锁已被占用说明已有进程正在排空队列。"""
     process_lock = acquire_process_lock(SCRAPER_LOCK_FILE)
     if process_lock is None:
-        return False, "已有采集任务正在运行中"
+        return False
     with SCRAPER_STATE_LOCK:
         if SCRAPER_STATUS["is_running"]:
             release_process_lock(process_lock)
-            return False, "已有采集任务正在运行中"
+            return False
         SCRAPER_STATUS.update({
             "is_running": True,
             "current_date": None,
             "progress": 0,
-            "total": len(dates),
+            "total": scrape_queue.pending_count(),
             "logs": [],
             "completed_files": [],
             "result_status": "running",
@@ -464,7 +470,7 @@ def start_scrape_task(dates, is_scheduled_task=False):
     try:
         thread = threading.Thread(
             target=run_auto_scrape_thread,
-            args=(dates, is_scheduled_task, process_lock),
+            args=(process_lock,),
             daemon=True,
         )
         thread.start()
@@ -474,7 +480,28 @@ def start_scrape_task(dates, is_scheduled_task=False):
             SCRAPER_STATUS["result_status"] = "failed"
         release_process_lock(process_lock)
         raise
-    return True, "采集任务已启动"
+    return True
+
+
+def start_scrape_task(dates, is_scheduled_task=False):
+    """日期写入持久化采集队列；已在排队或执行中的日期直接合并，不再拒绝并发请求。"""
+    try:
+        added, coalesced = scrape_queue.enqueue_dates(dates, scheduled=is_scheduled_task)
+    except ValueError as exc:
+        return False, str(exc)
+    with SCRAPER_STATE_LOCK:
+        if SCRAPER_STATUS["is_running"]:
+            SCRAPER_STATUS["total"] += len(added)
+    started = start_scrape_drainer()
+    parts = []
+    if added:
+        parts.append(f"新增 {len(added)} 个日期")
+    if coalesced:
+        parts.append(f"{len(coalesced)} 个日期已在队列中，已合并")
+    detail = "，".join(parts)
+    if started:
+        return True, f"采集任务已启动（{detail}）" if detail else "采集任务已启动"
+    return True, f"已加入采集队列（{detail}），将按顺序执行" if detail else "已加入采集队列"
 
 # --- 用户操作日志工具函数 ---
 
@@ -1201,6 +1228,8 @@ def api_compare():
                  return jsonify({"error": "投标文件B与招标文件内容重复 (MD5一致)"}), 400
             
         # 4. Process archived files so repeated comparisons can reuse extraction cache.
+        from dashboard.utils.comparator import compare_documents
+
         results = compare_documents(archive_a, archive_b, archive_tender,
                                      check_entity=request.form.get('check_entity') == '1',
                                      check_text=request.form.get('check_text') == '1',
@@ -1214,9 +1243,7 @@ def api_compare():
             
         return jsonify({"status": "success", "data": results})
         
-    except ComparisonLimitError as e:
-        return jsonify({"error": str(e)}), 400
-    except ValueError as e:
+    except ValueError as e:  # 含 comparator.ComparisonLimitError
         return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error during comparison: {e}")
@@ -1341,6 +1368,8 @@ def api_data():
          return jsonify({"error": f"File not found for date: {date_str}"}), 404
     
     try:
+        import pandas as pd
+
         df = pd.read_excel(target_filepath)
         df = df.fillna("")
         data = df.to_dict('records')
@@ -1362,6 +1391,8 @@ def api_scrape_start():
     if len(date_strs) > 5:
         return jsonify({"status": "error", "message": "一次最多只能采集5天"}), 400
 
+    import scraper
+
     target_dates = []
     try:
         for d_str in date_strs:
@@ -1383,14 +1414,20 @@ def api_scrape_start():
     
     return jsonify({
         "status": "success", 
-        "message": f"已启动采集 {len(target_dates)} 个日期", 
+        "message": message,
         "target_dates": date_strs
     })
 
 @app.route('/api/scrape/status')
 def api_scrape_status():
     with SCRAPER_STATE_LOCK:
-        return jsonify(copy.deepcopy(SCRAPER_STATUS))
+        status = copy.deepcopy(SCRAPER_STATUS)
+    try:
+        status["queue"] = scrape_queue.list_jobs()
+    except Exception as e:
+        status["queue"] = []
+        status["errors"].append(f"采集队列读取失败: {e}")
+    return jsonify(status)
 
 # --- 定时任务配置 ---
 class Config:
@@ -1424,6 +1461,8 @@ def scheduled_job():
         filepath = os.path.join(RESULTS_DIR, filename)
         
         if os.path.exists(filepath):
+            import scraper
+
             valid, reason = scraper.validate_result_file(filepath)
             if valid:
                 log_scheduler(f"   [跳过] {date_str_iso} 有效数据已存在。")
@@ -1437,7 +1476,7 @@ def scheduled_job():
     if scrape_targets:
         started, message = start_scrape_task(scrape_targets, is_scheduled_task=True)
         if started:
-            log_scheduler(f"   [启动] 已启动后台采集线程，目标: {len(scrape_targets)} 天")
+            log_scheduler(f"   [入队] {message}，目标: {len(scrape_targets)} 天")
         else:
             log_scheduler(f"   [跳过] {message}，本次定时任务取消采集。")
     else:
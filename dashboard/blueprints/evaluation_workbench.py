@@ -528,6 +528,41 @@ def _project_or_404(project_id: str):
     return project, None
 
 
+# 长轮询单次最长等待与检查间隔；gunicorn gevent worker 下等待不占用系统线程。
+CHANGE_WAIT_MAX_SECONDS = 25
+CHANGE_WAIT_INTERVAL_SECONDS = 0.5
+
+
+def _change_wait_limit() -> float:
+    """长轮询允许的最长等待秒数；同步 worker（如 ``gunicorn -w 1``）下为 0，退回短轮询。
+
+    ``EVALUATION_WORKBENCH_LONG_POLL=1/0`` 可显式开关；未设置时仅在 gevent 已替换
+    ``time`` 模块（gunicorn gevent worker）时启用，否则一个空闲页面就会占住唯一的 worker。
+    """
+    configured = os.environ.get("EVALUATION_WORKBENCH_LONG_POLL", "").strip().lower()
+    if configured in {"1", "true", "yes", "on"}:
+        return CHANGE_WAIT_MAX_SECONDS
+    if configured in {"0", "false", "no", "off"}:
+        return 0.0
+    monkey = sys.modules.get("gevent.monkey")
+    return CHANGE_WAIT_MAX_SECONDS if monkey is not None and monkey.is_module_patched("time") else 0.0
+
+
+def _conditional_json(token: str, build):
+    """按内容版本号返回 JSON：浏览器带回相同 ``If-None-Match`` 时直接 304，不再组装结果。
+
+    版本号并入运行源码指纹，升级后旧缓存自然失效；``no-cache`` 让浏览器每次都向服务端确认。
+    """
+    etag = f"{token}-{storage.runtime_code_fingerprint()[:12]}"
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 def _worker_lock_path() -> Path:
     return storage.data_dir(current_app) / "worker.lock"
 
@@ -627,14 +662,17 @@ def project_api(project_id):
         return error
     if request.method == "GET":
         _start_worker_if_needed()
-        return jsonify({
-            "project": project,
+        # 先取版本号再组装内容：内容只会比版本号新，长轮询不会漏掉变化。
+        token = storage.project_change_token(current_app, project_id, queue=True)
+        return _conditional_json(token, lambda: {
+            "project": storage.get_project(current_app, project_id),
             "documents": storage.list_documents(current_app, project_id),
             "tasks": storage.list_task_summaries(current_app, project_id),
             # 按投标文件显示最后一次已发布的综合评审状态；不改变既有任务列表语义。
             "evaluation_document_states": storage.current_evaluation_document_states(current_app, project_id),
             # 新字段：仅供排队提示使用，不改变原 tasks 列表的既有结构。
             "queue_contexts": storage.task_queue_contexts(current_app, project_id),
+            "change_token": token,
         })
     if request.method == "DELETE":
         try:
@@ -867,6 +905,8 @@ def tasks_api(project_id):
             "prompt_version": TASK_PROMPT_VERSION,
             "deploy_commit": _current_deploy_commit(),
             "force_rerun": force_rerun,
+            # 默认复用跨项目的相同模型请求结果；提交 model_response_cache=false 可让本任务全部实时请求。
+            "model_response_cache": data.get("model_response_cache") is not False,
         }
         if task_type == "evaluate_all":
             payload["document_ids"] = selected_document_ids
@@ -874,6 +914,8 @@ def tasks_api(project_id):
             payload["rerun_selected"] = rerun_selected
             # 价格分是独立的全体投标人计分；局部综合评审不应隐式触发全项目价格重算。
             payload["calculate_price"] = bool(data.get("calculate_price")) and not is_partial_evaluation
+            # 可选：多家短文件同一规则组的首轮判断合并为一次模型请求；默认仍逐家发送。
+            payload["cross_document_batching"] = data.get("cross_document_batching") is True
         if retry_failed_task_id:
             payload["retry_failed_task_id"] = retry_failed_task_id
         if task_type in {"compare_documents", "extract_rules", "extract_price_rules", "calculate_price_scores", "review_documents", "score_objective", "score_subjective", "evaluate_all"}:
@@ -944,7 +986,43 @@ def task_list_api(project_id):
     if error:
         return error
     _start_worker_if_needed()
-    return jsonify({"tasks": storage.list_tasks(current_app, project_id)})
+    since = request.args.get("since", type=int)
+    if since is None:
+        token = storage.project_change_token(current_app, project_id)
+        return _conditional_json(token, lambda: {"tasks": storage.list_tasks(current_app, project_id)})
+    # 增量拉取：只返回变更序号大于 since 的任务，change_seq 作为下一次的 since。先读项目序号，
+    # 查询期间新变更的任务序号必然更大，下次仍会返回；一次返回满额时以已返回的最大序号为游标，
+    # 未返回的较早变更任务下次补齐。
+    change_seq = storage.project_change_seq(current_app, project_id)
+    tasks = storage.list_tasks(current_app, project_id, since)
+    if tasks:
+        delivered = max(int(task["change_seq"]) for task in tasks)
+        change_seq = delivered if len(tasks) >= storage.TASK_LIST_LIMIT else max(change_seq, delivered)
+    return jsonify({"tasks": tasks, "change_seq": change_seq})
+
+
+@evaluation_workbench_bp.route("/api/evaluation-workbench/projects/<project_id>/changes")
+def project_changes_api(project_id):
+    """长轮询：``since`` 与当前版本号不同时立即返回，否则最多等待 ``wait`` 秒。
+
+    同步 worker 下不等待（见 ``_change_wait_limit``），响应中 ``long_poll`` 为 false，前端改为定时短轮询。
+    """
+    _init()
+    _, error = _project_or_404(project_id)
+    if error:
+        return error
+    since = request.args.get("since", "")
+    wait_limit = _change_wait_limit()
+    wait = max(0.0, min(wait_limit, request.args.get("wait", 0, type=float)))
+    deadline = time.monotonic() + wait
+    while True:
+        token = storage.project_change_token(current_app, project_id, queue=True)
+        if token != since or time.monotonic() >= deadline:
+            break
+        time.sleep(min(CHANGE_WAIT_INTERVAL_SECONDS, max(0.0, deadline - time.monotonic())))
+    response = jsonify({"change_token": token, "changed": token != since, "long_poll": wait_limit > 0})
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 @evaluation_workbench_bp.route("/api/evaluation-workbench/tasks/<task_id>/compare-results")
@@ -953,7 +1031,12 @@ def compare_results_api(task_id):
     task = storage.get_task(current_app, task_id)
     if not task:
         return jsonify({"error": "任务不存在"}), 404
-    return jsonify({"task": task, "pairs": storage.list_compare_pairs(current_app, task_id), "analysis": storage.compare_analysis(current_app, task_id)})
+    token = storage.project_change_token(current_app, task["project_id"], settings=True)
+    return _conditional_json(token, lambda: {
+        "task": storage.get_task(current_app, task_id),
+        "pairs": storage.list_compare_pairs(current_app, task_id),
+        "analysis": storage.compare_analysis(current_app, task_id),
+    })
 
 
 @evaluation_workbench_bp.route("/api/evaluation-workbench/compare-signals/<signal_id>", methods=["PATCH"])
@@ -1209,8 +1292,13 @@ def review_results_api(project_id):
     _, error = _project_or_404(project_id)
     if error:
         return error
-    review_run, results = storage.latest_review_results(current_app, project_id)
-    return jsonify({"review_run": review_run, "results": results})
+    token = storage.project_change_token(current_app, project_id)
+
+    def build():
+        review_run, results = storage.latest_review_results(current_app, project_id)
+        return {"review_run": review_run, "results": results}
+
+    return _conditional_json(token, build)
 
 
 @evaluation_workbench_bp.route("/api/evaluation-workbench/review-results/<review_result_id>", methods=["PATCH"])
@@ -4,7 +4,6 @@ import sqlite3
 import os
 import zipfile
 import tempfile
-import pandas as pd
 import shutil
 import re
 import datetime
@@ -1089,6 +1088,8 @@ def api_upload():
             return jsonify({"success": False, "error": "压缩包内未找到专家 Excel 列表文件 (.xls 或 .xlsx)"}), 400
 
         # 解析 Excel 表格，兼容偽装成 xls 的 HTML 表格
+        import pandas as pd
+
         df = None
         try:
             # 优先尝试读取 HTML 格式（针对伪装成 xls 的 HTML 文件）
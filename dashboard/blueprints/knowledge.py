@@ -3,7 +3,7 @@ import sqlite3
 import os
 import datetime
 import json
-import jieba
+import threading
 import time
 import uuid
 import re
@@ -18,8 +18,21 @@ STOPWORDS = {"的", "了", "和", "与", "或者", "等", "之"}
 PROCUREMENT_TERMS = [
     "不允许", "不接受", "实质性要求", "不得", "必须", "应", "不应", "未提供", "无效"
 ]
-for term in PROCUREMENT_TERMS:
-    jieba.add_word(term)
+_jieba_module = None
+_jieba_lock = threading.Lock()
+
+
+def _get_jieba():
+    """首次检索时才加载 jieba 词典（约 0.7 秒），避免拖慢每个 worker 的启动。"""
+    global _jieba_module
+    if _jieba_module is None:
+        with _jieba_lock:
+            if _jieba_module is None:
+                import jieba
+                for term in PROCUREMENT_TERMS:
+                    jieba.add_word(term)
+                _jieba_module = jieba
+    return _jieba_module
 # ----------------------------
 
 knowledge_bp = Blueprint('knowledge', __name__, 
@@ -223,7 +236,7 @@ def view_entry(entry_id):
         if exact_match:
             highlight_tokens = [query.strip()]
         else:
-            seg_list = list(jieba.cut_for_search(query))
+            seg_list = list(_get_jieba().cut_for_search(query))
             highlight_tokens = [term.strip() for term in seg_list if term.strip()]
             if not highlight_tokens:
                  highlight_tokens = [query]
@@ -303,7 +316,7 @@ def api_list():
         else:
             # Use jieba.cut (Exact Mode) for better precision
             # This prevents splitting "非营利" into "非", "营利", avoiding false positives for "营利"
-            seg_list = list(jieba.cut(query))
+            seg_list = list(_get_jieba().cut(query))
             if seg_list:
                 sub_clauses = []
                 for term in seg_list:
@@ -24,21 +24,56 @@ _VISION_TEST_IMAGE_DATA_URL = (
 )
 
 
+_SHARED_ADAPTER: requests.adapters.HTTPAdapter | None = None
+_SHARED_ADAPTER_LOCK = threading.Lock()
+
+
+def _http_pool_size() -> int:
+    """单个模型服务保留的空闲长连接数；覆盖请求闸门的最大并发并留少量余量。"""
+    try:
+        requested = int(os.environ.get("EVALUATION_WORKBENCH_HTTP_POOL_SIZE", "8"))
+    except (TypeError, ValueError):
+        return 8
+    return max(1, min(32, requested))
+
+
+def _shared_http_adapter() -> requests.adapters.HTTPAdapter:
+    global _SHARED_ADAPTER
+    with _SHARED_ADAPTER_LOCK:
+        if _SHARED_ADAPTER is None:
+            size = _http_pool_size()
+            _SHARED_ADAPTER = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=size)
+        return _SHARED_ADAPTER
+
+
 def _http_post(*args, **kwargs):
-    """按工作线程复用 HTTP 连接；评审并发时不共享 Session 可变状态。"""
+    """按工作线程使用独立 Session，但共享同一连接池。
+
+    评审的规则组线程是短生命周期的；连接若随线程私有 Session 一起丢弃，每组请求都要
+    重新建立 TCP/TLS。Session 的 Cookie 等可变状态仍按线程隔离，只有线程安全的
+    urllib3 连接池在进程内共享，后续请求直接复用已建立的长连接。
+    """
     session = getattr(_REQUEST_SESSIONS, "session", None)
     if session is None:
         session = requests.Session()
+        adapter = _shared_http_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
         _REQUEST_SESSIONS.session = session
     return session.post(*args, **kwargs)
 
 
 class InvalidJsonResponse(ValueError):
-    """结构化响应无法解析；正文仅在当前进程内用于低成本 JSON 修复。"""
+    """结构化响应无法解析；正文仅在当前进程内用于低成本 JSON 修复。
 
-    def __init__(self, content: object, finish_reason: object = None):
+    ``stream_aborted`` 表示流式接收时已预判必然触顶而提前断开，``raw_content`` 中
+    边界完整的数组条目仍可由调用方回收。
+    """
+
+    def __init__(self, content: object, finish_reason: object = None, *, stream_aborted: bool = False):
         self.raw_content = content if isinstance(content, str) else ""
         self.finish_reason = str(finish_reason or "")
+        self.stream_aborted = stream_aborted
         super().__init__(_invalid_json_error(content, finish_reason))
 
 
@@ -190,6 +225,81 @@ def _recover_complete_json_array(content: object, expected_field: str) -> dict |
     return {expected_field: recovered} if recovered else None
 
 
+class _StreamingArrayItems:
+    """随流式正文增量识别顶层 ``"<field>": [...]`` 中已完整闭合的对象。
+
+    与 :func:`_recover_complete_json_array` 同口径：只交出边界完整、可独立解析的对象，
+    不补写半截条目；每个字符只扫描一次。
+    """
+
+    def __init__(self, field: str):
+        self.pattern = re.compile(rf'"{re.escape(field)}"\s*:\s*\[')
+        self.buffer = ""
+        self.position: int | None = None
+        self.object_start: int | None = None
+        self.object_depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.closed = False
+        self.count = 0
+        self.last_item_end = 0
+
+    def _array_start(self) -> int | None:
+        value = self.buffer.lstrip().lstrip("\ufeff")
+        offset = len(self.buffer) - len(value)
+        if value[:7].lower() == "<think>":
+            closing = value.lower().find("</think>")
+            if closing < 0:
+                return None
+            offset += closing + len("</think>")
+        match = self.pattern.search(self.buffer, offset)
+        return match.end() if match else None
+
+    def feed(self, text: str) -> list[dict]:
+        self.buffer += text
+        if self.closed:
+            return []
+        if self.position is None:
+            self.position = self._array_start()
+            if self.position is None:
+                return []
+        items = []
+        value = self.buffer
+        for index in range(self.position, len(value)):
+            character = value[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif character == "\\":
+                    self.escaped = True
+                elif character == '"':
+                    self.in_string = False
+                continue
+            if character == '"':
+                self.in_string = True
+            elif character == "{":
+                if self.object_depth == 0:
+                    self.object_start = index
+                self.object_depth += 1
+            elif character == "}" and self.object_depth:
+                self.object_depth -= 1
+                if self.object_depth == 0 and self.object_start is not None:
+                    try:
+                        item = _load_json_candidate(value[self.object_start:index + 1])
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                        self.count += 1
+                        self.last_item_end = index + 1
+                    self.object_start = None
+            elif character == "]" and self.object_depth == 0:
+                self.closed = True
+                break
+        self.position = len(value)
+        return items
+
+
 def _json_error_kind(error: Exception) -> str:
     if isinstance(error, json.JSONDecodeError):
         value = re.sub(r"[^a-z0-9]+", "_", error.msg.lower()).strip("_")
@@ -538,8 +648,81 @@ def _record_response_metadata(callback, body: object, requested_output_tokens: i
     })
 
 
+# 流式接收时用于预判触顶的保守字符/token 比：结构化 JSON 中英文混排通常每 token
+# 1.3~2 个字符，按 3 估算时只有明显放不下的输出才会被提前断开。
+STREAM_ABORT_CHARS_PER_TOKEN = 3.0
+
+
+def streaming_enabled() -> bool:
+    """``EVALUATION_WORKBENCH_STREAM_RESPONSES=1`` 时，声明了数组字段的调用改用 SSE 流式接收。"""
+    return os.environ.get("EVALUATION_WORKBENCH_STREAM_RESPONSES", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _stream_will_overflow(items: _StreamingArrayItems, expected_items: int | None,
+                          requested_output_tokens: int | None) -> bool:
+    """按已完成条目的平均长度外推全部条目；明显超过输出上限才判定必然触顶。"""
+    if not expected_items or not requested_output_tokens or items.count < 2 or items.count >= expected_items:
+        return False
+    projected_chars = items.last_item_end / items.count * expected_items
+    return projected_chars > requested_output_tokens * STREAM_ABORT_CHARS_PER_TOKEN
+
+
+def _read_event_stream(response, *, items: _StreamingArrayItems | None, item_callback=None,
+                       expected_items: int | None = None, requested_output_tokens: int | None = None) -> dict:
+    """把 OpenAI-compatible SSE 分片还原成与非流式一致的响应体，供后续统一校验和解码。"""
+    content_parts: list[str] = []
+    finish_reason = None
+    body: dict = {}
+    saw_choice = False
+    for raw_line in response.iter_lines():
+        line = raw_line.decode("utf-8", errors="replace") if isinstance(raw_line, bytes) else str(raw_line or "")
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            continue
+        if not isinstance(chunk, dict):
+            continue
+        for key in ("usage", "base_resp", "error", "input_sensitive", "output_sensitive"):
+            if chunk.get(key) is not None:
+                body[key] = chunk[key]
+        choices = chunk.get("choices")
+        choice = choices[0] if isinstance(choices, list) and choices and isinstance(choices[0], dict) else None
+        if choice is None:
+            continue
+        saw_choice = True
+        finish_reason = choice.get("finish_reason") or finish_reason
+        delta = choice.get("delta") if isinstance(choice.get("delta"), dict) else {}
+        text = delta.get("content")
+        if not isinstance(text, str) or not text:
+            continue
+        content_parts.append(text)
+        if items is None:
+            continue
+        for item in items.feed(text):
+            if item_callback:
+                item_callback(item)
+        if _stream_will_overflow(items, expected_items, requested_output_tokens):
+            response.close()
+            raise InvalidJsonResponse("".join(content_parts), "length", stream_aborted=True)
+    if saw_choice:
+        body["choices"] = [{"message": {"content": "".join(content_parts)}, "finish_reason": finish_reason}]
+    return body
+
+
 def request_json(profile: dict, system_prompt: str, user_prompt: object, *, usage_callback=None,
-                 response_metadata_callback=None, max_tokens: int | None = None) -> dict:
+                 response_metadata_callback=None, max_tokens: int | None = None,
+                 stream_field: str | None = None, item_callback=None, expected_items: int | None = None) -> dict:
+    """请求一次结构化 JSON。
+
+    调用方声明 ``stream_field`` 且已开启流式接收时改用 SSE：``item_callback`` 在数组
+    条目完整到达时即被调用；给出 ``expected_items`` 后，若按已到条目外推必然超出输出
+    上限，则提前断开并抛出 ``finish_reason=length`` 的 :class:`InvalidJsonResponse`。
+    """
     api_key = _api_key_for(profile)
     base_url = profile["base_url"].rstrip("/")
     payload = {
@@ -566,21 +749,43 @@ def request_json(profile: dict, system_prompt: str, user_prompt: object, *, usag
         # MiniMax M3 已将 max_tokens 标为废弃参数；使用新字段并为 adaptive thinking
         # 预留预算，其他 OpenAI-compatible 模型保持原字段以兼容既有配置。
         payload["max_completion_tokens" if _is_minimax_m3(profile) else "max_tokens"] = requested_output_tokens
+    stream = bool(stream_field) and streaming_enabled()
+    if stream:
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
     try:
         response = _http_post(
             f"{base_url}/chat/completions",
             headers=_headers(api_key),
             json=payload,
             timeout=min(1800, max(30, int(profile.get("timeout_seconds") or 600))),
+            **({"stream": True} if stream else {}),
         )
     except (requests.RequestException, UnicodeEncodeError) as exc:
         raise ValueError(f"模型连接失败：{exc}") from exc
     if not response.ok:
         _raise_http_error(response, operation="模型请求失败")
-    try:
-        body = response.json()
-    except (requests.JSONDecodeError, ValueError) as exc:
-        raise ModelResponseEnvelopeError("模型接口响应不是有效 JSON") from exc
+    if stream and "text/event-stream" in str(response.headers.get("Content-Type") or "").lower():
+        try:
+            body = _read_event_stream(
+                response, items=_StreamingArrayItems(stream_field), item_callback=item_callback,
+                expected_items=expected_items, requested_output_tokens=requested_output_tokens,
+            )
+        except InvalidJsonResponse as exc:
+            if response_metadata_callback:
+                response_metadata_callback({
+                    "requested_max_tokens": requested_output_tokens, "finish_reason": "length",
+                    "response_chars": len(exc.raw_content), "parse_status": "stream_aborted",
+                })
+            raise
+        except requests.RequestException as exc:
+            raise ValueError(f"模型连接失败：{exc}") from exc
+    else:
+        # 未声明流式或服务商忽略 stream 参数时，按普通 JSON 响应处理。
+        try:
+            body = response.json()
+        except (requests.JSONDecodeError, ValueError) as exc:
+            raise ModelResponseEnvelopeError("模型接口响应不是有效 JSON") from exc
     if usage_callback:
         usage = body.get("usage") if isinstance(body, dict) and isinstance(body.get("usage"), dict) else {}
         usage_callback(usage)
@@ -28,6 +28,37 @@ _SERVE_FIRST_BATCH_GRACE_SECONDS = 30
 _SERVE_IDLE_SECONDS = 300
 _SERVE_REAPER_INTERVAL_SECONDS = 30
 _SERVE_ACQUIRE_WAIT_SECONDS = 5
+# 共享内存像素上限。Docker 默认 /dev/shm 只有 64 MB，且段内存计入容器内存；
+# 超出部分的页面回退为临时 JPEG 文件。tmpfs 按页惰性分配，超额时创建段仍会成功，
+# 写入才触发 SIGBUS 直接杀死 worker；因此并行投标人与并发任务的所有批次合用
+# 同一份进程级额度，而不是各批各自 48 MB。
+_SHARED_IMAGE_BATCH_BYTES = 48 * 1024 * 1024
+_SHARED_IMAGE_PROCESS_BYTES = 48 * 1024 * 1024
+_SHARED_IMAGE_DIR = "/dev/shm"
+_shared_image_bytes_in_use = 0
+_shared_image_budget_lock = threading.Lock()
+
+
+def _reserve_shared_image_bytes(size: int) -> bool:
+    """从进程级额度中预留 ``size`` 字节；同时核对 /dev/shm 剩余空间，不足时返回 False。"""
+    global _shared_image_bytes_in_use
+    with _shared_image_budget_lock:
+        if _shared_image_bytes_in_use + size > _SHARED_IMAGE_PROCESS_BYTES:
+            return False
+        try:
+            stats = os.statvfs(_SHARED_IMAGE_DIR)
+            if stats.f_bavail * stats.f_frsize < size:
+                return False
+        except (AttributeError, OSError):
+            pass
+        _shared_image_bytes_in_use += size
+        return True
+
+
+def _release_shared_image_bytes(size: int) -> None:
+    global _shared_image_bytes_in_use
+    with _shared_image_budget_lock:
+        _shared_image_bytes_in_use = max(0, _shared_image_bytes_in_use - size)
 
 
 def local_ocr_max_workers() -> int:
@@ -49,6 +80,62 @@ def _persistent_enabled() -> bool:
     return str(os.environ.get("RAPIDOCR_WORKER_MODE") or "").strip().lower() != "oneshot"
 
 
+def _shared_image_transport_enabled() -> bool:
+    """渲染像素默认经共享内存交给 OCR 子进程；RAPIDOCR_IMAGE_TRANSPORT=file 回到临时 JPEG。"""
+    return str(os.environ.get("RAPIDOCR_IMAGE_TRANSPORT") or "").strip().lower() != "file"
+
+
+class LocalOcrImageBatch:
+    """一批页面的共享内存像素段；退出上下文时统一关闭并删除。
+
+    渲染后的 RGB 像素直接写入独立的共享内存段，子进程按段名映射读取，省去 JPEG
+    编码、写临时文件、子进程读文件和解码的往返。段由本进程创建和删除，子进程超时
+    被杀也不会遗留。
+    """
+
+    def __init__(self, max_bytes: int = _SHARED_IMAGE_BATCH_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._segments: list = []
+
+    def add_pixels(self, page: int, samples, width: int, height: int) -> dict | None:
+        """写入一页 RGB 像素并返回协议条目；未启用、超出单批或进程级预算、共享内存不可用时返回 None。"""
+        size = len(samples)
+        if (not _shared_image_transport_enabled() or size != width * height * 3 or size <= 0
+                or self.total_bytes + size > self.max_bytes):
+            return None
+        if not _reserve_shared_image_bytes(size):
+            return None
+        from multiprocessing import shared_memory
+
+        try:
+            segment = shared_memory.SharedMemory(create=True, size=size)
+        except (OSError, ValueError):
+            _release_shared_image_bytes(size)
+            return None
+        segment.buf[:size] = samples
+        self._segments.append(segment)
+        self.total_bytes += size
+        return {"page": int(page), "shm": segment.name, "width": int(width), "height": int(height), "channels": 3}
+
+    def close(self) -> None:
+        segments, self._segments = self._segments, []
+        for segment in segments:
+            try:
+                segment.close()
+                segment.unlink()
+            except (OSError, BufferError):
+                pass
+        _release_shared_image_bytes(self.total_bytes)
+        self.total_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 def _model_home() -> str:
     """返回仅供 OCR 子进程使用的模型缓存目录。
 
@@ -293,11 +380,12 @@ def _serve_request(inputs: list[dict], timeout: float) -> dict | None:
 
 
 def request_local_ocr(pages: list[dict], *, metrics: dict | None = None) -> tuple[list[dict], dict | None]:
-    """识别一批临时 JPEG；无常驻模型、无网络请求。
+    """识别一批渲染页；无常驻模型、无网络请求。
 
     优先复用常驻 worker 进程（引擎常驻、逐批喂页）；常驻路径不可用时回退到
-    逐批短进程。每个 page 仅允许 ``page`` 和调用方创建的临时 ``path``；结果
-    只回传文字与置信度；调用方负责用 TemporaryDirectory 清理。
+    逐批短进程。每个 page 为 :class:`LocalOcrImageBatch` 生成的共享内存条目，
+    或调用方创建的临时 JPEG ``path``；结果只回传文字与置信度。共享内存段由
+    ``LocalOcrImageBatch``、临时文件由调用方的 TemporaryDirectory 负责清理。
     """
     started = time.perf_counter()
     telemetry = metrics if isinstance(metrics, dict) else {}
@@ -312,6 +400,9 @@ def request_local_ocr(pages: list[dict], *, metrics: dict | None = None) -> tupl
             "error_kind": error_kind,
             "model": str(value.get("model") or "PP-OCRv5-mobile-onnx")[:80],
             "limit_side_len": value.get("limit_side_len"),
+            "stage_ms": {
+                str(name): max(0, int(ms or 0)) for name, ms in (value.get("stage_ms") or {}).items()
+            } if isinstance(value.get("stage_ms"), dict) else {},
         })
 
     if not pages:
@@ -325,8 +416,18 @@ def request_local_ocr(pages: list[dict], *, metrics: dict | None = None) -> tupl
             page = int(item.get("page") or 0)
         except (TypeError, ValueError):
             page = 0
+        if page <= 0:
+            continue
+        if item.get("shm"):
+            try:
+                width, height = int(item.get("width") or 0), int(item.get("height") or 0)
+            except (TypeError, ValueError):
+                continue
+            if width > 0 and height > 0:
+                inputs.append({"page": page, "shm": str(item["shm"]), "width": width, "height": height, "channels": 3})
+            continue
         path = Path(str(item.get("path") or ""))
-        if page <= 0 or not path.is_file():
+        if not path.is_file():
             continue
         inputs.append({"page": page, "path": str(path)})
     if not inputs:
@@ -0,0 +1,252 @@
+"""投标文件页向量索引与语义选页（可选）。
+
+关键词锚点未命中时，``build_rule_context`` 原本只能回退全文前缀（单项评分最多 60 万字符）
+或把规则整条交给人工核验。开启 ``EVALUATION_WORKBENCH_SEMANTIC_PAGES=1`` 后，这里用与
+采集器相同的本地 SentenceTransformer 模型（``model_data``，禁止联网下载）为每份解析文本
+建立一次页向量索引：每页按固定字符窗口切分编码，单位向量以 float16 矩阵写入旁路文件
+``<解析文件>.embeddings.npz``，并记录解析文件大小、修改时间和模型目录，任一变化即重建。
+索引在解析任务写出解析文本后建立（:func:`build_page_embeddings`）；评审阶段只读取。开启
+功能前已解析的文件才会在首条规则上补建一次。某个版本的解析文件建索引失败后记住失败，
+之后的规则直接回到关键词口径，不再逐条重跑全文编码。
+
+检索时只编码规则文本，与窗口向量做点积，页得分取其窗口最高相似度。语义页只补足关键词
+未填满的选页名额，不替换关键词命中页；未安装依赖、缺少模型或编码失败时返回空列表，
+调用方完全回到原有关键词口径。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from dashboard.evaluation_workbench import parsed_text
+
+
+EMBEDDING_SUFFIX = ".embeddings.npz"
+EMBEDDING_VERSION = 1
+# MiniLM 类模型最长约 128 个 token；256 个中文字符的窗口基本不被截断，每页最多编码
+# 前 8 个窗口。每页约 1,500 字时，800 页约 4,800 个窗口，float16 索引约 3.6 MB。
+PAGE_WINDOW_CHARS = 256
+PAGE_MAX_WINDOWS = 8
+ENCODE_BATCH_SIZE = 16
+# 低于该余弦相似度的页不作为语义候选，宁可保持未命中也不把无关页送给模型。
+SEMANTIC_MIN_SIMILARITY = 0.45
+INDEX_CACHE_SIZE = 4
+QUERY_CACHE_SIZE = 512
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MODEL_SEARCH_PATHS = (Path("/app/model_data"), REPO_ROOT / "model_data")
+
+_MODEL = None
+_MODEL_UNAVAILABLE = False
+_MODEL_LOCK = threading.Lock()
+# 编码是 CPU 密集操作；并行投标人共用一个编码槽，也避免同一文件被两个线程重复建索引。
+_ENCODE_LOCK = threading.Lock()
+_INDEX_CACHE: OrderedDict[tuple, tuple] = OrderedDict()
+# 建索引失败的 (解析文件, 大小, 修改时间, 模型)；文件重新解析后键随之变化，会再尝试一次。
+_FAILED_INDEXES: set[tuple] = set()
+_QUERY_CACHE: OrderedDict[tuple[str, str], object] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def semantic_pages_enabled() -> bool:
+    """``EVALUATION_WORKBENCH_SEMANTIC_PAGES=1`` 时启用语义选页；默认关闭以免 2 GB 服务器常驻模型。"""
+    return os.environ.get("EVALUATION_WORKBENCH_SEMANTIC_PAGES", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def model_path() -> Path | None:
+    return next((path for path in MODEL_SEARCH_PATHS if path.exists()), None)
+
+
+def index_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + EMBEDDING_SUFFIX)
+
+
+def remove_page_embeddings(path: str | Path) -> None:
+    index_path(path).unlink(missing_ok=True)
+
+
+def _encoder():
+    """返回 ``texts -> 单位向量矩阵`` 的编码函数；依赖或模型不可用时返回 None（只探测一次）。"""
+    global _MODEL, _MODEL_UNAVAILABLE
+    with _MODEL_LOCK:
+        if _MODEL is None and not _MODEL_UNAVAILABLE:
+            location = model_path()
+            try:
+                if location is None:
+                    raise RuntimeError("未找到本地语义模型 model_data")
+                from sentence_transformers import SentenceTransformer
+                _MODEL = SentenceTransformer(str(location), device="cpu")
+            except Exception:
+                _MODEL_UNAVAILABLE = True
+        model = _MODEL
+    if model is None:
+        return None
+    return lambda texts: model.encode(
+        texts, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=False,
+        convert_to_numpy=True, normalize_embeddings=True,
+    )
+
+
+def _page_windows(pages: dict[int, str]) -> tuple[list[int], list[str]]:
+    owners: list[int] = []
+    windows: list[str] = []
+    for page, text in pages.items():
+        compact = " ".join(str(text or "").split())
+        for start in range(0, min(len(compact), PAGE_WINDOW_CHARS * PAGE_MAX_WINDOWS), PAGE_WINDOW_CHARS):
+            owners.append(int(page))
+            windows.append(compact[start:start + PAGE_WINDOW_CHARS])
+    return owners, windows
+
+
+def _stamp(path: Path) -> list[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _load_index(target: Path, stamp: list[int], model: str):
+    import numpy as np
+
+    try:
+        with np.load(target, allow_pickle=False) as payload:
+            if (int(payload["version"]) == EMBEDDING_VERSION and payload["stamp"].tolist() == stamp
+                    and str(payload["model"]) == model):
+                return payload["pages"], payload["vectors"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _build_index(path: Path, pages: dict[int, str], encode, stamp: list[int], model: str):
+    import numpy as np
+
+    owners, windows = _page_windows(pages)
+    if not windows:
+        return None
+    vectors = np.asarray(encode(windows), dtype=np.float16)
+    page_ids = np.asarray(owners, dtype=np.int32)
+    target = index_path(path)
+    temporary = target.with_name(target.name + ".partial")
+    try:
+        with temporary.open("wb") as handle:
+            np.savez(handle, version=np.int32(EMBEDDING_VERSION), stamp=np.asarray(stamp, dtype=np.int64),
+                     model=np.str_(model), pages=page_ids, vectors=vectors)
+        temporary.replace(target)
+    except OSError:
+        temporary.unlink(missing_ok=True)
+    return page_ids, vectors
+
+
+def page_index(path: str | Path, pages: dict[int, str], encode):
+    """返回 ``(窗口所属页码, 单位向量矩阵)``；旁路文件有效时直接读取，否则编码一次并写入。
+
+    磁盘上保存 float16；内存缓存中转为 float32，逐条规则打分时不再重复转换。
+    """
+    path = Path(path)
+    stamp = _stamp(path)
+    model = str(model_path() or "")
+    key = (str(path), *stamp, model)
+    with _CACHE_LOCK:
+        if key in _FAILED_INDEXES:
+            return None
+        cached = _INDEX_CACHE.get(key)
+        if cached is not None:
+            _INDEX_CACHE.move_to_end(key)
+            return cached
+    with _ENCODE_LOCK:
+        with _CACHE_LOCK:
+            # 排队期间另一线程可能刚刚失败；不在锁内重跑同一份全文编码。
+            if key in _FAILED_INDEXES:
+                return None
+        try:
+            index = _load_index(index_path(path), stamp, model) or _build_index(path, pages, encode, stamp, model)
+        except Exception:
+            with _CACHE_LOCK:
+                _FAILED_INDEXES.add(key)
+            raise
+    if index is None:
+        return None
+    index = (index[0], index[1].astype("float32"))
+    with _CACHE_LOCK:
+        _INDEX_CACHE[key] = index
+        while len(_INDEX_CACHE) > INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
+
+
+def build_page_embeddings(path: str | Path) -> bool:
+    """解析任务写出解析文本后调用：功能开启时建立页向量旁路文件，返回是否可用。
+
+    与选页口径一致，只有两页以上的解析文本才建索引；依赖、模型或编码异常只返回 False，
+    不影响解析结果。
+    """
+    if not semantic_pages_enabled():
+        return False
+    encode = _encoder()
+    if encode is None:
+        return False
+    try:
+        document = parsed_text.ParsedText(path)
+        pages = document.read_pages() if document.page_count >= 2 else {}
+        return bool(pages) and page_index(path, pages, encode) is not None
+    except Exception:
+        return False
+
+
+def _rule_query(rule: dict) -> str:
+    parts = [str(rule.get(key) or "") for key in ("title", "check_rule", "source_text")]
+    return " ".join(" ".join(part.split()) for part in parts if part)[:PAGE_WINDOW_CHARS * 2]
+
+
+def _query_vector(query: str, encode):
+    key = (str(model_path() or ""), query)
+    with _CACHE_LOCK:
+        vector = _QUERY_CACHE.get(key)
+        if vector is not None:
+            _QUERY_CACHE.move_to_end(key)
+            return vector
+    with _ENCODE_LOCK:
+        vector = encode([query])[0]
+    with _CACHE_LOCK:
+        _QUERY_CACHE[key] = vector
+        while len(_QUERY_CACHE) > QUERY_CACHE_SIZE:
+            _QUERY_CACHE.popitem(last=False)
+    return vector
+
+
+def rank_pages(path: str | Path, pages: dict[int, str], rule: dict, limit: int) -> list[tuple[int, float]]:
+    """按语义相似度返回至多 ``limit`` 个 ``(页码, 相似度)``，只含达到阈值的页。"""
+    query = _rule_query(rule)
+    if limit <= 0 or not pages or not query:
+        return []
+    encode = _encoder()
+    if encode is None:
+        return []
+    import numpy as np
+
+    try:
+        index = page_index(path, pages, encode)
+        if index is None:
+            return []
+        page_ids, vectors = index
+        scores = vectors @ np.asarray(_query_vector(query, encode), dtype=np.float32)
+    except Exception:
+        # 语义选页只是补充；任何编码或索引异常都回到关键词口径，不影响评审任务。
+        return []
+    ranked: list[tuple[int, float]] = []
+    seen: set[int] = set()
+    for row in np.argsort(-scores, kind="stable"):
+        score = float(scores[row])
+        if score < SEMANTIC_MIN_SIMILARITY:
+            break
+        page = int(page_ids[row])
+        if page in seen or page not in pages:
+            continue
+        seen.add(page)
+        ranked.append((page, round(score, 4)))
+        if len(ranked) >= limit:
+            break
+    return ranked
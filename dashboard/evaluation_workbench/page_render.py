@@ -0,0 +1,154 @@
+"""候选页 JPEG 渲染，供图片模型与 OCR 共用，可在独立进程池中按批并行。
+
+PyMuPDF 的栅格化和 JPEG 编码都持有 GIL，线程并行无法用上第二个核。这里与 ``pdf_text``
+一样只依赖 PyMuPDF，用 spawn 进程池按批渲染：一批候选页按进程数切成连续的几组，每组在
+子进程内只打开一次 PDF。
+
+渲染比例在打开页面后一次确定：先按页面尺寸受像素上限约束；预计像素数可能让 JPEG 超过
+体积上限时，再用约 25 万像素的低清试渲染测得每像素字节数，按页面面积直接算出能落在上限
+内的比例。低清图的每像素字节数高于同页高清图，估计偏保守，因此绝大多数超大页只编码
+一次；仍超限时才回到原来的逐级降采样。
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz
+
+
+# 低于该每像素字节数上界即不可能超限，直接按像素上限比例渲染（A4 2 倍约 200 万像素）。
+JPEG_MAX_BYTES_PER_PIXEL = 1.5
+PROBE_PIXELS = 250_000
+# 预测比例只用上限的 85%，给高清图与试渲染之间的压缩率差异留余量。
+PREDICTED_SIZE_MARGIN = 0.85
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def render_worker_count() -> int:
+    """渲染子进程数；2 核服务器默认 2，``EVALUATION_WORKBENCH_RENDER_WORKERS=1`` 回到进程内串行。"""
+    try:
+        requested = int(os.environ.get("EVALUATION_WORKBENCH_RENDER_WORKERS", "2"))
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(4, requested, os.cpu_count() or 1))
+
+
+def pixel_capped_scale(width: float, height: float, requested_scale: float, max_pixels: int) -> float:
+    """在生成 Pixmap 前限制像素数，避免超大图纸造成瞬时内存峰值。"""
+    try:
+        area = max(1.0, float(width) * float(height))
+        max_scale = (max_pixels / area) ** 0.5
+    except (TypeError, ValueError):
+        max_scale = requested_scale
+    # `max_scale` 已按页面面积计算。不要把它反向抬到最小比例，否则超大页面
+    # 会重新突破像素上限；0.01 只是异常页面的 API 安全下限。
+    return max(0.01, min(float(requested_scale), max_scale))
+
+
+def _encode(page, scale: float, quality: int) -> bytes:
+    return page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False).tobytes("jpeg", jpg_quality=quality)
+
+
+def predicted_scale(page, scale: float, quality: int, byte_limit: int) -> float:
+    """按页面面积与试渲染的每像素字节数，预测 JPEG 不超过 ``byte_limit`` 的最大比例。"""
+    area = max(1.0, float(page.rect.width) * float(page.rect.height))
+    if area * scale * scale * JPEG_MAX_BYTES_PER_PIXEL <= byte_limit:
+        return scale
+    probe_scale = min(scale, (PROBE_PIXELS / area) ** 0.5)
+    probe = _encode(page, probe_scale, quality)
+    bytes_per_pixel = len(probe) / max(1.0, area * probe_scale * probe_scale)
+    if bytes_per_pixel <= 0:
+        return scale
+    return min(scale, (byte_limit * PREDICTED_SIZE_MARGIN / (bytes_per_pixel * area)) ** 0.5)
+
+
+def render_page(page, scale: float, quality: int, *, byte_limit: int, max_pixels: int,
+                fallback: tuple[float, float, int, int]) -> tuple[bytes, bool]:
+    """渲染一页 JPEG，返回 ``(内容, 是否为满足体积上限而降低了比例或质量)``。
+
+    ``fallback`` 为 ``(比例系数, 最小比例, 质量步长, 最低质量)``，仅在预测后仍超限时逐级使用。
+    """
+    factor, min_scale, quality_step, min_quality = fallback
+    capped = pixel_capped_scale(page.rect.width, page.rect.height, scale, max_pixels)
+    scale = predicted_scale(page, capped, quality, byte_limit)
+    reduced = scale < capped
+    content = _encode(page, scale, quality)
+    while len(content) > byte_limit and scale > min_scale:
+        reduced = True
+        scale = max(min_scale, scale * factor)
+        quality = max(min_quality, quality - quality_step)
+        content = _encode(page, scale, quality)
+    return content, reduced
+
+
+def render_pages(path: str, requests: list[tuple[int, float, int]], byte_limit: int, max_pixels: int,
+                 fallback: tuple[float, float, int, int]) -> list[tuple[int, bytes, bool]]:
+    """在一次打开的 PDF 内按 ``[(页码, 比例, 质量), ...]`` 渲染，返回 ``[(页码, 内容, 是否降低)]``。"""
+    results = []
+    with fitz.open(path) as pdf:
+        for page_number, scale, quality in requests:
+            if not 1 <= page_number <= pdf.page_count:
+                raise IndexError(f"页码超出范围：{page_number}")
+            content, reduced = render_page(
+                pdf[page_number - 1], scale, quality, byte_limit=byte_limit, max_pixels=max_pixels, fallback=fallback,
+            )
+            results.append((page_number, content, reduced))
+    return results
+
+
+def _render_pool(workers: int) -> ProcessPoolExecutor:
+    # 进程池常驻 worker 进程：spawn 子进程导入 PyMuPDF 约需数百毫秒，每批新建会抵消并行收益。
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def shutdown_render_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_render_pool)
+
+
+def render_batch(path: str, requests: list[tuple[int, float, int]], *, byte_limit: int, max_pixels: int,
+                 fallback: tuple[float, float, int, int]) -> dict[int, tuple[bytes, bool]]:
+    """渲染一批候选页，返回 ``{页码: (内容, 是否降低)}``；单页或单进程时在本进程内串行渲染。
+
+    子进程异常退出（如内存不足被回收）时丢弃进程池，本批回到进程内串行，下一批重建进程池。
+    其他线程恰好关闭或替换了进程池（提交时报“shutdown 后不能调度”，或已提交的任务被取消）
+    时同样回到进程内串行，不让本次图片核验失败。
+    """
+    workers = min(render_worker_count(), len(requests))
+    if workers <= 1:
+        rendered = render_pages(path, requests, byte_limit, max_pixels, fallback)
+    else:
+        step = -(-len(requests) // workers)
+        groups = [requests[start:start + step] for start in range(0, len(requests), step)]
+        try:
+            pool = _render_pool(render_worker_count())
+            futures = [pool.submit(render_pages, path, group, byte_limit, max_pixels, fallback) for group in groups]
+            rendered = [item for future in futures for item in future.result()]
+        except (RuntimeError, CancelledError) as exc:
+            # BrokenProcessPool 也是 RuntimeError；只有它需要丢弃进程池。
+            if isinstance(exc, BrokenProcessPool):
+                shutdown_render_pool()
+            rendered = render_pages(path, requests, byte_limit, max_pixels, fallback)
+    return {page_number: (content, reduced) for page_number, content, reduced in rendered}
@@ -0,0 +1,187 @@
+"""解析文本的页偏移索引与按页随机读取。
+
+解析结果仍是一份 UTF-8 文本（``[第N页]`` 标记 + 页文本，页间空一行），便于人工查看和
+旧代码整体读取；旁路文件 ``<解析文件>.pages.json`` 记录每页正文的字节区间与字符数。
+各组件通过 :class:`ParsedText` 用 ``mmap`` 读取第 N..M 页，无需把整份文件读入内存再
+用正则切分。解析任务写入时直接生成索引；旧解析文件（或被改写过的文件）在首次访问时
+扫描一次标记并补写索引。
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import re
+from pathlib import Path
+from typing import Iterator
+
+
+INDEX_SUFFIX = ".pages.json"
+INDEX_VERSION = 1
+PAGE_SEPARATOR = "\n\n"
+_LEGACY_PAGE_MARKER = re.compile(r"\[第(\d+)页\]\n".encode("utf-8"))
+_SEPARATOR_BYTES = PAGE_SEPARATOR.encode("utf-8")
+
+
+def page_header(page: int) -> str:
+    return f"[第{page}页]\n"
+
+
+def index_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_page_index(path: str | Path, pages: list[list[int]]) -> None:
+    """写入 ``[[页码, 起始字节, 结束字节, 字符数], ...]``，并记录解析文件的大小与修改时间。"""
+    path = Path(path)
+    size, mtime_ns = _stamp(path)
+    target = index_path(path)
+    temporary = target.with_name(target.name + ".partial")
+    temporary.write_text(
+        json.dumps({"version": INDEX_VERSION, "size": size, "mtime_ns": mtime_ns, "pages": pages},
+                   separators=(",", ":")),
+        encoding="utf-8",
+    )
+    temporary.replace(target)
+
+
+def remove_page_index(path: str | Path) -> None:
+    index_path(path).unlink(missing_ok=True)
+
+
+def _scan_page_index(path: Path) -> list[list[int]]:
+    """旧解析文件：按 ``[第N页]\\n`` 标记扫描一次得到各页正文区间（不含页间分隔）。"""
+    if path.stat().st_size == 0:
+        return []
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        markers = list(_LEGACY_PAGE_MARKER.finditer(view))
+        pages = []
+        for position, marker in enumerate(markers):
+            end = markers[position + 1].start() if position + 1 < len(markers) else len(view)
+            if position + 1 < len(markers) and view[end - len(_SEPARATOR_BYTES):end] == _SEPARATOR_BYTES:
+                end -= len(_SEPARATOR_BYTES)
+            start = marker.end()
+            chars = len(view[start:end].decode("utf-8", errors="ignore"))
+            pages.append([int(marker.group(1)), start, max(start, end), chars])
+    return pages
+
+
+def load_page_index(path: str | Path) -> list[list[int]]:
+    """读取页偏移索引；索引缺失或与解析文件不一致时重新扫描并尽量补写。"""
+    path = Path(path)
+    size, mtime_ns = _stamp(path)
+    try:
+        payload = json.loads(index_path(path).read_text(encoding="utf-8"))
+        if (payload.get("version") == INDEX_VERSION and payload.get("size") == size
+                and payload.get("mtime_ns") == mtime_ns):
+            return [list(item) for item in payload.get("pages") or []]
+    except (OSError, ValueError, AttributeError):
+        pass
+    pages = _scan_page_index(path)
+    try:
+        write_page_index(path, pages)
+    except OSError:
+        pass
+    return pages
+
+
+class PageIndexWriter:
+    """按页追加写入解析文件，同时记录每页正文的字节区间。"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.pages: list[list[int]] = []
+        self.text_length = 0
+        self._offset = 0
+        self._handle = self.path.open("wb")
+
+    def _write(self, value: str) -> None:
+        data = value.encode("utf-8")
+        self._handle.write(data)
+        self._offset += len(data)
+        self.text_length += len(value)
+
+    def write_page(self, page: int, text: str) -> None:
+        if self.pages:
+            self._write(PAGE_SEPARATOR)
+        self._write(page_header(page))
+        start = self._offset
+        self._write(text)
+        self.pages.append([page, start, self._offset, len(text)])
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class ParsedText:
+    """单份解析文件的只读访问器；无页标记的解析结果（DOCX）``page_numbers`` 为空。"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._pages = {item[0]: item for item in load_page_index(self.path)}
+
+    @property
+    def page_numbers(self) -> list[int]:
+        return sorted(self._pages)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def page_chars(self) -> dict[int, int]:
+        return {page: self._pages[page][3] for page in self.page_numbers}
+
+    def _view(self):
+        handle = self.path.open("rb")
+        try:
+            return handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件不能 mmap
+            handle.close()
+            raise
+
+    def read_pages(self, first: int | None = None, last: int | None = None) -> dict[int, str]:
+        """读取页码在 ``[first, last]`` 内的页正文（缺省为全部页），按页码升序。"""
+        wanted = [
+            page for page in self.page_numbers
+            if (first is None or page >= first) and (last is None or page <= last)
+        ]
+        if not wanted:
+            return {}
+        handle, view = self._view()
+        try:
+            return {
+                page: view[self._pages[page][1]:self._pages[page][2]].decode("utf-8", errors="ignore")
+                for page in wanted
+            }
+        finally:
+            view.close()
+            handle.close()
+
+    def read_page(self, page: int) -> str:
+        return self.read_pages(page, page).get(page, "")
+
+    def read_text(self, char_limit: int | None = None) -> str:
+        """整份文本；给出 ``char_limit`` 时只读取前 ``char_limit`` 个字符。"""
+        with self.path.open("r", encoding="utf-8", errors="ignore") as handle:
+            return handle.read() if char_limit is None else handle.read(max(0, char_limit))
+
+    def iter_lines(self) -> Iterator[tuple[str, int | None]]:
+        """逐行返回 ``(行文本, 页码)``；无页标记时页码为 ``None``。"""
+        if not self._pages:
+            with self.path.open("r", encoding="utf-8", errors="ignore") as handle:
+                for line in handle:
+                    yield line.rstrip("\n"), None
+            return
+        pages = self.page_numbers
+        for position in range(0, len(pages), 40):
+            batch = self.read_pages(pages[position], pages[min(len(pages), position + 40) - 1])
+            for page, text in batch.items():
+                for line in text.splitlines():
+                    yield line, page
+
@@ -13,7 +13,7 @@ from collections import deque
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from pathlib import Path
 
-from dashboard.evaluation_workbench import storage
+from dashboard.evaluation_workbench import parsed_text, storage
 
 
 # 报价定位算法变更时递增此版本，使已落库的旧识别结果自动进入刷新判定，
@@ -214,8 +214,7 @@ def _quote_from_document(app, entry: dict) -> tuple[Decimal | None, str, str, st
     parsed_path = str(entry.get("parsed_path") or "")
     if entry.get("parse_status") != "success" or not parsed_path or not Path(parsed_path).is_file():
         return None, "文件尚未成功解析。", "unavailable", "", []
-    with Path(parsed_path).open("r", encoding="utf-8", errors="ignore") as handle:
-        parsed_candidates = _quote_candidates_from_lines(handle, source="parsed_text")
+    parsed_candidates = _quote_candidates_from_lines(parsed_text.ParsedText(parsed_path).iter_lines(), source="parsed_text")
     value, excerpt, status = _quote_from_candidates(parsed_candidates)
     if value is not None:
         return value, excerpt, status, "parsed_text", parsed_candidates
@@ -1,18 +1,26 @@
 """低资源的页级上下文与全文覆盖分块。
 
-不依赖常驻索引、向量库或本地模型。兼容单项任务仍可使用页级检索；综合评审
-先让 AI 顺序扫描全文分块，再用这里的轻量关键词定位加强二次复核。关键词命中
-不再决定某一页是否会被 AI 看到。
+默认不依赖向量库或本地模型。兼容单项任务仍可使用页级检索；综合评审先让 AI 顺序
+扫描全文分块，再用这里的轻量关键词定位加强二次复核。关键词命中不再决定某一页
+是否会被 AI 看到。锚词计数经由进程内的二字符倒排位图：先求候选页/页块，再只对
+候选文本精确计数，结果与逐页 ``str.count`` 完全一致。可选的语义选页见
+:mod:`page_embeddings`，只补足关键词未填满的页名额。
 """
 
 from __future__ import annotations
 
 import json
+import math
+import operator
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
+from dashboard.evaluation_workbench import page_embeddings, parsed_text
+from multi_pattern import found_terms
+
 
-PAGE_MARKER = re.compile(r"\[第(\d+)页\]\s*")
 CHINESE_BLOCK = re.compile(r"[\u4e00-\u9fff]{2,}")
 ASCII_BLOCK = re.compile(r"[A-Za-z0-9][A-Za-z0-9._/-]{1,}")
 GENERIC_TERMS = {
@@ -31,16 +39,105 @@ DOMAIN_TERM_GROUPS = (
     (("人员", "项目负责人", "团队"), ("人员", "项目负责人", "主要人员", "人员汇总表")),
     (("资质", "证书", "许可证"), ("资质", "证书", "许可证", "营业执照")),
 )
+_DOMAIN_TRIGGERS = tuple(trigger for triggers, _ in DOMAIN_TERM_GROUPS for trigger in triggers)
 
 
-def _pages_from_text(text: str) -> dict[int, str]:
-    markers = list(PAGE_MARKER.finditer(text))
-    if len(markers) < 2:
-        return {}
-    return {
-        int(marker.group(1)): text[marker.end(): markers[index + 1].start() if index + 1 < len(markers) else len(text)]
-        for index, marker in enumerate(markers)
-    }
+# 每条规则最多选取的页数（另附前后各一页）。
+RULE_PAGE_LIMIT = 4
+# 中文分词器的常用折算：汉字及全角标点约 0.6 token/字，其余字符约 0.3 token/字。
+CJK_TOKENS_PER_CHAR = 0.6
+OTHER_TOKENS_PER_CHAR = 0.3
+_CJK_CHAR = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+# 背包求解把容量量化为至多这么多格；页重量向上取整，选中集合不会超出预算。
+PACK_CAPACITY_STEPS = 1024
+
+# 同一份投标文件的页块会在证据账本、规则分组和上下文组装中被反复检索；只保留
+# 最近几份文件的索引，与综合评审的投标人并行度相当，避免 2 GB 服务器常驻过多位图。
+TEXT_INDEX_CACHE_SIZE = 4
+
+
+class _TextIndex:
+    """一组文本（页或页块）的二字符倒排位图与锚词计数缓存。
+
+    第 i 段文本对应位 ``1 << i``。长度 ≥2 的锚词只可能出现在其各二字符片段都出现过的
+    文本中；位图求交得到候选后仍用 ``str.count`` 精确计数，因此只跳过不可能命中的文本。
+    """
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.masks: dict[str, int] = {}
+        masks = self.masks
+        for position, text in enumerate(texts):
+            bit = 1 << position
+            for gram in set(map(operator.add, text, text[1:])):
+                masks[gram] = masks.get(gram, 0) | bit
+        self.everything = (1 << len(texts)) - 1
+        self._counts: dict[str, dict[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def _candidates(self, term: str) -> int:
+        if len(term) < 2:
+            return self.everything
+        mask = self.everything
+        for start in (*range(0, len(term) - 1, 2), len(term) - 2):
+            mask &= self.masks.get(term[start:start + 2], 0)
+            if not mask:
+                break
+        return mask
+
+    def counts(self, term: str) -> dict[int, int]:
+        """返回 ``{文本序号: 出现次数}``，只含出现过的文本。"""
+        with self._lock:
+            cached = self._counts.get(term)
+        if cached is not None:
+            return cached
+        values: dict[int, int] = {}
+        mask = self._candidates(term) if term else 0
+        while mask:
+            low = mask & -mask
+            position = low.bit_length() - 1
+            mask ^= low
+            count = self.texts[position].count(term)
+            if count:
+                values[position] = count
+        with self._lock:
+            self._counts[term] = values
+        return values
+
+
+_TEXT_INDEX_CACHE: OrderedDict[tuple[str, ...], _TextIndex] = OrderedDict()
+_TEXT_INDEX_LOCK = threading.Lock()
+
+
+def _text_index(texts: list[str]) -> _TextIndex:
+    key = tuple(texts)
+    with _TEXT_INDEX_LOCK:
+        index = _TEXT_INDEX_CACHE.get(key)
+        if index is not None:
+            _TEXT_INDEX_CACHE.move_to_end(key)
+            return index
+    index = _TextIndex(list(texts))
+    with _TEXT_INDEX_LOCK:
+        _TEXT_INDEX_CACHE[key] = index
+        while len(_TEXT_INDEX_CACHE) > TEXT_INDEX_CACHE_SIZE:
+            _TEXT_INDEX_CACHE.popitem(last=False)
+    return index
+
+
+def _anchor_hits(index: _TextIndex, anchors: list[str]) -> dict[int, list[tuple[str, int]]]:
+    """按文本序号汇总命中的锚词及次数，锚词保持 ``anchors`` 中的顺序。"""
+    hits: dict[int, list[tuple[str, int]]] = {}
+    for term in anchors:
+        if not term:
+            continue
+        for position, count in index.counts(term).items():
+            hits.setdefault(position, []).append((term, count))
+    return hits
+
+
+def _document_pages(document: parsed_text.ParsedText) -> dict[int, str]:
+    # 只有一个页标记的文本按无页码处理，与全文分块、页级检索的旧口径一致。
+    return document.read_pages() if document.page_count >= 2 else {}
 
 
 def _anchors(rule: dict) -> list[str]:
@@ -56,8 +153,9 @@ def _anchors(rule: dict) -> list[str]:
     )
     raw = f"{rule.get('title', '')} {rule.get('check_rule', '')} {rule.get('source_text', '')} {item_text}"
     priority: list[str] = []
+    triggered = found_terms(raw, _DOMAIN_TRIGGERS)
     for triggers, terms in DOMAIN_TERM_GROUPS:
-        if any(trigger in raw for trigger in triggers):
+        if not triggered.isdisjoint(triggers):
             priority.extend(terms)
     values: set[str] = set()
     for block in [*CHINESE_BLOCK.findall(raw), *ASCII_BLOCK.findall(raw)]:
@@ -90,47 +188,62 @@ def _best_pages(pages: dict[int, str], rule: dict) -> list[int]:
     anchors = _anchors(rule)
     if not anchors:
         return []
+    page_numbers = list(pages)
+    hits = _anchor_hits(_text_index([pages[page] for page in page_numbers]), anchors)
     scored: list[tuple[int, int]] = []
-    for page_number, page_text in pages.items():
-        score = sum(min(2, page_text.count(term)) * len(term) ** 2 for term in anchors if term in page_text)
+    for position, matched in hits.items():
+        score = sum(min(2, count) * len(term) ** 2 for term, count in matched)
         if score:
-            scored.append((score, page_number))
+            scored.append((score, page_numbers[position]))
     scored.sort(key=lambda item: (-item[0], item[1]))
-    return [page for _, page in scored[:4]]
+    return [page for _, page in scored[:RULE_PAGE_LIMIT]]
+
+
+def _plan_page_chunks(document: parsed_text.ParsedText, target_chars: int, overlap_pages: int) -> list[tuple[int, int]]:
+    if document.page_count < 2:
+        return []
+    page_items = sorted(document.page_chars().items())
+    ranges: list[tuple[int, int]] = []
+    start_index = 0
+    while start_index < len(page_items):
+        end_index = start_index
+        size = 0
+        while end_index < len(page_items):
+            page_number, chars = page_items[end_index]
+            piece_size = chars + len(str(page_number)) + 12
+            if end_index > start_index and size + piece_size > target_chars:
+                break
+            size += piece_size
+            end_index += 1
+        ranges.append((page_items[start_index][0], page_items[end_index - 1][0]))
+        if end_index >= len(page_items):
+            break
+        start_index = max(start_index + 1, end_index - max(0, overlap_pages))
+    return ranges
+
+
+def plan_full_text_chunks(path: str | Path, target_chars: int = 11_000, overlap_pages: int = 1) -> list[tuple[int, int]]:
+    """只按页偏移索引中的字符数规划页块 ``(起始页, 结束页)``，不读取正文；无页码时返回空列表。"""
+    return _plan_page_chunks(parsed_text.ParsedText(path), target_chars, overlap_pages)
 
 
 def split_full_text_chunks(path: str | Path, target_chars: int = 11_000, overlap_pages: int = 1) -> list[dict]:
     """按页顺序覆盖全文；无页码的 DOCX 使用带重叠的字符分块。"""
-    full_text = Path(path).read_text(encoding="utf-8", errors="ignore")
-    pages = _pages_from_text(full_text)
+    document = parsed_text.ParsedText(path)
+    ranges = _plan_page_chunks(document, target_chars, overlap_pages)
     chunks: list[dict] = []
-    if pages:
-        page_items = sorted(pages.items())
-        start_index = 0
-        while start_index < len(page_items):
-            end_index = start_index
-            size = 0
-            while end_index < len(page_items):
-                page_number, page_text = page_items[end_index]
-                piece_size = len(page_text) + len(str(page_number)) + 12
-                if end_index > start_index and size + piece_size > target_chars:
-                    break
-                size += piece_size
-                end_index += 1
-            selected = page_items[start_index:end_index]
-            text = "\n\n".join(f"[第{page}页]\n{value}" for page, value in selected)
+    if ranges:
+        for start_page, end_page in ranges:
+            selected = document.read_pages(start_page, end_page)
             chunks.append({
                 "chunk_id": f"chunk_{len(chunks) + 1}",
-                "start_page": selected[0][0],
-                "end_page": selected[-1][0],
-                "text": text,
+                "start_page": start_page,
+                "end_page": end_page,
+                "text": "\n\n".join(f"[第{page}页]\n{value}" for page, value in selected.items()),
             })
-            if end_index >= len(page_items):
-                break
-            start_index = max(start_index + 1, end_index - max(0, overlap_pages))
         return chunks
 
-    value = full_text.strip()
+    value = document.read_text().strip()
     if not value:
         return []
     overlap_chars = min(800, max(0, target_chars // 10))
@@ -152,17 +265,17 @@ def split_full_text_chunks(path: str | Path, target_chars: int = 11_000, overlap
 def select_rule_chunk_map(chunks: list[dict], rules: list[dict], per_rule: int = 4) -> dict[str, list[str]]:
     """按规则返回确定性候选块，防止扁平列表在缺失补评时发生规则错配。"""
     selected: dict[str, list[str]] = {}
+    text_index = _text_index([str(chunk.get("text") or "") for chunk in chunks])
     for rule in rules:
         rule_id = str(rule.get("rule_id") or "")
         if not rule_id:
             continue
         anchors = _anchors(rule)
         scored: list[tuple[int, int, str]] = []
-        for index, chunk in enumerate(chunks):
-            text = str(chunk.get("text") or "")
-            score = sum(min(3, text.count(term)) * max(2, len(term)) ** 2 for term in anchors if term in text)
+        for index, matched in _anchor_hits(text_index, anchors).items():
+            score = sum(min(3, count) * max(2, len(term)) ** 2 for term, count in matched)
             if score:
-                scored.append((score, index, str(chunk.get("chunk_id"))))
+                scored.append((score, index, str(chunks[index].get("chunk_id"))))
         scored.sort(key=lambda item: (-item[0], item[1]))
         rule_chunks: list[str] = []
         for _, _, chunk_id in scored[:per_rule]:
@@ -178,25 +291,28 @@ def select_rule_chunk_evidence_map(chunks: list[dict], rules: list[dict], per_ru
     ``select_rule_chunk_map`` 为了兼容旧调用方只返回页块 ID。综合评审若首轮
     AI 没有给出摘录，会回退到本地召回；旧实现此时不知道命中在页块的哪个位置，
     长页块会总是从开头截断，造成“已召回但未送达模型”的隐性漏证据。
-    本函数仅增加瞬时的字符串定位结果，不创建常驻索引或引入额外依赖。
+    本函数仅增加瞬时的字符串定位结果，不引入额外依赖。
     """
     selected: dict[str, list[dict]] = {}
+    texts = [str(chunk.get("text") or "") for chunk in chunks]
+    text_index = _text_index(texts)
     for rule in rules:
         rule_id = str(rule.get("rule_id") or "")
         if not rule_id:
             continue
         anchors = _anchors(rule)
         scored: list[tuple[int, int, str, int, str]] = []
-        for index, chunk in enumerate(chunks):
-            text = str(chunk.get("text") or "")
-            matched = [term for term in anchors if term and term in text]
-            if not matched:
-                continue
-            matched.sort(key=lambda term: (-len(term), text.find(term), term))
-            anchor = matched[0]
+        for index, matched in _anchor_hits(text_index, anchors).items():
+            text = texts[index]
+            # 定位锚点取最长命中词中最靠前者；只需对最长的几个词查找位置。
+            longest = max(len(term) for term, _ in matched)
+            anchor = min(
+                (term for term, _ in matched if len(term) == longest),
+                key=lambda term: (text.find(term), term),
+            )
             offset = text.find(anchor)
-            score = sum(min(3, text.count(term)) * max(2, len(term)) ** 2 for term in matched)
-            scored.append((score, index, str(chunk.get("chunk_id") or ""), max(0, offset), anchor))
+            score = sum(min(3, count) * max(2, len(term)) ** 2 for term, count in matched)
+            scored.append((score, index, str(chunks[index].get("chunk_id") or ""), max(0, offset), anchor))
         scored.sort(key=lambda item: (-item[0], item[1]))
         values: list[dict] = []
         seen: set[str] = set()
@@ -222,23 +338,121 @@ def select_rule_chunks(chunks: list[dict], rules: list[dict], per_rule: int = 4)
     return selected
 
 
-def build_rule_context(path: str | Path, rules: list[dict], char_limit: int, *, allow_partial: bool = False) -> dict:
+def estimate_tokens(text: str) -> int:
+    """按字符类别近似估算 token 数，不加载分词器；用于预算取舍而非计费。"""
+    if not text:
+        return 0
+    _, cjk = _CJK_CHAR.subn("", text)
+    return math.ceil(cjk * CJK_TOKENS_PER_CHAR + (len(text) - cjk) * OTHER_TOKENS_PER_CHAR)
+
+
+def _page_block(page: int, text: str) -> str:
+    return f"[第{page}页]\n{text}"
+
+
+def pack_pages(pages: dict[int, str], values: dict[int, float], *, char_limit: int,
+               token_budget: int | None = None, required: list[int] | None = None) -> dict:
+    """在字符上限与 token 预算内选出总价值最高的一组页（0/1 背包）。
+
+    ``required`` 中的页（如每条规则的首选页）按顺序先行保留，放不下的跳过；其余页以
+    token（未给预算时以字符）为重量求解，再按价值密度剔除超出另一项上限的页。
+    返回按页码排序的 ``pages``、被舍弃的 ``dropped_pages`` 及所用 ``chars``/``tokens``。
+    """
+    items = []
+    for page, value in values.items():
+        if page not in pages or value <= 0:
+            continue
+        block = _page_block(page, pages[page])
+        # 页间分隔两个换行计入每页开销，拼接后总长不超过估算值。
+        items.append((page, float(value), len(block) + 2, estimate_tokens(block) + 1))
+    use_tokens = token_budget is not None
+    by_page = {item[0]: item for item in items}
+    reserved: list[tuple[int, float, int, int]] = []
+    reserved_chars = reserved_tokens = 0
+    for page in dict.fromkeys(required or []):
+        item = by_page.get(page)
+        if item is None or reserved_chars + item[2] > char_limit or (
+                use_tokens and reserved_tokens + item[3] > token_budget):
+            continue
+        reserved.append(item)
+        reserved_chars += item[2]
+        reserved_tokens += item[3]
+    reserved_pages = {item[0] for item in reserved}
+    items = [item for item in items if item[0] not in reserved_pages]
+    remaining_chars = char_limit - reserved_chars
+    capacity = int(token_budget - reserved_tokens if use_tokens else remaining_chars)
+    unit = max(1, math.ceil(capacity / PACK_CAPACITY_STEPS))
+    slots = capacity // unit
+    best = [0.0] * (slots + 1)
+    keep: list[bytearray] = []
+    for _, value, chars, tokens in items:
+        weight = math.ceil((tokens if use_tokens else chars) / unit)
+        row = bytearray(slots + 1)
+        for slot in range(slots, weight - 1, -1):
+            candidate = best[slot - weight] + value
+            if candidate > best[slot]:
+                best[slot] = candidate
+                row[slot] = 1
+        keep.append(row)
+    chosen: list[tuple[int, float, int, int]] = []
+    slot = slots
+    for position in range(len(items) - 1, -1, -1):
+        if keep[position][slot]:
+            item = items[position]
+            chosen.append(item)
+            slot -= math.ceil((item[3] if use_tokens else item[2]) / unit)
+    # 以 token 为重量时，英文数字较多的页可能使字符数超限，按价值密度从低到高剔除。
+    chosen.sort(key=lambda item: (-item[1] / max(1, item[2]), item[0]))
+    while chosen and sum(item[2] for item in chosen) > remaining_chars:
+        chosen.pop()
+    chosen.extend(reserved)
+    selected = sorted(item[0] for item in chosen)
+    return {
+        "pages": selected,
+        "dropped_pages": sorted(set(page for page, *_ in items) - set(selected)),
+        "chars": sum(item[2] for item in chosen),
+        "tokens": sum(item[3] for item in chosen),
+    }
+
+
+def build_rule_context(path: str | Path, rules: list[dict], char_limit: int, *, allow_partial: bool = False,
+                       token_budget: int | None = None) -> dict:
     """返回相关页上下文。
 
     ``allow_partial`` 仅供规则组调用：无法定位的规则会列入
     ``unmatched_rule_ids``，其余规则继续使用已命中的页面。调用方应把这些规则
     交给模型返回待人工核验，不能据缺失片段作出不满足结论。
+
+    启用语义选页时，关键词候选不足 ``RULE_PAGE_LIMIT`` 页的规则由语义相似页补足，
+    补入的页记录在 ``semantic_pages``；关键词完全未命中但语义命中的规则不再触发全文
+    回退或人工核验。
+
+    规则组的相关页超出 ``char_limit`` 或 ``token_budget`` 时，不再按页码顺序截断：先保留
+    每条规则的首选页，再按各页对规则的排名价值打包（见 :func:`pack_pages`），舍弃的页
+    记录在 ``dropped_pages``；直接候选页全部被舍弃的规则同样列入 ``unmatched_rule_ids``。
     """
-    full_text = Path(path).read_text(encoding="utf-8", errors="ignore")
-    fallback = {"text": full_text[:char_limit], "mode": "full_prefix", "pages": [], "unmatched_rule_ids": []}
-    pages = _pages_from_text(full_text)
+    document = parsed_text.ParsedText(path)
+    fallback = {"text": document.read_text(char_limit), "mode": "full_prefix", "pages": [], "unmatched_rule_ids": []}
+    pages = _document_pages(document)
     if not pages or not rules:
         return fallback
 
     selected: set[int] = set()
+    semantic_pages: set[int] = set()
     unmatched_rule_ids: list[str] = []
+    # 规则第 1..4 候选页价值依次为 4..1，相邻页取其一半；多条规则共用的页价值累加。
+    values: dict[int, float] = {}
+    rule_pages: list[tuple[str, list[int]]] = []
+    semantic = page_embeddings.semantic_pages_enabled()
     for rule in rules:
         candidates = _best_pages(pages, rule)
+        if semantic and len(candidates) < RULE_PAGE_LIMIT:
+            extra = [
+                page for page, _ in page_embeddings.rank_pages(path, pages, rule, RULE_PAGE_LIMIT)
+                if page not in candidates
+            ][:RULE_PAGE_LIMIT - len(candidates)]
+            semantic_pages.update(extra)
+            candidates = [*candidates, *extra]
         # 普通单项任务保持保守的旧回退；规则组可只让这一条规则人工核验。
         if not candidates:
             if not allow_partial:
@@ -247,19 +461,38 @@ def build_rule_context(path: str | Path, rules: list[dict], char_limit: int, *,
             if rule_id:
                 unmatched_rule_ids.append(rule_id)
             continue
-        for page in candidates:
-            selected.update(candidate for candidate in (page - 1, page, page + 1) if candidate in pages)
+        rule_pages.append((str(rule.get("rule_id") or ""), candidates))
+        for rank, page in enumerate(candidates):
+            weight = RULE_PAGE_LIMIT - min(rank, RULE_PAGE_LIMIT - 1)
+            for candidate in (page - 1, page, page + 1):
+                if candidate in pages:
+                    selected.add(candidate)
+                    values[candidate] = values.get(candidate, 0.0) + (weight if candidate == page else weight / 2)
 
     selected_pages = sorted(selected)
-    context = "\n\n".join(f"[第{page}页]\n{pages[page]}" for page in selected_pages)
+    context = "\n\n".join(_page_block(page, pages[page]) for page in selected_pages)
+    extra = {"semantic_pages": sorted(semantic_pages)} if semantic_pages else {}
     if allow_partial:
         # 不为未命中的规则回退全文。若全部未命中，留空上下文并由调用方明确要求
         # 返回人工核验，避免把 10 万字符以上的投标文件反复发给模型。
         if not context:
             return {"text": "", "mode": "unmatched_rules", "pages": [], "unmatched_rule_ids": unmatched_rule_ids}
         # 规则组可接受接近上限的相关页，但绝不再换成无关的全文前缀。
-        return {"text": context[:char_limit], "mode": "retrieved_pages_partial" if unmatched_rule_ids else "retrieved_pages", "pages": selected_pages, "unmatched_rule_ids": unmatched_rule_ids}
+        if len(context) > char_limit or (token_budget is not None and estimate_tokens(context) > token_budget):
+            packed = pack_pages(
+                pages, values, char_limit=char_limit, token_budget=token_budget,
+                required=[candidates[0] for _, candidates in rule_pages],
+            )
+            kept = set(packed["pages"])
+            if kept:
+                selected_pages = packed["pages"]
+                context = "\n\n".join(_page_block(page, pages[page]) for page in selected_pages)
+                extra["dropped_pages"] = packed["dropped_pages"]
+                for rule_id, candidates in rule_pages:
+                    if rule_id and rule_id not in unmatched_rule_ids and not kept.intersection(candidates):
+                        unmatched_rule_ids.append(rule_id)
+        return {"text": context[:char_limit], "mode": "retrieved_pages_partial" if unmatched_rule_ids else "retrieved_pages", "pages": selected_pages, "unmatched_rule_ids": unmatched_rule_ids, **extra}
     # 只有比旧上下文至少缩小 30% 才启用，既节省 Token 也避免过度裁剪。
     if not context or len(context) > char_limit * 0.7:
         return fallback
-    return {"text": context, "mode": "retrieved_pages", "pages": selected_pages, "unmatched_rule_ids": []}
+    return {"text": context, "mode": "retrieved_pages", "pages": selected_pages, "unmatched_rule_ids": [], **extra}
@@ -58,6 +58,7 @@ PROMPT_TEMPLATES = {
     "evaluate_all_objective_user": _template("综合评审 · 客观评分规则组", "综合评审中客观评分规则组的任务提示词。", "{{retry_note}}请根据全文覆盖扫描候选、重点原文和评分规则给出明确的 AI 建议分，只返回 JSON：\n{\"results\":[{\"rule_id\":\"规则ID\",\"met\":true|false|null,\"suggested_score\":数字或null,\"matched_count\":数字或null,\"needs_ocr\":true|false,\"evidence_items\":[{\"name\":\"项目或证据名称\",\"page_hint\":\"页码\",\"validity\":\"valid|uncertain|invalid\",\"reason\":\"逐项判断\"}],\"evidence\":\"原文摘录\",\"calculation\":\"计分过程\",\"reason\":\"判断理由\",\"summary\":\"一句话最终结论（≤60字）\",\"confidence\":\"high|medium|low\"}]}\n必须按输入顺序覆盖每个 rule_id，且每个 ID 恰好返回一次，不得新增 ID。满足即满分项可返回 met；数量、累计、分档规则必须尽量返回 matched_count、逐项证据、计算过程和 suggested_score。引用评分子项必须使用评分项原始名称，禁止输出 SI-1/SI-2 等编号；页码统一写“第N页”或“第N-M页”，禁止“P55”“第P55”写法。evidence_items 保留全部会影响得分的独立项目，但每项 reason 只写项目事实、页码和有效性；calculation 只写“子项名：得分”式短句，保留公式、数量、分值、封顶和结果；总 reason 只写结论依据或待核验点，不复述规则、evidence 或 calculation。逐项 reason、calculation 与总 reason 均只保留必要事实和计算关系；evidence 最多180字、总 reason 最多120字。证据来源为招标文件复述、目录、空表或仅“无偏离”承诺时，只能标记 uncertain，不能作为已满足客观条件的直接证据。全文扫描未发现相关材料时也应根据评分规则给出最可能的建议（通常为0分）并说明依据。需要 OCR 或证据不完全时仍应给出暂定建议分并标记 needs_ocr，不得仅因需要人工审核而留空；不得超过 scoring.max_score，不得编造证据。suggested_score 与文字必须一致：calculation 或 reason 中给出确定分值结论（如“建议X分”“暂计X分”“应为X分”）时，suggested_score 不得为 null；suggested_score 为 null 时不得写任何确定分值结论，只写已核验事实与待核验事项。\n评分规则组：{{rules}}\n投标文件：{{document_name}}；投标人：{{bidder_name}}\n全文扫描证据包与重点原文：\n{{text}}", "retry_note", "rules", "document_name", "bidder_name", "text"),
     "evaluate_all_subjective_user": _template("综合评审 · 主观评分规则组", "综合评审中主观评分规则组的任务提示词。", "{{retry_note}}请根据全文覆盖扫描候选、重点章节和评分规则大胆给出有依据的评分建议，只返回 JSON：\n{\"results\":[{\"rule_id\":\"规则ID\",\"suggested_score\":数字,\"needs_ocr\":true|false,\"evidence_items\":[{\"name\":\"评分子项或服务模块\",\"page_hint\":\"页码\",\"validity\":\"valid|uncertain|invalid\",\"reason\":\"自主方案证据、缺项或缺陷\"}],\"evidence\":\"最关键原文摘录\",\"calculation\":\"逐项分值、缺项/缺陷扣分和最终汇总\",\"reason\":\"得扣分理由及疑点\",\"summary\":\"一句话最终结论（≤60字）\",\"confidence\":\"high|medium|low\"}]}\n必须按输入顺序覆盖每个 rule_id，且每个 ID 恰好返回一次，不得新增 ID。每条 evidence 仅保留最多两条最关键原文和页码，合计最多180字，不复述评分规则。引用评分子项必须使用评分项原始名称，禁止输出 SI-1/SI-2 等编号；页码统一写“第N页”或“第N-M页”，禁止“P55”“第P55”写法。对含多个模块、性能项、服务项或分档的评分规则，evidence_items 必须逐项覆盖招标评分项：写清已覆盖项、缺失项、发现的缺陷及其页码；每项 reason 仅写该项事实和判断。calculation 必须按招标文件的“每项分值、每处扣分、总分上限”汇总，只写“子项名：得分”式短句，不能只给结论分；总 reason 仅写得扣分的关键依据、疑点或下一步核验点，不复述 evidence、calculation 或规则。投标人自主方案才可作为技术能力、功能先进性、性能或可维护性的正向证据；偏离表“无偏离”、目录、招标文件逐字复述或空泛承诺最多证明响应态度，必须标记 uncertain，不能直接获得对应子项分。所有结果均由人工审核；证据不完整或需要 OCR 时仍应根据可见材料给出暂定分并说明核验点，不要仅因不确定而留空。建议分不得超过 scoring.max_score，不得编造证据。suggested_score 与文字必须一致：calculation 或 reason 中给出确定分值结论（如“建议X分”“暂计X分”“应为X分”）时，suggested_score 不得为 null；suggested_score 为 null 时不得写任何确定分值结论，只写已核验事实与待核验事项。\n评分规则组：{{rules}}\n投标文件：{{document_name}}；投标人：{{bidder_name}}\n全文扫描证据包与重点原文：\n{{text}}", "retry_note", "rules", "document_name", "bidder_name", "text"),
     "evaluate_all_cross_bid_subjective_shadow_user": _template("综合评审 · 横向主观评分影子对照", "仅用于 A/B 审计；不参与正式建议分。", "仅根据已有的各投标人主观评分证据包进行横向一致性复核，不重新检索全文、不补充新事实、不改变正式评分。只返回 JSON：\n{\"comparisons\":[{\"rule_id\":\"规则ID\",\"summary\":\"横向比较摘要（≤120字）\",\"bidders\":[{\"document_id\":\"文件ID\",\"suggested_score\":数字或null,\"reason\":\"与其他投标人的可比依据（≤120字）\",\"confidence\":\"high|medium|low\"}]}]}\n只能返回输入中已有的 rule_id 与 document_id；每个分数不得超出该规则满分。证据不足时 suggested_score 必须为 null，不能为了拉开差距而臆造扣分。该输出仅供与现有 AI 建议分 A/B 对照，所有结论仍须人工审核。\n主观评分规则：{{rules}}\n各投标人已完成的紧凑证据包：\n{{documents}}", "rules", "documents"),
+    "evaluate_all_cross_document_user": _template("综合评审 · 跨投标人合并规则组", "可选的跨投标人合批：同一规则组的多份短投标文件合并为一次请求，各文件独立判断。", "以下多份投标文件使用同一规则组，请把每份文件当作一次独立的单文件评审：只依据该文件编号下的原文和附注判断，不得引用、比较或借用其他文件的证据、分值或结论。每份文件的 results 数组必须完全遵守下方单文件任务要求（字段、覆盖全部 rule_id、长度限制等），但整体只返回 JSON：\n{\"documents\":[{\"document_key\":\"文件编号（如 D1）\",\"results\":[单文件任务要求中的 results 元素]}]}\ndocuments 必须按输入顺序对每个文件编号恰好返回一次，不得新增或遗漏编号。\n\n【单文件任务要求】\n{{task}}\n\n【各投标文件】\n{{documents}}", "task", "documents"),
     "evaluate_all_highlights_user": _template("综合评审 · 重要结论提炼", "综合评审完成后，从已有结论中提炼最值得优先复核的事项。", "请仅根据下列已有评审候选提炼极其重要的结论，不重新评审、不补充新事实，只返回 JSON：\n{\"summaries\":[{\"document_id\":\"投标文件ID\",\"bidder_name\":\"投标人\",\"overall_level\":\"critical|high|attention|none\",\"headline\":\"一句话总览\",\"highlights\":[{\"rule_id\":\"规则ID\",\"level\":\"critical|high|attention\",\"keyword\":\"需要加粗的短关键词\",\"conclusion\":\"简洁结论\",\"basis\":\"最关键证据与理由\"}]}]}\n\n严格口径：1. critical 仅用于资格、符合性、实质性或明确废标规则，且已有结果同时满足 审查状态=不满足、风险=高、置信度=高、证据=充分，并且规则原文明确存在投标无效、否决、不通过等后果；任何条件不满足都不得使用“明确废标”“确定否决”等措辞。2. high 用于证据较强但仍需人工最终确认的重大不响应或严重失分；attention 用于证据有限、部分满足、未找到材料或重大低分线索。3. OCR 待识别、普通人工判断、低风险和证据缺失事项不得升级成 critical。4. headline 最多40字；keyword 最多16字，conclusion 最多80字，basis 最多120字且必须以“页码+事实”开头，并优先依据候选的 conclusion_summary（无 summary 时再参考 reason/evidence）；不得复述整条检查规则，不得使用 Markdown，不得编造证据。5. 每个投标人最多6条，按重要程度排序；没有足够重要结论时 highlights 返回空数组、overall_level=none。6. 风险、证据等一律用中文描述，禁止输出 status=、risk=、evidence_quality= 等字段名或等于号记法。\n\n已有评审候选：\n{{candidates}}", "candidates"),
     "evaluate_all_user": _template("综合评审 · 任务", "兼容综合审查、评分及 JSON 输出要求。", "{{retry_note}}对同一份投标文件完成下列三类工作，并只返回一个合法 JSON 对象：\n{\"review_results\":[{\"rule_id\":\"规则ID\",\"status\":\"satisfied|not_satisfied|partial|not_found|manual|ocr_required\",\"evidence\":\"原文摘录\",\"page_hint\":null,\"reason\":\"理由与疑点\",\"summary\":\"一句话最终结论（≤60字）\",\"risk_level\":\"low|medium|high\",\"confidence\":\"high|medium|low\",\"evidence_quality\":\"sufficient|limited|missing\"}],\"objective_scores\":[{\"rule_id\":\"规则ID\",\"met\":true|false|null,\"suggested_score\":数字或null,\"matched_count\":数字或null,\"needs_ocr\":true|false,\"evidence\":\"原文摘录\",\"calculation\":\"计分过程\",\"reason\":\"判断理由\",\"summary\":\"一句话最终结论（≤60字）\",\"confidence\":\"high|medium|low\"}],\"subjective_scores\":[{\"rule_id\":\"规则ID\",\"suggested_score\":数字,\"needs_ocr\":true|false,\"evidence\":\"原文摘录\",\"reason\":\"得扣分理由\",\"summary\":\"一句话最终结论（≤60字）\",\"confidence\":\"high|medium|low\"}]}\n\n严格要求：不得使用 Markdown 代码块、不得在 JSON 前后添加说明、所有字符串必须使用标准 JSON 双引号和转义。{{limits}}\n审查规则：{{review_rules}}\n客观评分规则：{{objective_rules}}\n主观评分规则：{{subjective_rules}}\n所有结果均由人工审核，应积极给出最可能的判断、疑点和建议分。需要 OCR 或证据不完整时仍可基于可见材料给暂定建议并明确核验点；不得编造证据，评分不得超过 scoring.max_score。\n投标文件：{{document_name}}；投标人：{{bidder_name}}\n原文：\n{{text}}", "retry_note", "limits", "review_rules", "objective_rules", "subjective_rules", "document_name", "bidder_name", "text"),
 }
@@ -713,6 +714,7 @@ PROMPT_TEMPLATE_PRESENTATION = {
     "evaluate_all_objective_user": ("workflow", "综合评审", 133, "careful"),
     "evaluate_all_subjective_user": ("workflow", "综合评审", 134, "careful"),
     "evaluate_all_cross_bid_subjective_shadow_user": ("workflow", "综合评审", 135, "advanced"),
+    "evaluate_all_cross_document_user": ("workflow", "综合评审", 136, "advanced"),
     "evaluate_all_highlights_user": ("workflow", "综合评审", 136, "careful"),
     "evaluate_all_visual_user": ("workflow", "综合评审", 137, "careful"),
     "evaluate_all_ocr_user": ("workflow", "综合评审", 138, "careful"),
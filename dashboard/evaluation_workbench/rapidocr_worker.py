@@ -7,6 +7,7 @@
 from __future__ import annotations
 
 import json
+import mmap
 import os
 import sys
 import time
@@ -27,6 +28,29 @@ def _detector_limit_side_len() -> int:
     return max(640, min(1280, requested))
 
 
+def _env_int(name: str, default: int, lower: int, upper: int) -> int:
+    try:
+        requested = int(os.environ.get(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+    return max(lower, min(upper, requested))
+
+
+def _rec_batch_num() -> int:
+    """单次识别模型调用的文字行数（RapidOCR 默认 6），由 RAPIDOCR_REC_BATCH_NUM 调整。"""
+    return _env_int("RAPIDOCR_REC_BATCH_NUM", 6, 1, 32)
+
+
+def _batch_pages() -> int:
+    """合并识别的页数；默认 1 即逐页调用引擎，RAPIDOCR_BATCH_PAGES 大于 1 时启用合批。
+
+    检测模型输入尺寸随页面变化，仍逐页调用；合批只把多页裁出的文字行放进同一组
+    识别调用。合批路径目前只在模拟引擎上验证过，尚无锁定的 PP-OCRv5 模型上的实测收益，
+    因此默认关闭，可按 ``stage_ms`` 实测后再开启。
+    """
+    return _env_int("RAPIDOCR_BATCH_PAGES", 1, 1, 16)
+
+
 def _engine():
     from rapidocr import EngineType, LangDet, LangRec, ModelType, OCRVersion, RapidOCR
 
@@ -45,36 +69,187 @@ def _engine():
         "Rec.lang_type": LangRec.CH,
         "Rec.model_type": ModelType.MOBILE,
         "Rec.ocr_version": OCRVersion.PPOCRV5,
+        "Rec.rec_batch_num": _rec_batch_num(),
     })
 
 
-def _result_for_page(engine, item: dict) -> dict:
-    page = int(item.get("page") or 0)
+def _shared_memory_image(item: dict):
+    """把父进程写入共享内存的 RGB 像素转成 RapidOCR 约定的 BGR 数组（复制后即释放映射）。"""
+    import numpy as np
+
+    width, height, channels = int(item["width"]), int(item["height"]), int(item.get("channels") or 3)
+    if width <= 0 or height <= 0 or channels != 3:
+        raise ValueError("本地 OCR 像素尺寸无效")
+
+    def to_bgr(buffer):
+        pixels = np.frombuffer(buffer, dtype=np.uint8, count=width * height * channels)
+        image = np.ascontiguousarray(pixels.reshape(height, width, channels)[:, :, ::-1])
+        del pixels  # 映射关闭前必须释放对缓冲区的引用
+        return image
+
+    name = str(item["shm"])
+    posix_path = Path("/dev/shm") / name.lstrip("/")
+    if posix_path.is_file():
+        # Linux 直接只读映射段文件：SharedMemory 会把段登记到本进程的资源跟踪器，
+        # 常驻进程退出时可能删除父进程仍在使用的段。段的创建与删除只归父进程。
+        with posix_path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return to_bgr(view)
+    from multiprocessing import shared_memory
+
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        return to_bgr(segment.buf)
+    finally:
+        segment.close()
+
+
+def _image_input(item: dict):
+    """页面输入：父进程共享内存中的原始像素，或（回退时）临时 JPEG 路径。"""
+    if item.get("shm"):
+        return _shared_memory_image(item)
     path = Path(str(item.get("path") or ""))
-    if page <= 0 or not path.is_file():
+    if not path.is_file():
+        raise ValueError("本地 OCR 输入页面无效")
+    return str(path)
+
+
+def _add_stage(stages: dict | None, name: str, seconds: float) -> None:
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + max(0.0, float(seconds or 0))
+
+
+def _valid_item(item: dict) -> bool:
+    return int(item.get("page") or 0) > 0 and bool(
+        item.get("shm") or Path(str(item.get("path") or "")).is_file()
+    )
+
+
+def _page_payload(page: int, txts, scores, elapsed: float) -> dict:
+    lines = [str(value).strip() for value in (txts or []) if str(value).strip()]
+    values = []
+    for value in scores or []:
+        try:
+            values.append(float(value))
+        except (TypeError, ValueError):
+            pass
+    return {
+        "page": page,
+        "text": "\n".join(lines)[:12000],
+        "line_count": len(lines),
+        "confidence": round(sum(values) / len(values) * 100, 1) if values else None,
+        "elapsed_seconds": round(float(elapsed or 0), 3),
+    }
+
+
+def _result_for_page(engine, item: dict, stages: dict | None = None) -> dict:
+    page = int(item.get("page") or 0)
+    if not _valid_item(item):
         return {"page": page, "error": "本地 OCR 输入页面无效"}
     try:
+        started = time.perf_counter()
+        image = _image_input(item)
+        _add_stage(stages, "input", time.perf_counter() - started)
         # PDF 渲染页方向通常已正确；跳过分类模型可降低 CPU 和内存峰值。
-        output = engine(str(path), use_cls=False)
-        lines = [str(value).strip() for value in (getattr(output, "txts", None) or []) if str(value).strip()]
-        scores = []
-        for value in getattr(output, "scores", None) or []:
-            try:
-                scores.append(float(value))
-            except (TypeError, ValueError):
-                pass
-        return {
-            "page": page,
-            "text": "\n".join(lines)[:12000],
-            "line_count": len(lines),
-            "confidence": round(sum(scores) / len(scores) * 100, 1) if scores else None,
-            "elapsed_seconds": round(float(getattr(output, "elapse", 0) or 0), 3),
-        }
+        output = engine(image, use_cls=False)
+        del image
+        elapse_list = list(getattr(output, "elapse_list", None) or [])
+        if len(elapse_list) == 3:
+            _add_stage(stages, "det", elapse_list[0] or 0)
+            _add_stage(stages, "rec", elapse_list[2] or 0)
+        return _page_payload(
+            page, getattr(output, "txts", None), getattr(output, "scores", None),
+            getattr(output, "elapse", 0) or 0,
+        )
     except Exception as exc:  # noqa: BLE001 - 外部模型异常必须可回退
         return {"page": page, "error": str(exc)[:240]}
 
 
-def _metrics_payload(started: float) -> dict:
+def _supports_batching(engine) -> bool:
+    return all(hasattr(engine, name) for name in ("load_img", "preprocess_img", "detect_and_crop", "recognize_txt"))
+
+
+def _results_for_batch(engine, items: list[dict], stages: dict | None = None) -> list[dict]:
+    """多页合批：逐页检测并裁出文字行，再把全部文字行交给同一组识别调用。
+
+    与 ``RapidOCR.__call__`` 的差异只在识别批次的组成：同批文字行按最宽者补齐，
+    批次划分变化可能让个别行的识别结果略有不同。过滤规则与引擎一致——去掉空文字、
+    丢弃低于 ``text_score`` 的行、保持检测框顺序。引擎接口不符或识别失败时逐页回退。
+    """
+    if len(items) <= 1 or not _supports_batching(engine):
+        return [_result_for_page(engine, item, stages) for item in items]
+    results: list[dict | None] = [None] * len(items)
+    detected: list[tuple[int, list, float]] = []
+    for position, item in enumerate(items):
+        page = int(item.get("page") or 0)
+        if not _valid_item(item):
+            results[position] = {"page": page, "error": "本地 OCR 输入页面无效"}
+            continue
+        try:
+            started = time.perf_counter()
+            original = engine.load_img(_image_input(item))
+            _add_stage(stages, "input", time.perf_counter() - started)
+            started = time.perf_counter()
+            image, op_record = engine.preprocess_img(original)
+            del original
+            try:
+                crops, _ = engine.detect_and_crop(image, op_record)
+            except Exception as exc:  # noqa: BLE001 - RapidOCRError 表示本页未检测到文字
+                if type(exc).__name__ != "RapidOCRError":
+                    raise
+                crops = []
+            del image
+            elapsed = time.perf_counter() - started
+            _add_stage(stages, "det", elapsed)
+            detected.append((position, crops, elapsed))
+        except Exception as exc:  # noqa: BLE001 - 外部模型异常必须可回退
+            results[position] = {"page": page, "error": str(exc)[:240]}
+    crops = [crop for _, page_crops, _ in detected for crop in page_crops]
+    txts: tuple = ()
+    scores: tuple = ()
+    rec_seconds = 0.0
+    if crops:
+        try:
+            started = time.perf_counter()
+            output = engine.recognize_txt(crops)
+            rec_seconds = time.perf_counter() - started
+            _add_stage(stages, "rec", rec_seconds)
+            txts, scores = tuple(output.txts or ()), tuple(output.scores or ())
+            if len(txts) != len(crops) or len(scores) != len(crops):
+                raise ValueError("识别结果数量与文字行不一致")
+        except Exception:  # noqa: BLE001 - 合批失败时逐页重跑，结果与默认模式一致
+            for position, _, _ in detected:
+                results[position] = _result_for_page(engine, items[position], stages)
+            return results
+    del crops
+    text_score = float(getattr(engine, "text_score", 0.5) or 0)
+    offset = 0
+    for position, page_crops, det_seconds in detected:
+        count = len(page_crops)
+        kept = [
+            (txt, score) for txt, score in zip(txts[offset:offset + count], scores[offset:offset + count])
+            if str(txt).strip() and float(score) >= text_score
+        ]
+        share = rec_seconds * count / len(txts) if txts else 0.0
+        offset += count
+        results[position] = _page_payload(
+            int(items[position].get("page") or 0),
+            [txt for txt, _ in kept], [score for _, score in kept], det_seconds + share,
+        )
+    return results
+
+
+def _recognize_pages(engine, pages: list, stages: dict | None = None) -> list[dict]:
+    items = [item for item in pages if isinstance(item, dict)]
+    size = _batch_pages()
+    if size <= 1:
+        return [_result_for_page(engine, item, stages) for item in items]
+    values = []
+    for start in range(0, len(items), size):
+        values.extend(_results_for_batch(engine, items[start:start + size], stages))
+    return values
+
+
+def _metrics_payload(started: float, stages: dict | None = None) -> dict:
     peak_rss_kb = None
     if resource is not None:
         try:
@@ -86,6 +261,10 @@ def _metrics_payload(started: float) -> dict:
         "peak_rss_kb": peak_rss_kb,
         "model": "PP-OCRv5-mobile-onnx",
         "limit_side_len": _detector_limit_side_len(),
+        "batch_pages": _batch_pages(),
+        "rec_batch_num": _rec_batch_num(),
+        # 各阶段累计耗时：input 为像素/图片载入，det 为检测与裁行，rec 为文字识别。
+        "stage_ms": {name: int(seconds * 1000) for name, seconds in (stages or {}).items()},
     }
 
 
@@ -105,8 +284,9 @@ def _serve() -> int:
                 raise ValueError("未提供本地 OCR 页面")
             if engine is None:
                 engine = _engine()
-            values = [_result_for_page(engine, item) for item in pages if isinstance(item, dict)]
-            print(json.dumps({"ok": True, "pages": values, "metrics": _metrics_payload(started)},
+            stages: dict = {}
+            values = _recognize_pages(engine, pages, stages)
+            print(json.dumps({"ok": True, "pages": values, "metrics": _metrics_payload(started, stages)},
                              ensure_ascii=False), flush=True)
         except Exception as exc:  # noqa: BLE001 - 单批失败不退出，保持常驻可用
             print(json.dumps({"ok": False, "error": str(exc)[:400]}, ensure_ascii=False), flush=True)
@@ -127,10 +307,11 @@ def main() -> int:
         if not isinstance(pages, list) or not pages:
             raise ValueError("未提供本地 OCR 页面")
         engine = _engine()
-        values = [_result_for_page(engine, item) for item in pages if isinstance(item, dict)]
+        stages: dict = {}
+        values = _recognize_pages(engine, pages, stages)
         print(json.dumps({
             "ok": True, "pages": values,
-            "metrics": _metrics_payload(started),
+            "metrics": _metrics_payload(started, stages),
         }, ensure_ascii=False), flush=True)
         return 0
     except Exception as exc:  # noqa: BLE001 - 调用方会转为回退状态
@@ -14,12 +14,15 @@ import sqlite3
 import threading
 import time
 import uuid
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from urllib.parse import urlsplit
 
 from cryptography.fernet import Fernet, InvalidToken
+from dashboard.evaluation_workbench.page_embeddings import remove_page_embeddings
+from dashboard.evaluation_workbench.parsed_text import remove_page_index
 from dashboard.evaluation_workbench.prompt_templates import (
     PROMPT_TEMPLATE_SETTING, PROMPT_TEMPLATES, default_template, template_presentation,
 )
@@ -35,6 +38,14 @@ MAX_QUEUED_TASKS_GLOBAL = 12
 # 分块写盘，避免大文件上传时占用整份内存；生产环境可按磁盘容量通过环境变量下调。
 MAX_UPLOAD_MB = max(1, int(os.environ.get("EVALUATION_WORKBENCH_MAX_UPLOAD_MB", "500")))
 MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+# 模型响应缓存按内容寻址、跨项目共享，超出总量时淘汰最久未命中的条目；设为 0 即关闭。
+MODEL_RESPONSE_CACHE_MB = max(0, int(os.environ.get("EVALUATION_WORKBENCH_MODEL_CACHE_MB", "64")))
+# 查重文件对结果按（两份投标文件、招标文件的内容哈希，比对算法版本）复用，跨任务、跨项目
+# 共享；超出总量时淘汰最久未命中的文件对，设为 0 即关闭。
+COMPARE_PAIR_CACHE_MB = max(0, int(os.environ.get("EVALUATION_WORKBENCH_COMPARE_PAIR_CACHE_MB", "256")))
+# 页面渲染 JPEG 按（文件内容哈希、页码、渲染比例、JPEG 质量、渲染器版本）落盘复用，图片模型
+# 与 OCR 共用、跨任务共享；超出总量时淘汰最久未命中的页，设为 0 即关闭。
+PAGE_RENDER_CACHE_MB = max(0, int(os.environ.get("EVALUATION_WORKBENCH_PAGE_RENDER_CACHE_MB", "256")))
 GLOBAL_RULE_CATEGORIES = {"qualification", "compliance", "substantive", "other"}
 VISION_ENABLED_SETTING = "evaluation_workbench_vision_enabled"
 # OCR 与多模态图片识别是两项独立能力。保留旧的 VISION_ENABLED_SETTING
@@ -312,7 +323,8 @@ def task_prompt_template_fingerprint(app, task_type: str) -> str | None:
         "evaluate_all": {
             "evaluate_all", "evaluate_all_guidance", "evaluate_all_highlights", "evaluate_all_scope_profile", "evaluate_all_scope_profile_user",
             "evaluate_all_scope_anomaly_guidance", "evaluate_all_full_scan_user", "evaluate_all_review_user", "evaluate_all_objective_user",
-            "evaluate_all_subjective_user", "evaluate_all_cross_bid_subjective_shadow_user", "evaluate_all_highlights_user",
+            "evaluate_all_subjective_user", "evaluate_all_cross_bid_subjective_shadow_user", "evaluate_all_cross_document_user",
+            "evaluate_all_highlights_user",
             "evaluate_all_visual_user", "evaluate_all_ocr_user", "evaluate_all_visual_contract", "evaluate_all_ocr_contract",
             "evaluate_all_ocr_batch_user",
             "evaluate_all_visual_locator_user",
@@ -375,25 +387,117 @@ def data_dir(app) -> Path:
     return path
 
 
+CHANGE_SCOPE_ALL = "*"
+CHANGE_SCOPE_SETTINGS = "__settings__"
+# 轮询接口返回内容所依赖的表，及其行所属的变更范围（项目 ID 或全局配置）。
+_CHANGE_SCOPE_SOURCES = {
+    "ew_projects": "{row}.project_id",
+    "ew_documents": "{row}.project_id",
+    "ew_tasks": "{row}.project_id",
+    "ew_rule_sets": "{row}.project_id",
+    "ew_rules": "(SELECT project_id FROM ew_rule_sets WHERE rule_set_id = {row}.rule_set_id)",
+    "ew_review_runs": "{row}.project_id",
+    "ew_review_results": "(SELECT project_id FROM ew_review_runs WHERE review_run_id = {row}.review_run_id)",
+    "ew_score_runs": "{row}.project_id",
+    "ew_score_results": "(SELECT project_id FROM ew_score_runs WHERE score_run_id = {row}.score_run_id)",
+    "ew_evaluation_current_documents": "{row}.project_id",
+    "ew_compare_pairs": "(SELECT project_id FROM ew_tasks WHERE task_id = {row}.task_id)",
+    "ew_settings": f"'{CHANGE_SCOPE_SETTINGS}'",
+    "ew_model_profiles": f"'{CHANGE_SCOPE_SETTINGS}'",
+}
+# 每个线程按数据库文件缓存的长连接数；正式环境只有一个库，测试会逐个创建临时库。
+THREAD_CONNECTION_CACHE_SIZE = 4
+STATEMENT_CACHE_SIZE = 256
+_THREAD_CONNECTIONS = threading.local()
+# 同一任务的纯进度更新（进度、说明）至多每隔该毫秒数写库一次，期间只保留最新值；
+# 设为 0 则每次立即写入。
+PROGRESS_FLUSH_MS = max(0, int(os.environ.get("EVALUATION_WORKBENCH_PROGRESS_FLUSH_MS", "500")))
+_PROGRESS_LOCK = threading.Lock()
+_PENDING_PROGRESS: dict[tuple[str, str], dict] = {}
+_PROGRESS_WRITTEN: dict[tuple[str, str], float] = {}
+
+
 def database_path(app) -> Path:
     return data_dir(app).parent / "evaluation_workspace.db"
 
 
-@contextmanager
-def connection(app, *, immediate: bool = False):
-    conn = sqlite3.connect(str(database_path(app)), timeout=30)
+def _open_connection(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=30, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
     try:
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA foreign_keys=ON")
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def _file_identity(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _thread_connections() -> OrderedDict:
+    state = _THREAD_CONNECTIONS
+    if getattr(state, "pid", None) != os.getpid():
+        # fork 出的子进程不能沿用父进程的 SQLite 句柄。
+        state.pid = os.getpid()
+        state.connections = OrderedDict()
+        state.depth = 0
+    return state.connections
+
+
+@contextmanager
+def connection(app, *, immediate: bool = False):
+    """本线程的数据库连接；正常结束时提交，异常时回滚。
+
+    每个线程按数据库文件保留一条长连接，WAL/外键 PRAGMA 只在建立时执行一次，
+    sqlite3 自带的语句缓存也随连接保留。同一线程内嵌套调用时外层事务仍未结束，
+    此时改用一次性连接，与原先“每次调用独立连接”的事务边界一致。
+    """
+    path = database_path(app)
+    key = str(path)
+    connections = _thread_connections()
+    state = _THREAD_CONNECTIONS
+    reusable = state.depth == 0
+    conn = None
+    if reusable:
+        cached = connections.pop(key, None)
+        if cached is not None:
+            # 数据库文件被删除或替换后，旧句柄仍指向原文件，必须重新打开。
+            if cached[1] is not None and cached[1] == _file_identity(path):
+                conn = cached[0]
+            else:
+                cached[0].close()
+    if conn is None:
+        conn = _open_connection(path)
+    state.depth += 1
+    committed = False
+    try:
         if immediate:
             # 需要“先检查、再写入”原子性的短事务（如入队）必须显式加写锁：
             # 普通连接在 WAL 下并发读不互斥，两个请求可能同时看到未满额度。
             conn.execute("BEGIN IMMEDIATE")
         yield conn
         conn.commit()
+        committed = True
     finally:
-        conn.close()
+        state.depth -= 1
+        if not committed:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                reusable = False
+        if reusable:
+            connections[key] = (conn, _file_identity(path))
+            while len(connections) > THREAD_CONNECTION_CACHE_SIZE:
+                connections.popitem(last=False)[1][0].close()
+        else:
+            conn.close()
 
 
 def init_database(app) -> None:
@@ -519,9 +623,44 @@ def init_database(app) -> None:
                 parse_status TEXT,
                 parse_error_kind TEXT,
                 local_json_repaired INTEGER NOT NULL DEFAULT 0,
+                document_ids TEXT,
                 created_at TEXT NOT NULL
             );
             CREATE INDEX IF NOT EXISTS idx_ew_model_calls_project ON ew_model_calls(project_id, created_at);
+            CREATE TABLE IF NOT EXISTS ew_usage_rollups (
+                task_id TEXT NOT NULL REFERENCES ew_tasks(task_id) ON DELETE CASCADE,
+                project_id TEXT NOT NULL REFERENCES ew_projects(project_id) ON DELETE CASCADE,
+                phase TEXT NOT NULL,
+                family TEXT NOT NULL,
+                profile_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                call_count INTEGER NOT NULL DEFAULT 0,
+                input_chars INTEGER NOT NULL DEFAULT 0,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                total_tokens INTEGER NOT NULL DEFAULT 0,
+                cache_hit_tokens INTEGER NOT NULL DEFAULT 0,
+                metered_calls INTEGER NOT NULL DEFAULT 0,
+                prompt_calls INTEGER NOT NULL DEFAULT 0,
+                prompt_cache_hit_tokens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY(task_id, phase, family, profile_id, day)
+            );
+            CREATE INDEX IF NOT EXISTS idx_ew_usage_rollups_project ON ew_usage_rollups(project_id, day);
+            CREATE TABLE IF NOT EXISTS ew_usage_project_rollups (
+                project_id TEXT NOT NULL REFERENCES ew_projects(project_id) ON DELETE CASCADE,
+                phase TEXT NOT NULL,
+                family TEXT NOT NULL,
+                call_count INTEGER NOT NULL DEFAULT 0,
+                input_chars INTEGER NOT NULL DEFAULT 0,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                total_tokens INTEGER NOT NULL DEFAULT 0,
+                cache_hit_tokens INTEGER NOT NULL DEFAULT 0,
+                metered_calls INTEGER NOT NULL DEFAULT 0,
+                prompt_calls INTEGER NOT NULL DEFAULT 0,
+                prompt_cache_hit_tokens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY(project_id, phase, family)
+            );
             CREATE TABLE IF NOT EXISTS ew_output_risk_observations (
                 observation_id TEXT PRIMARY KEY,
                 task_id TEXT NOT NULL REFERENCES ew_tasks(task_id) ON DELETE CASCADE,
@@ -804,6 +943,53 @@ def init_database(app) -> None:
                 UNIQUE(document_id, page_number, image_hash, service)
             );
             CREATE INDEX IF NOT EXISTS idx_ew_ocr_page_cache_document ON ew_ocr_page_cache(document_id, page_number);
+            CREATE TABLE IF NOT EXISTS ew_ocr_render_keys (
+                document_sha256 TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                render_profile TEXT NOT NULL,
+                image_hash TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY(document_sha256, page_number, render_profile)
+            );
+            CREATE TABLE IF NOT EXISTS ew_model_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                base_url TEXT NOT NULL,
+                thinking_mode TEXT NOT NULL DEFAULT '',
+                response_json TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                last_used_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_ew_model_response_cache_lru ON ew_model_response_cache(last_used_at);
+            CREATE TABLE IF NOT EXISTS ew_compare_pair_cache (
+                document_a_sha256 TEXT NOT NULL,
+                document_b_sha256 TEXT NOT NULL,
+                tender_sha256 TEXT NOT NULL,
+                algorithm_version INTEGER NOT NULL,
+                result_json TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                last_used_at TEXT NOT NULL,
+                PRIMARY KEY(document_a_sha256, document_b_sha256, tender_sha256, algorithm_version)
+            );
+            CREATE INDEX IF NOT EXISTS idx_ew_compare_pair_cache_lru ON ew_compare_pair_cache(last_used_at);
+            CREATE TABLE IF NOT EXISTS ew_page_render_cache (
+                document_sha256 TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                scale TEXT NOT NULL,
+                quality INTEGER NOT NULL,
+                renderer TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                last_used_at TEXT NOT NULL,
+                PRIMARY KEY(document_sha256, page_number, scale, quality, renderer)
+            );
+            CREATE INDEX IF NOT EXISTS idx_ew_page_render_cache_lru ON ew_page_render_cache(last_used_at);
             CREATE TABLE IF NOT EXISTS ew_ocr_usage_ledger (
                 usage_id TEXT PRIMARY KEY,
                 task_id TEXT REFERENCES ew_tasks(task_id) ON DELETE SET NULL,
@@ -817,6 +1003,10 @@ def init_database(app) -> None:
                 created_at TEXT NOT NULL
             );
             CREATE INDEX IF NOT EXISTS idx_ew_ocr_usage_month ON ew_ocr_usage_ledger(month_key, service);
+            CREATE TABLE IF NOT EXISTS ew_change_scopes (
+                scope TEXT PRIMARY KEY,
+                change_seq INTEGER NOT NULL
+            );
             """
         )
         _ensure_column(conn, "ew_review_results", "final_status", "TEXT")
@@ -878,6 +1068,13 @@ def init_database(app) -> None:
         _ensure_column(conn, "ew_model_calls", "parse_status", "TEXT")
         _ensure_column(conn, "ew_model_calls", "parse_error_kind", "TEXT")
         _ensure_column(conn, "ew_model_calls", "local_json_repaired", "INTEGER NOT NULL DEFAULT 0")
+        _ensure_column(conn, "ew_model_calls", "document_ids", "TEXT")
+        _ensure_column(conn, "ew_tasks", "change_seq", "INTEGER NOT NULL DEFAULT 0")
+        # 旧数据库首次升级：汇总表为空而调用台账已有记录时，从台账补建一次。
+        if (conn.execute("SELECT 1 FROM ew_usage_project_rollups LIMIT 1").fetchone() is None
+                and conn.execute("SELECT 1 FROM ew_model_calls LIMIT 1").fetchone() is not None):
+            rebuild_usage_rollups(conn)
+        _ensure_change_triggers(conn)
         conn.execute("UPDATE ew_rules SET check_rule = title WHERE check_rule IS NULL OR check_rule = ''")
         conn.execute("UPDATE ew_rules SET source_type = CASE WHEN rule_set_id IN (SELECT rule_set_id FROM ew_rule_sets WHERE source_task_id IS NOT NULL) THEN 'ai' ELSE 'manual' END WHERE source_type IS NULL OR source_type = ''")
         _migrate_known_legacy_prompt_override(conn)
@@ -893,6 +1090,33 @@ def _ensure_column(conn: sqlite3.Connection, table: str, column: str, definition
         conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
 
 
+def _ensure_change_triggers(conn: sqlite3.Connection) -> None:
+    """为轮询接口维护变更序号：任一相关表写入时递增全局序号，并记到所属项目（或全局配置）。
+
+    触发器在 SQLite 内执行，worker 与网页进程的所有写入路径都会覆盖，无需逐个调用点维护。
+    ``ew_tasks.change_seq`` 同时记录每个任务最后一次变化时的全局序号，供增量拉取任务列表。
+    """
+    conn.execute("INSERT OR IGNORE INTO ew_change_scopes(scope, change_seq) VALUES (?, 0)", (CHANGE_SCOPE_ALL,))
+    for table, scope in _CHANGE_SCOPE_SOURCES.items():
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            scope_value = scope.format(row=row)
+            task_stamp = (
+                f"UPDATE ew_tasks SET change_seq = (SELECT change_seq FROM ew_change_scopes WHERE scope = '{CHANGE_SCOPE_ALL}') "
+                "WHERE rowid = NEW.rowid;"
+                if table == "ew_tasks" and row == "NEW" else ""
+            )
+            conn.execute(
+                f"""CREATE TRIGGER IF NOT EXISTS trg_ew_change_{table}_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE ew_change_scopes SET change_seq = change_seq + 1 WHERE scope = '{CHANGE_SCOPE_ALL}';
+                    INSERT INTO ew_change_scopes(scope, change_seq)
+                        SELECT {scope_value}, change_seq FROM ew_change_scopes
+                        WHERE scope = '{CHANGE_SCOPE_ALL}' AND {scope_value} IS NOT NULL
+                        ON CONFLICT(scope) DO UPDATE SET change_seq = excluded.change_seq;
+                    {task_stamp}
+                END"""
+            )
+
+
 def _migrate_known_legacy_prompt_override(conn: sqlite3.Connection) -> None:
     """只升级已确认的历史默认覆盖，不改写用户后来编辑过的提示词。"""
     row = conn.execute(
@@ -1254,6 +1478,94 @@ def get_ocr_page_cache(app, document_id: str, page_number: int, image_hash: str,
     return value if isinstance(value, dict) else None
 
 
+def has_ocr_page_cache(app, document_id: str, page_number: int, service: str) -> bool:
+    """该页在某 OCR 服务下是否有任何缓存行（不论图片哈希）；走 document_id, page_number 索引。"""
+    with connection(app) as conn:
+        row = conn.execute(
+            "SELECT 1 FROM ew_ocr_page_cache WHERE document_id=? AND page_number=? AND service=? LIMIT 1",
+            (document_id, page_number, service),
+        ).fetchone()
+    return row is not None
+
+
+def get_ocr_render_hash(app, document_sha256: str, page_number: int, render_profile: str) -> str:
+    """返回同一文件内容、同一页、同一渲染档位上次渲染出的图片哈希；未记录时返回空串。"""
+    if not document_sha256:
+        return ""
+    with connection(app) as conn:
+        row = conn.execute(
+            "SELECT image_hash FROM ew_ocr_render_keys WHERE document_sha256=? AND page_number=? AND render_profile=?",
+            (document_sha256, page_number, render_profile),
+        ).fetchone()
+    return str(row["image_hash"]) if row else ""
+
+
+def save_ocr_render_hash(app, document_sha256: str, page_number: int, render_profile: str, image_hash: str) -> None:
+    if not document_sha256 or not image_hash:
+        return
+    with connection(app) as conn:
+        conn.execute(
+            "INSERT INTO ew_ocr_render_keys(document_sha256, page_number, render_profile, image_hash, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(document_sha256, page_number, render_profile) DO UPDATE SET image_hash=excluded.image_hash, updated_at=excluded.updated_at",
+            (document_sha256, page_number, render_profile, image_hash, now_iso()),
+        )
+
+
+def get_model_response_cache(app, cache_key: str) -> dict | None:
+    """按内容键读取此前成功解析的模型响应，并刷新最近使用时间供淘汰排序。"""
+    if not cache_key or MODEL_RESPONSE_CACHE_MB <= 0:
+        return None
+    with connection(app) as conn:
+        row = conn.execute(
+            "SELECT response_json FROM ew_model_response_cache WHERE cache_key=?", (cache_key,),
+        ).fetchone()
+        if not row:
+            return None
+        conn.execute(
+            "UPDATE ew_model_response_cache SET hit_count=hit_count+1, last_used_at=? WHERE cache_key=?",
+            (now_iso(), cache_key),
+        )
+    try:
+        value = json.loads(row["response_json"])
+    except (TypeError, json.JSONDecodeError):
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def save_model_response_cache(app, cache_key: str, response: dict, *, model_name: str, base_url: str,
+                              thinking_mode: str = "") -> None:
+    """保存已通过解析的模型响应（不含提示词），总量超出上限时按最近使用时间淘汰。"""
+    limit = MODEL_RESPONSE_CACHE_MB * 1024 * 1024
+    if not cache_key or limit <= 0 or not isinstance(response, dict):
+        return
+    value = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+    size = len(value.encode("utf-8"))
+    if size > limit:
+        return
+    timestamp = now_iso()
+    with connection(app) as conn:
+        conn.execute(
+            """INSERT INTO ew_model_response_cache(cache_key, model_name, base_url, thinking_mode, response_json,
+               size_bytes, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(cache_key) DO UPDATE SET response_json=excluded.response_json,
+               size_bytes=excluded.size_bytes, last_used_at=excluded.last_used_at""",
+            (cache_key, model_name, base_url, thinking_mode or "", value, size, timestamp, timestamp),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ew_model_response_cache").fetchone()[0]
+        if total <= limit:
+            return
+        evicted = []
+        for row in conn.execute(
+            "SELECT cache_key, size_bytes FROM ew_model_response_cache WHERE cache_key<>? ORDER BY last_used_at, rowid",
+            (cache_key,),
+        ).fetchall():
+            if total <= limit:
+                break
+            evicted.append((row["cache_key"],))
+            total -= int(row["size_bytes"] or 0)
+        conn.executemany("DELETE FROM ew_model_response_cache WHERE cache_key=?", evicted)
+
+
 def list_ocr_cached_page_texts(app, document_id: str) -> list[dict]:
     """列出一份文件在页级缓存中已识别的非空文字页，供本地事实兜底复用。
 
@@ -1471,6 +1783,8 @@ def delete_project(app, project_id: str) -> None:
         if not exists:
             raise ValueError("评标项目不存在")
         conn.execute("DELETE FROM ew_projects WHERE project_id = ?", (project_id,))
+        # 级联删除子表时触发器会重新写入该项目的变更序号，这里一并清理。
+        conn.execute("DELETE FROM ew_change_scopes WHERE scope = ?", (project_id,))
     if target.exists():
         shutil.rmtree(target)
 
@@ -1882,6 +2196,8 @@ def delete_document(app, project_id: str, document_id: str) -> None:
     document_path(app, document).unlink(missing_ok=True)
     if document.get("parsed_path"):
         Path(document["parsed_path"]).unlink(missing_ok=True)
+        remove_page_index(document["parsed_path"])
+        remove_page_embeddings(document["parsed_path"])
 
 
 def create_task(app, project_id: str, task_type: str, payload: dict | None = None) -> dict:
@@ -1992,19 +2308,72 @@ def find_reusable_task(app, project_id: str, task_type: str, input_fingerprint:
 
 
 def get_task(app, task_id: str) -> dict | None:
+    flush_task_progress(app, task_id)
     with connection(app) as conn:
         row = conn.execute("SELECT * FROM ew_tasks WHERE task_id = ?", (task_id,)).fetchone()
     return task_to_dict(row) if row else None
 
 
-def list_tasks(app, project_id: str) -> list[dict]:
+TASK_LIST_LIMIT = 50
+
+
+def list_tasks(app, project_id: str, since: int | None = None) -> list[dict]:
+    """项目最近 50 个任务。
+
+    给出 ``since`` 时按变更序号升序返回其后变更的至多 50 个任务（任务不会被单独删除）；
+    超过 50 个时调用方以最后一个任务的 ``change_seq`` 为下一次游标，其余任务下次补齐。
+    """
+    flush_task_progress(app)
     with connection(app) as conn:
-        rows = conn.execute("SELECT * FROM ew_tasks WHERE project_id = ? ORDER BY created_at DESC, rowid DESC LIMIT 50", (project_id,)).fetchall()
+        if since is None:
+            rows = conn.execute(
+                "SELECT * FROM ew_tasks WHERE project_id = ? ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                (project_id, TASK_LIST_LIMIT),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM ew_tasks WHERE project_id = ? AND change_seq > ? ORDER BY change_seq, rowid LIMIT ?",
+                (project_id, since, TASK_LIST_LIMIT),
+            ).fetchall()
     return [task_to_dict(row) for row in rows]
 
 
+def project_change_seq(app, project_id: str) -> int:
+    """项目（含文件、任务、规则与评审结果）最后一次变更时的全局序号。"""
+    with connection(app) as conn:
+        row = conn.execute("SELECT change_seq FROM ew_change_scopes WHERE scope = ?", (project_id,)).fetchone()
+    return int(row["change_seq"]) if row else 0
+
+
+def project_change_token(app, project_id: str, *, queue: bool = False, settings: bool = False) -> str:
+    """轮询接口的内容版本号，用作 ETag 与长轮询游标。
+
+    ``queue``：项目有排队任务时，排队说明还取决于其他项目任务的进度，需并入全局序号；
+    ``settings``：内容还取决于模型配置与提示词设置（如查重链路是否仍为当前版本）。
+    """
+    flush_task_progress(app)
+    with connection(app) as conn:
+        scopes = {
+            row["scope"]: int(row["change_seq"])
+            for row in conn.execute(
+                "SELECT scope, change_seq FROM ew_change_scopes WHERE scope IN (?, ?, ?)",
+                (project_id, CHANGE_SCOPE_ALL, CHANGE_SCOPE_SETTINGS),
+            ).fetchall()
+        }
+        queued = queue and conn.execute(
+            "SELECT 1 FROM ew_tasks WHERE project_id = ? AND status = 'queued' LIMIT 1", (project_id,)
+        ).fetchone() is not None
+    parts = [str(scopes.get(project_id, 0))]
+    if queued:
+        parts.append(f"q{scopes.get(CHANGE_SCOPE_ALL, 0)}")
+    if settings:
+        parts.append(f"s{scopes.get(CHANGE_SCOPE_SETTINGS, 0)}")
+    return ".".join(parts)
+
+
 def list_task_summaries(app, project_id: str) -> list[dict]:
     """供轮询使用；综合评审仅携带很小的已完成投标人清单。"""
+    flush_task_progress(app)
     with connection(app) as conn:
         rows = conn.execute(
             """SELECT task_id, project_id, task_type, status, progress, message, error, created_at, started_at, finished_at, updated_at,
@@ -2039,12 +2408,33 @@ def list_task_summaries(app, project_id: str) -> list[dict]:
     return values
 
 
+def fair_task_order(queued: list[dict], last_dispatch: dict[str, float] | None = None) -> list[dict]:
+    """按项目轮转排列排队任务。
+
+    同一项目内保持 FIFO（后续任务常依赖前序解析或规则结果）；项目之间按最近一次被
+    调度的时间轮转，从未调度过的项目按其最早排队任务排在前面。这样一个项目连续提交的
+    多个任务不会把其他项目的小任务压在队尾。
+    """
+    by_project: dict[str, list[dict]] = {}
+    # 稳定排序：同一秒入队的任务保持调用方给出的插入顺序。
+    for task in sorted(queued, key=lambda item: item["created_at"]):
+        by_project.setdefault(task["project_id"], []).append(task)
+    last_dispatch = last_dispatch or {}
+    projects = sorted(by_project, key=lambda project_id: (
+        last_dispatch.get(project_id, 0.0), by_project[project_id][0]["created_at"],
+    ))
+    ordered: list[dict] = []
+    for depth in range(max((len(tasks) for tasks in by_project.values()), default=0)):
+        ordered.extend(by_project[project_id][depth] for project_id in projects if depth < len(by_project[project_id]))
+    return ordered
+
+
 def task_queue_contexts(app, project_id: str) -> dict[str, dict]:
     """返回当前项目排队任务的全局队列说明。
 
-    工作台只有一个按需 worker，会从全局 FIFO 队列逐个取任务。这里刻意只暴露
-    正在运行任务的项目名称、阶段和进度，不携带文件名、评审结论或模型输出；前端
-    可据此说明“为什么还在排队”，而不改变既有 tasks 字段的兼容语义。
+    worker 按资源类别并行执行多个任务，并在项目之间轮转（见 ``fair_task_order``）。
+    这里刻意只暴露正在运行任务的项目名称、阶段和进度，不携带文件名、评审结论或模型
+    输出；同项目有任务在运行时优先展示该任务，因为同一项目内的任务仍逐个执行。
     """
     with connection(app) as conn:
         running = conn.execute(
@@ -2052,16 +2442,18 @@ def task_queue_contexts(app, project_id: str) -> dict[str, dict]:
                       p.name AS project_name, p.section_name
                FROM ew_tasks t JOIN ew_projects p ON p.project_id = t.project_id
                WHERE t.status = 'running'
-               ORDER BY t.started_at, t.created_at LIMIT 1"""
-        ).fetchone()
+               ORDER BY t.started_at, t.created_at"""
+        ).fetchall()
         queued = conn.execute(
-            """SELECT task_id, project_id FROM ew_tasks
-               WHERE status = 'queued' ORDER BY created_at, task_id"""
+            """SELECT task_id, project_id, task_type, created_at FROM ew_tasks
+               WHERE status = 'queued' ORDER BY created_at, rowid"""
         ).fetchall()
-    active = dict(running) if running else None
+    running_tasks = [dict(row) for row in running]
+    same_project = next((item for item in running_tasks if item["project_id"] == project_id), None)
+    active = same_project or (running_tasks[0] if running_tasks else None)
     contexts: dict[str, dict] = {}
-    running_count = 1 if active else 0
-    for queue_index, row in enumerate(queued):
+    running_count = len(running_tasks)
+    for queue_index, row in enumerate(fair_task_order([dict(item) for item in queued])):
         if row["project_id"] != project_id:
             continue
         contexts[row["task_id"]] = {
@@ -2102,23 +2494,138 @@ def task_to_dict(row) -> dict:
     return value
 
 
-def next_queued_task(app) -> dict | None:
+def list_queued_tasks(app) -> list[dict]:
+    """调度器使用的轻量排队列表，不读取 payload/result。"""
+    with connection(app) as conn:
+        rows = conn.execute(
+            """SELECT task_id, project_id, task_type, created_at FROM ew_tasks
+               WHERE status = 'queued' ORDER BY created_at, rowid"""
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def claim_queued_task(app, task_id: str) -> dict | None:
+    """把指定排队任务原子地切为 running；已被取消或领取时返回 None。"""
+    timestamp = now_iso()
     with connection(app) as conn:
-        row = conn.execute("SELECT * FROM ew_tasks WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
-        if not row:
-            return None
-        timestamp = now_iso()
         updated = conn.execute(
             "UPDATE ew_tasks SET status = 'running', started_at = ?, updated_at = ? WHERE task_id = ? AND status = 'queued'",
-            (timestamp, timestamp, row["task_id"]),
+            (timestamp, timestamp, task_id),
         ).rowcount
-        if not updated:
+    return get_task(app, task_id) if updated else None
+
+
+def next_queued_task(app) -> dict | None:
+    with connection(app) as conn:
+        row = conn.execute("SELECT task_id FROM ew_tasks WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+    if not row:
+        return None
+    return claim_queued_task(app, row["task_id"])
+
+
+def _progress_key(app, task_id: str) -> tuple[str, str]:
+    return str(database_path(app)), task_id
+
+
+def _write_pending_progress(app, task_id: str, pending: dict) -> None:
+    fields = [f"{name} = ?" for name in pending] + ["updated_at = ?"]
+    values = [*pending.values(), now_iso(), task_id]
+    with connection(app) as conn:
+        # 延迟写入不能覆盖已经结束的任务（结束时的进度与说明以 finalize/update 为准）。
+        conn.execute(
+            f"UPDATE ew_tasks SET {', '.join(fields)} WHERE task_id = ? AND finished_at IS NULL",
+            values,
+        )
+
+
+def _flush_deferred_progress(app, key: tuple[str, str]) -> None:
+    with _PROGRESS_LOCK:
+        pending = _PENDING_PROGRESS.pop(key, None)
+        if pending is None:
+            return
+        pending.pop("timer", None)
+        _PROGRESS_WRITTEN[key] = time.monotonic()
+    try:
+        _write_pending_progress(app, key[1], pending)
+    except sqlite3.Error:
+        pass
+
+
+def flush_task_progress(app, task_id: str | None = None) -> None:
+    """立即写入本进程内尚未落库的进度；``task_id`` 为空时写入当前数据库的全部任务。"""
+    database = str(database_path(app))
+    with _PROGRESS_LOCK:
+        keys = [key for key in _PENDING_PROGRESS if key[0] == database and task_id in {None, key[1]}]
+        for key in keys:
+            timer = _PENDING_PROGRESS[key].get("timer")
+            if timer is not None:
+                timer.cancel()
+    for key in keys:
+        _flush_deferred_progress(app, key)
+
+
+def _coalesce_progress(app, task_id: str, fields: dict) -> dict | None:
+    """进度合并：距上次写入不足 ``PROGRESS_FLUSH_MS`` 时暂存并返回 None，到期由定时器写入最新值。
+
+    否则返回本次应写入的字段（含此前暂存、尚未写入的字段）。
+    """
+    key = _progress_key(app, task_id)
+    interval = PROGRESS_FLUSH_MS / 1000
+    now = time.monotonic()
+    with _PROGRESS_LOCK:
+        last = _PROGRESS_WRITTEN.get(key)
+        pending = _PENDING_PROGRESS.get(key)
+        if last is not None and now - last < interval:
+            if pending is None:
+                pending = _PENDING_PROGRESS[key] = {}
+            pending.update(fields)
+            if pending.get("timer") is None:
+                timer = threading.Timer(interval - (now - last), _flush_deferred_progress, (app, key))
+                timer.daemon = True
+                pending["timer"] = timer
+                timer.start()
             return None
-    return get_task(app, row["task_id"])
+        _PENDING_PROGRESS.pop(key, None)
+        if pending is not None and pending.get("timer") is not None:
+            pending["timer"].cancel()
+        _PROGRESS_WRITTEN[key] = now
+    merged = {name: value for name, value in (pending or {}).items() if name != "timer"}
+    merged.update(fields)
+    return merged
+
+
+def _discard_task_progress(app, task_id: str) -> dict:
+    """任务状态变化时取走暂存进度，返回尚未写入的字段供本次写入合并。"""
+    key = _progress_key(app, task_id)
+    with _PROGRESS_LOCK:
+        pending = _PENDING_PROGRESS.pop(key, None) or {}
+        _PROGRESS_WRITTEN.pop(key, None)
+    timer = pending.pop("timer", None)
+    if timer is not None:
+        timer.cancel()
+    return pending
 
 
 def update_task(app, task_id: str, *, progress: int | None = None, message: str | None = None,
                 status: str | None = None, result: dict | None = None, error: str | None = None) -> None:
+    if status is None and result is None and error is None and PROGRESS_FLUSH_MS > 0:
+        # 多个评审线程几乎每一步都会更新进度说明；这类纯进度写入按任务合并，
+        # 减少与网页进程轮询同一数据库时的写锁争用。
+        fields = {}
+        if progress is not None:
+            fields["progress"] = max(0, min(100, int(progress)))
+        if message is not None:
+            fields["message"] = message
+        fields = _coalesce_progress(app, task_id, fields)
+        if fields is None:
+            return
+        progress, message = fields.get("progress"), fields.get("message")
+    else:
+        pending = _discard_task_progress(app, task_id)
+        if progress is None:
+            progress = pending.get("progress")
+        if message is None:
+            message = pending.get("message")
     fields, values = [], []
     if progress is not None:
         fields.append("progress = ?")
@@ -2203,6 +2710,7 @@ def finalize_task(app, task_id: str, *, status: str, progress: int | None = None
     """原子完成任务；若终止请求与正常完成竞态，终止优先且保留已发布清单。"""
     if status not in {"success", "error", "cancelled", "interrupted"}:
         raise ValueError("任务最终状态不正确")
+    _discard_task_progress(app, task_id)
     timestamp = now_iso()
     with connection(app, immediate=True) as conn:
         row = conn.execute("SELECT * FROM ew_tasks WHERE task_id=?", (task_id,)).fetchone()
@@ -2253,10 +2761,13 @@ def _safe_positive_int(value: object) -> int | None:
 
 
 def record_model_call(app, task_id: str, project_id: str, phase: str, profile_id: str | None,
-                      *, document_id: str | None = None, input_chars: int = 0,
-                      context_mode: str = "full", usage: dict | None = None,
+                      *, document_id: str | None = None, document_ids: list[str] | None = None,
+                      input_chars: int = 0, context_mode: str = "full", usage: dict | None = None,
                       response_metadata: dict | None = None) -> None:
-    """保存供应商返回的用量；不保存提示词、正文或密钥。"""
+    """保存供应商返回的用量；不保存提示词、正文或密钥。
+
+    一次请求覆盖多份投标文件时，``document_ids`` 以 JSON 数组记录全部成员，``document_id`` 留空。
+    """
     usage = usage or {}
     response_metadata = response_metadata or {}
 
@@ -2285,29 +2796,125 @@ def record_model_call(app, task_id: str, project_id: str, phase: str, profile_id
     total_tokens = number("total_tokens")
     if total_tokens is None and (prompt_tokens is not None or completion_tokens is not None):
         total_tokens = (prompt_tokens or 0) + (completion_tokens or 0)
+    cache_hit_tokens = number("prompt_cache_hit_tokens", "cache_hit_tokens", "cached_tokens") or nested_number(
+        ("prompt_tokens_details", "cached_tokens"),
+        ("usage", "prompt_tokens_details", "cached_tokens"),
+        ("cache_read_input_tokens",),
+    )
+    input_chars = max(0, int(input_chars))
+    created_at = now_iso()
     with connection(app) as conn:
         conn.execute(
             """INSERT INTO ew_model_calls(call_id, task_id, project_id, document_id, phase, profile_id,
                context_mode, input_chars, prompt_tokens, completion_tokens, total_tokens, cache_hit_tokens,
                requested_max_tokens, finish_reason, response_chars, parse_status, parse_error_kind,
-               local_json_repaired, created_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+               local_json_repaired, document_ids, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (str(uuid.uuid4()), task_id, project_id, document_id, phase, profile_id, context_mode,
-             max(0, int(input_chars)), prompt_tokens, completion_tokens, total_tokens,
-             number("prompt_cache_hit_tokens", "cache_hit_tokens", "cached_tokens") or nested_number(
-                 ("prompt_tokens_details", "cached_tokens"),
-                 ("usage", "prompt_tokens_details", "cached_tokens"),
-                 ("cache_read_input_tokens",),
-             ),
+             input_chars, prompt_tokens, completion_tokens, total_tokens, cache_hit_tokens,
              _safe_positive_int(response_metadata.get("requested_max_tokens")),
              str(response_metadata.get("finish_reason") or "")[:64] or None,
              _safe_positive_int(response_metadata.get("response_chars")),
              str(response_metadata.get("parse_status") or "")[:32] or None,
              str(response_metadata.get("parse_error_kind") or "")[:96] or None,
-             1 if response_metadata.get("local_json_repaired") else 0, now_iso()),
+             1 if response_metadata.get("local_json_repaired") else 0,
+             json.dumps(list(document_ids), ensure_ascii=False) if document_ids else None, created_at),
+        )
+        # 汇总表与台账同一事务写入，用量面板只读汇总表，不随调用记录增长而变慢。
+        counters = (
+            1, input_chars, prompt_tokens or 0, completion_tokens or 0, total_tokens or 0, cache_hit_tokens or 0,
+            int(total_tokens is not None), int(prompt_tokens is not None),
+            (cache_hit_tokens or 0) if prompt_tokens is not None else 0,
+        )
+        family = usage_family(context_mode)
+        conn.execute(
+            f"""INSERT INTO ew_usage_rollups(task_id, project_id, phase, family, profile_id, day,
+                {", ".join(USAGE_ROLLUP_COUNTERS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(task_id, phase, family, profile_id, day) DO UPDATE SET {_USAGE_ROLLUP_ACCUMULATE}""",
+            (task_id, project_id, phase, family, profile_id or "", created_at[:10], *counters),
+        )
+        conn.execute(
+            f"""INSERT INTO ew_usage_project_rollups(project_id, phase, family, {", ".join(USAGE_ROLLUP_COUNTERS)})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(project_id, phase, family) DO UPDATE SET {_USAGE_ROLLUP_ACCUMULATE}""",
+            (project_id, phase, family, *counters),
         )
 
 
+USAGE_ROLLUP_COUNTERS = (
+    "call_count", "input_chars", "prompt_tokens", "completion_tokens", "total_tokens", "cache_hit_tokens",
+    "metered_calls", "prompt_calls", "prompt_cache_hit_tokens",
+)
+_USAGE_ROLLUP_ACCUMULATE = ", ".join(f"{name} = {name} + excluded.{name}" for name in USAGE_ROLLUP_COUNTERS)
+# 与 usage_family 一致的 SQL 口径，用于从台账重建汇总。
+_USAGE_FAMILY_SQL = """CASE
+    WHEN context_mode LIKE 'vision%' THEN 'vision'
+    WHEN context_mode = 'tencent_ocr' THEN 'tencent_ocr'
+    WHEN context_mode = 'local_ocr' THEN 'local_ocr'
+    ELSE 'text' END"""
+_USAGE_LEDGER_COUNTERS_SQL = """COUNT(*), COALESCE(SUM(input_chars), 0), COALESCE(SUM(prompt_tokens), 0),
+    COALESCE(SUM(completion_tokens), 0), COALESCE(SUM(total_tokens), 0), COALESCE(SUM(cache_hit_tokens), 0),
+    SUM(CASE WHEN total_tokens IS NOT NULL THEN 1 ELSE 0 END),
+    SUM(CASE WHEN prompt_tokens IS NOT NULL THEN 1 ELSE 0 END),
+    COALESCE(SUM(CASE WHEN prompt_tokens IS NOT NULL THEN cache_hit_tokens END), 0)"""
+
+
+def usage_family(context_mode: str) -> str:
+    """用量分项：图片识别、腾讯 OCR、本地 OCR 与文字模型。"""
+    mode = str(context_mode or "")
+    if mode.lower().startswith("vision"):
+        return "vision"
+    if mode in {"tencent_ocr", "local_ocr"}:
+        return mode
+    return "text"
+
+
+def rebuild_usage_rollups(conn: sqlite3.Connection) -> None:
+    """按调用台账重建全部用量汇总（升级补建与一致性修复共用）。"""
+    conn.execute("DELETE FROM ew_usage_rollups")
+    conn.execute("DELETE FROM ew_usage_project_rollups")
+    conn.execute(
+        f"""INSERT INTO ew_usage_rollups(task_id, project_id, phase, family, profile_id, day,
+            {", ".join(USAGE_ROLLUP_COUNTERS)})
+            SELECT task_id, project_id, phase, {_USAGE_FAMILY_SQL} AS family, COALESCE(profile_id, ''),
+                   substr(created_at, 1, 10) AS day, {_USAGE_LEDGER_COUNTERS_SQL}
+            FROM ew_model_calls GROUP BY task_id, project_id, phase, family, COALESCE(profile_id, ''), day"""
+    )
+    conn.execute(
+        f"""INSERT INTO ew_usage_project_rollups(project_id, phase, family, {", ".join(USAGE_ROLLUP_COUNTERS)})
+            SELECT project_id, phase, {_USAGE_FAMILY_SQL} AS family, {_USAGE_LEDGER_COUNTERS_SQL}
+            FROM ew_model_calls GROUP BY project_id, phase, family"""
+    )
+
+
+def usage_rollup_mismatches(conn: sqlite3.Connection) -> list[dict]:
+    """逐项比对汇总表与调用台账重新聚合的结果，返回不一致的键与两边数值（一致时为空列表）。"""
+    mismatches = []
+    checks = (
+        ("ew_usage_rollups", ("task_id", "project_id", "phase", "family", "profile_id", "day"),
+         f"""SELECT task_id, project_id, phase, {_USAGE_FAMILY_SQL} AS family, COALESCE(profile_id, '') AS profile_id,
+                    substr(created_at, 1, 10) AS day, {_USAGE_LEDGER_COUNTERS_SQL}
+             FROM ew_model_calls GROUP BY task_id, project_id, phase, family, COALESCE(profile_id, ''), day"""),
+        ("ew_usage_project_rollups", ("project_id", "phase", "family"),
+         f"""SELECT project_id, phase, {_USAGE_FAMILY_SQL} AS family, {_USAGE_LEDGER_COUNTERS_SQL}
+             FROM ew_model_calls GROUP BY project_id, phase, family"""),
+    )
+    for table, keys, ledger_sql in checks:
+        expected = {tuple(row[:len(keys)]): tuple(row[len(keys):]) for row in conn.execute(ledger_sql).fetchall()}
+        stored = {
+            tuple(row[:len(keys)]): tuple(row[len(keys):])
+            for row in conn.execute(f"SELECT {', '.join(keys)}, {', '.join(USAGE_ROLLUP_COUNTERS)} FROM {table}").fetchall()
+        }
+        for key in sorted(set(expected) | set(stored), key=lambda item: tuple(map(str, item))):
+            if expected.get(key) != stored.get(key):
+                mismatches.append({
+                    "table": table, "key": dict(zip(keys, key)),
+                    "ledger": dict(zip(USAGE_ROLLUP_COUNTERS, expected[key])) if key in expected else None,
+                    "rollup": dict(zip(USAGE_ROLLUP_COUNTERS, stored[key])) if key in stored else None,
+                })
+    return mismatches
+
+
 def get_evaluation_scan_checkpoint(app, document_id: str, scan_key: str, chunk_id: str, chunk_hash: str) -> object | None:
     """读取可复用的全文扫描页块；只保存候选证据，不保存模型原始输出。"""
     with connection(app) as conn:
@@ -2723,35 +3330,33 @@ def save_project_scope_checkpoint(app, project_id: str, scope_key: str, scope: d
         )
 
 
+_USAGE_TOTALS_SQL = """COALESCE(SUM(call_count), 0) AS call_count, COALESCE(SUM(input_chars), 0) AS input_chars,
+    COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+    COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+    COALESCE(SUM(total_tokens), 0) AS total_tokens,
+    COALESCE(SUM(cache_hit_tokens), 0) AS cache_hit_tokens,
+    SUM(metered_calls) AS metered_calls"""
+_USAGE_FAMILY_TOTALS_SQL = """family, SUM(call_count) AS call_count,
+    SUM(total_tokens) AS total_tokens, SUM(input_chars) AS input_chars"""
+
+
 def project_token_usage(app, project_id: str) -> dict:
+    # 模型调用部分读取 record_model_call 同步维护的项目汇总（每项目至多“环节 × 分项”行），
+    # 不再按调用台账逐行聚合；口径与台账一致，可用 scripts/usage_rollup_check.py 核对。
     with connection(app) as conn:
         row = conn.execute(
-            """SELECT COUNT(*) AS call_count, COALESCE(SUM(input_chars), 0) AS input_chars,
-               COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
-               COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
-               COALESCE(SUM(total_tokens), 0) AS total_tokens,
-               COALESCE(SUM(cache_hit_tokens), 0) AS cache_hit_tokens,
-               SUM(CASE WHEN total_tokens IS NOT NULL THEN 1 ELSE 0 END) AS metered_calls
-               FROM ew_model_calls WHERE project_id = ?""", (project_id,)
+            f"SELECT {_USAGE_TOTALS_SQL} FROM ew_usage_project_rollups WHERE project_id = ?", (project_id,)
         ).fetchone()
         family_rows = conn.execute(
-            """SELECT CASE
-                        WHEN context_mode LIKE 'vision%' THEN 'vision'
-                        WHEN context_mode = 'tencent_ocr' THEN 'tencent_ocr'
-                        WHEN context_mode = 'local_ocr' THEN 'local_ocr'
-                        ELSE 'text' END AS family,
-                      COUNT(*) AS call_count,
-                      COALESCE(SUM(total_tokens), 0) AS total_tokens,
-                      COALESCE(SUM(input_chars), 0) AS input_chars
-               FROM ew_model_calls WHERE project_id = ?
-               GROUP BY family""", (project_id,),
+            f"SELECT {_USAGE_FAMILY_TOTALS_SQL} FROM ew_usage_project_rollups WHERE project_id = ? GROUP BY family",
+            (project_id,),
         ).fetchall()
         cache_phase_rows = conn.execute(
-            """SELECT phase, COUNT(*) AS call_count,
-                      COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
-                      COALESCE(SUM(cache_hit_tokens), 0) AS cache_hit_tokens
-               FROM ew_model_calls
-               WHERE project_id=? AND prompt_tokens IS NOT NULL
+            """SELECT phase, SUM(prompt_calls) AS call_count,
+                      SUM(prompt_tokens) AS prompt_tokens,
+                      SUM(prompt_cache_hit_tokens) AS cache_hit_tokens
+               FROM ew_usage_project_rollups
+               WHERE project_id=? AND prompt_calls > 0
                GROUP BY phase
                ORDER BY cache_hit_tokens DESC, prompt_tokens DESC
                LIMIT 12""",
@@ -2835,7 +3440,7 @@ def latest_evaluation_run_usage(app, project_id: str) -> dict | None:
             """SELECT t.task_id, t.task_type, t.payload_json, t.started_at, t.finished_at
                FROM ew_tasks t
                WHERE t.project_id=? AND t.status='success'
-                 AND (EXISTS (SELECT 1 FROM ew_model_calls m WHERE m.task_id=t.task_id)
+                 AND (EXISTS (SELECT 1 FROM ew_usage_rollups u WHERE u.task_id=t.task_id)
                       OR EXISTS (SELECT 1 FROM ew_ocr_usage_ledger o WHERE o.task_id=t.task_id)
                       OR EXISTS (SELECT 1 FROM ew_local_ocr_runs r WHERE r.task_id=t.task_id))
                ORDER BY t.finished_at DESC LIMIT 1""",
@@ -2844,26 +3449,9 @@ def latest_evaluation_run_usage(app, project_id: str) -> dict | None:
         if not task_row:
             return None
         task_id = task_row["task_id"]
-        row = conn.execute(
-            """SELECT COUNT(*) AS call_count, COALESCE(SUM(input_chars), 0) AS input_chars,
-               COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
-               COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
-               COALESCE(SUM(total_tokens), 0) AS total_tokens,
-               COALESCE(SUM(cache_hit_tokens), 0) AS cache_hit_tokens,
-               SUM(CASE WHEN total_tokens IS NOT NULL THEN 1 ELSE 0 END) AS metered_calls
-               FROM ew_model_calls WHERE task_id = ?""", (task_id,)
-        ).fetchone()
+        row = conn.execute(f"SELECT {_USAGE_TOTALS_SQL} FROM ew_usage_rollups WHERE task_id = ?", (task_id,)).fetchone()
         family_rows = conn.execute(
-            """SELECT CASE
-                        WHEN context_mode LIKE 'vision%' THEN 'vision'
-                        WHEN context_mode = 'tencent_ocr' THEN 'tencent_ocr'
-                        WHEN context_mode = 'local_ocr' THEN 'local_ocr'
-                        ELSE 'text' END AS family,
-                      COUNT(*) AS call_count,
-                      COALESCE(SUM(total_tokens), 0) AS total_tokens,
-                      COALESCE(SUM(input_chars), 0) AS input_chars
-               FROM ew_model_calls WHERE task_id = ?
-               GROUP BY family""", (task_id,),
+            f"SELECT {_USAGE_FAMILY_TOTALS_SQL} FROM ew_usage_rollups WHERE task_id = ? GROUP BY family", (task_id,),
         ).fetchall()
         ocr_row = conn.execute(
             "SELECT COALESCE(SUM(billed_units), 0) AS ocr_requests FROM ew_ocr_usage_ledger WHERE task_id = ?",
@@ -2930,6 +3518,139 @@ def save_compare_pair(app, task_id: str, document_a_id: str, document_b_id: str,
         )
 
 
+def get_compare_pair_cache(app, document_a_sha256: str, document_b_sha256: str, tender_sha256: str,
+                           algorithm_version: int) -> dict | None:
+    """按文件内容读取此前计算过的文件对比对结果；文件对方向（A/B）是键的一部分。"""
+    if not document_a_sha256 or not document_b_sha256 or COMPARE_PAIR_CACHE_MB <= 0:
+        return None
+    key = (document_a_sha256, document_b_sha256, tender_sha256 or "", int(algorithm_version))
+    with connection(app) as conn:
+        row = conn.execute(
+            "SELECT result_json FROM ew_compare_pair_cache WHERE document_a_sha256=? AND document_b_sha256=? "
+            "AND tender_sha256=? AND algorithm_version=?", key,
+        ).fetchone()
+        if not row:
+            return None
+        conn.execute(
+            "UPDATE ew_compare_pair_cache SET hit_count=hit_count+1, last_used_at=? WHERE document_a_sha256=? "
+            "AND document_b_sha256=? AND tender_sha256=? AND algorithm_version=?", (now_iso(), *key),
+        )
+    try:
+        value = json.loads(row["result_json"])
+    except (TypeError, json.JSONDecodeError):
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def save_compare_pair_cache(app, document_a_sha256: str, document_b_sha256: str, tender_sha256: str,
+                            algorithm_version: int, result: dict) -> None:
+    """保存文件对比对结果，总量超出上限时按最近使用时间淘汰。"""
+    limit = COMPARE_PAIR_CACHE_MB * 1024 * 1024
+    if not document_a_sha256 or not document_b_sha256 or limit <= 0 or not isinstance(result, dict):
+        return
+    value = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    size = len(value.encode("utf-8"))
+    if size > limit:
+        return
+    key = (document_a_sha256, document_b_sha256, tender_sha256 or "", int(algorithm_version))
+    timestamp = now_iso()
+    with connection(app) as conn:
+        conn.execute(
+            """INSERT INTO ew_compare_pair_cache(document_a_sha256, document_b_sha256, tender_sha256,
+               algorithm_version, result_json, size_bytes, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(document_a_sha256, document_b_sha256, tender_sha256, algorithm_version) DO UPDATE SET
+               result_json=excluded.result_json, size_bytes=excluded.size_bytes, last_used_at=excluded.last_used_at""",
+            (*key, value, size, timestamp, timestamp),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ew_compare_pair_cache").fetchone()[0]
+        if total <= limit:
+            return
+        evicted = []
+        for row in conn.execute(
+            "SELECT rowid, size_bytes FROM ew_compare_pair_cache WHERE NOT (document_a_sha256=? AND "
+            "document_b_sha256=? AND tender_sha256=? AND algorithm_version=?) ORDER BY last_used_at, rowid", key,
+        ).fetchall():
+            if total <= limit:
+                break
+            evicted.append((row["rowid"],))
+            total -= int(row["size_bytes"] or 0)
+        conn.executemany("DELETE FROM ew_compare_pair_cache WHERE rowid=?", evicted)
+
+
+def page_render_cache_dir(app) -> Path:
+    return data_dir(app) / "page_renders"
+
+
+def _page_render_key(document_sha256: str, page_number: int, scale: float, quality: int, renderer: str) -> tuple:
+    return str(document_sha256), int(page_number), f"{float(scale):.4f}", int(quality), str(renderer)
+
+
+def get_page_render_cache(app, document_sha256: str, page_number: int, scale: float, quality: int,
+                          renderer: str) -> bytes | None:
+    """读取已落盘的页面 JPEG；索引在而文件缺失时删除索引并按未命中处理。"""
+    if not document_sha256 or PAGE_RENDER_CACHE_MB <= 0:
+        return None
+    key = _page_render_key(document_sha256, page_number, scale, quality, renderer)
+    where = "document_sha256=? AND page_number=? AND scale=? AND quality=? AND renderer=?"
+    with connection(app) as conn:
+        row = conn.execute(f"SELECT file_name FROM ew_page_render_cache WHERE {where}", key).fetchone()
+        if not row:
+            return None
+        try:
+            content = (page_render_cache_dir(app) / row["file_name"]).read_bytes()
+        except OSError:
+            conn.execute(f"DELETE FROM ew_page_render_cache WHERE {where}", key)
+            return None
+        conn.execute(
+            f"UPDATE ew_page_render_cache SET hit_count=hit_count+1, last_used_at=? WHERE {where}", (now_iso(), *key),
+        )
+    return content
+
+
+def save_page_render_cache(app, document_sha256: str, page_number: int, scale: float, quality: int,
+                           renderer: str, content: bytes) -> None:
+    """保存页面 JPEG，总量超出上限时按最近使用时间淘汰；写盘失败只放弃缓存，不影响渲染结果。"""
+    limit = PAGE_RENDER_CACHE_MB * 1024 * 1024
+    if not document_sha256 or limit <= 0 or not content or len(content) > limit:
+        return
+    key = _page_render_key(document_sha256, page_number, scale, quality, renderer)
+    file_name = hashlib.sha256("\0".join(map(str, key)).encode("utf-8")).hexdigest() + ".jpg"
+    target = page_render_cache_dir(app) / file_name[:2] / file_name
+    temporary = target.with_name(f"{target.name}.{uuid.uuid4().hex}.partial")
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary.write_bytes(content)
+        temporary.replace(target)
+    except OSError:
+        temporary.unlink(missing_ok=True)
+        return
+    relative_name = f"{file_name[:2]}/{file_name}"
+    timestamp = now_iso()
+    evicted = []
+    with connection(app) as conn:
+        conn.execute(
+            """INSERT INTO ew_page_render_cache(document_sha256, page_number, scale, quality, renderer, file_name,
+               size_bytes, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(document_sha256, page_number, scale, quality, renderer) DO UPDATE SET
+               file_name=excluded.file_name, size_bytes=excluded.size_bytes, last_used_at=excluded.last_used_at""",
+            (*key, relative_name, len(content), timestamp, timestamp),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ew_page_render_cache").fetchone()[0]
+        if total > limit:
+            for row in conn.execute(
+                "SELECT rowid, file_name, size_bytes FROM ew_page_render_cache WHERE NOT (document_sha256=? AND "
+                "page_number=? AND scale=? AND quality=? AND renderer=?) ORDER BY last_used_at, rowid", key,
+            ).fetchall():
+                if total <= limit:
+                    break
+                evicted.append((row["rowid"], row["file_name"]))
+                total -= int(row["size_bytes"] or 0)
+            conn.executemany("DELETE FROM ew_page_render_cache WHERE rowid=?", [(rowid,) for rowid, _ in evicted])
+    # 索引提交后再删文件：并发读取最多遇到“索引已删”的未命中，不会读到半个文件。
+    for _, name in evicted:
+        (page_render_cache_dir(app) / name).unlink(missing_ok=True)
+
+
 def list_compare_pairs(app, task_id: str) -> list[dict]:
     with connection(app) as conn:
         rows = conn.execute("SELECT * FROM ew_compare_pairs WHERE task_id = ? ORDER BY created_at", (task_id,)).fetchall()
@@ -0,0 +1,195 @@
+"""工作台任务调度：按资源类别并行、项目间轮转、按可用内存准入。
+
+worker 进程原先按全局 FIFO 逐个执行任务，一个 12 份投标文件的综合评审大部分时间都在
+等待远端模型，却会把其他项目的解析、价格分计算整段挡在队尾。调度器在同一个 worker
+进程内用线程并行执行多个任务：
+
+* 资源类别：解析、查重以本机 CPU/内存为主（``cpu``），规则提取、评审、评分以等待模型
+  响应为主（``network``），两类分别限额；
+* 公平性：同一项目同时只运行一个任务（保持项目内依赖顺序），项目之间轮转取任务；
+* 准入：按任务类型估算峰值内存，可用内存（含容器 cgroup 限额）不足时暂缓启动，
+  没有任何任务在运行时总是放行一个，保证队列不会停滞。
+
+同进程线程共享本地 OCR 常驻进程池和模型会话，不会因并行任务额外拉起 OCR 子进程。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from dashboard.evaluation_workbench import storage
+
+
+TASK_RESOURCE_CLASSES = {
+    "parse_documents": "cpu",
+    "compare_documents": "cpu",
+    "extract_rules": "network",
+    "extract_price_rules": "network",
+    "calculate_price_scores": "network",
+    "review_documents": "network",
+    "score_objective": "network",
+    "score_subjective": "network",
+    "evaluate_all": "network",
+}
+# 峰值内存估算（MB）。综合评审可能触发本地 OCR 常驻进程（约 500-650 MB），解析和查重
+# 需要把整份 PDF 文本与页面对象留在内存里；其余任务主要是模型请求和 SQLite 读写。
+TASK_MEMORY_ESTIMATES_MB = {
+    "parse_documents": 400,
+    "compare_documents": 500,
+    "evaluate_all": 700,
+}
+DEFAULT_TASK_MEMORY_MB = 150
+# 新启动任务尚未真正分配内存，可用内存读数在这段时间内会偏乐观，需要预扣其估算值。
+ADMISSION_SETTLE_SECONDS = 20
+POLL_SECONDS = 2.0
+
+
+def _env_int(name: str, default: int, lower: int, upper: int) -> int:
+    try:
+        requested = int(os.environ.get(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+    return max(lower, min(upper, requested))
+
+
+def scheduler_limits() -> dict:
+    """并行上限；``EVALUATION_WORKBENCH_MAX_RUNNING_TASKS=1`` 可回到逐个执行。
+
+    2 核 2 GB 服务器上 CPU 类任务保持 1 路，网络类任务 2 路；内存保留量给 Web 进程和
+    系统缓存留出余量。
+    """
+    return {
+        "total": _env_int("EVALUATION_WORKBENCH_MAX_RUNNING_TASKS", 3, 1, 8),
+        "cpu": _env_int("EVALUATION_WORKBENCH_CPU_TASK_SLOTS", 1, 1, 4),
+        "network": _env_int("EVALUATION_WORKBENCH_NETWORK_TASK_SLOTS", 2, 1, 8),
+        "memory_reserve_mb": _env_int("EVALUATION_WORKBENCH_MEMORY_RESERVE_MB", 300, 0, 8192),
+    }
+
+
+def resource_class(task_type: str) -> str:
+    return TASK_RESOURCE_CLASSES.get(task_type, "cpu")
+
+
+def task_memory_mb(task_type: str) -> int:
+    return TASK_MEMORY_ESTIMATES_MB.get(task_type, DEFAULT_TASK_MEMORY_MB)
+
+
+def _cgroup_available_mb() -> float | None:
+    """容器内 /proc/meminfo 反映的是宿主机内存，需再按 cgroup 限额折算。"""
+    base = Path("/sys/fs/cgroup")
+    try:
+        limit = (base / "memory.max").read_text(encoding="utf-8").strip()
+        if limit == "max":
+            return None
+        current = int((base / "memory.current").read_text(encoding="utf-8").strip())
+        return max(0.0, (int(limit) - current) / (1024 * 1024))
+    except (OSError, ValueError):
+        return None
+
+
+def available_memory_mb() -> float | None:
+    """可用内存（MB）；读取失败时返回 None，调度器据此跳过内存准入。"""
+    available = None
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) / 1024
+                    break
+    except (OSError, ValueError, IndexError):
+        available = None
+    cgroup = _cgroup_available_mb()
+    if cgroup is not None:
+        available = cgroup if available is None else min(available, cgroup)
+    return available
+
+
+class TaskScheduler:
+    """在单个 worker 进程内并行调度排队任务，直到队列清空且没有运行中的任务。"""
+
+    def __init__(self, app, runner, *, limits: dict | None = None, memory_probe=available_memory_mb,
+                 poll_seconds: float = POLL_SECONDS):
+        self.app = app
+        self.runner = runner
+        self.limits = limits or scheduler_limits()
+        self.memory_probe = memory_probe
+        self.poll_seconds = poll_seconds
+        self._running: dict[str, dict] = {}
+        self._last_dispatch: dict[str, float] = {}
+        self._condition = threading.Condition()
+
+    def running_tasks(self) -> list[dict]:
+        with self._condition:
+            return [dict(item) for item in self._running.values()]
+
+    def _admissible(self, task: dict, running: list[dict], available_mb: float | None) -> bool:
+        if not running:
+            return True
+        if len(running) >= self.limits["total"]:
+            return False
+        if any(item["project_id"] == task["project_id"] for item in running):
+            return False
+        task_class = resource_class(task["task_type"])
+        if sum(1 for item in running if item["resource_class"] == task_class) >= self.limits[task_class]:
+            return False
+        if available_mb is None:
+            return True
+        now = time.monotonic()
+        settling = sum(item["memory_mb"] for item in running if now - item["started"] < ADMISSION_SETTLE_SECONDS)
+        return available_mb - settling - self.limits["memory_reserve_mb"] >= task_memory_mb(task["task_type"])
+
+    def dispatch(self) -> list[dict]:
+        """启动当前可准入的排队任务，返回本轮已领取的任务。"""
+        queued = storage.list_queued_tasks(self.app)
+        if not queued:
+            return []
+        available_mb = self.memory_probe() if self.memory_probe else None
+        started = []
+        for candidate in storage.fair_task_order(queued, self._last_dispatch):
+            running = self.running_tasks()
+            if len(running) >= self.limits["total"]:
+                break
+            if not self._admissible(candidate, running, available_mb):
+                continue
+            task = storage.claim_queued_task(self.app, candidate["task_id"])
+            if not task:
+                continue
+            entry = {
+                "task_id": task["task_id"], "project_id": task["project_id"], "task_type": task["task_type"],
+                "resource_class": resource_class(task["task_type"]),
+                "memory_mb": task_memory_mb(task["task_type"]), "started": time.monotonic(),
+            }
+            with self._condition:
+                self._running[task["task_id"]] = entry
+            self._last_dispatch[task["project_id"]] = time.monotonic()
+            threading.Thread(
+                target=self._execute, args=(task,), name=f"ew-task-{task['task_id'][:8]}", daemon=False,
+            ).start()
+            started.append(task)
+        return started
+
+    def _execute(self, task: dict) -> None:
+        try:
+            self.runner(self.app, task)
+        except BaseException:
+            # run_task 自行把异常落库为任务失败；这里只兜底保证槽位释放。
+            traceback.print_exc()
+        finally:
+            with self._condition:
+                self._running.pop(task["task_id"], None)
+                self._condition.notify_all()
+
+    def run(self) -> None:
+        while True:
+            self.dispatch()
+            with self._condition:
+                idle = not self._running
+            if idle and not storage.has_queued_tasks(self.app):
+                return
+            with self._condition:
+                # 任务结束时立即唤醒；Web 进程新入队的任务由轮询发现。
+                self._condition.wait(timeout=self.poll_seconds)
@@ -20,7 +20,7 @@ from xml.etree import ElementTree
 
 import fitz
 
-from dashboard.evaluation_workbench import price_sheet, storage
+from dashboard.evaluation_workbench import page_embeddings, page_render, parsed_text, pdf_text, price_sheet, storage
 from dashboard.evaluation_workbench.ai_gateway import (
     InvalidJsonResponse, ModelResponseEnvelopeError, _recover_complete_json_array, build_vision_user_content,
     model_capabilities, request_json,
@@ -28,15 +28,17 @@ from dashboard.evaluation_workbench.ai_gateway import (
 from dashboard.evaluation_workbench.collusion_signals import ANALYSIS_VERSION, build_cross_bid_analysis
 from dashboard.evaluation_workbench.ocr_gateway import OCR_PARSER_VERSION, request_tencent_ocr
 from dashboard.evaluation_workbench.local_ocr_gateway import (
-    LOCAL_OCR_PARSER_VERSION, LOCAL_OCR_SERVICE, local_ocr_max_workers, request_local_ocr,
+    LOCAL_OCR_PARSER_VERSION, LOCAL_OCR_SERVICE, LocalOcrImageBatch, local_ocr_max_workers, request_local_ocr,
 )
 from dashboard.evaluation_workbench.prompt_context import (
-    build_rule_context, select_rule_chunk_evidence_map, select_rule_chunk_map, select_rule_chunks,
-    split_full_text_chunks,
+    build_rule_context, plan_full_text_chunks, select_rule_chunk_evidence_map, select_rule_chunk_map,
+    select_rule_chunks, split_full_text_chunks,
 )
 from dashboard.evaluation_workbench.prompt_templates import EVALUATION_PROMPT_VERSION
+from dashboard.evaluation_workbench.task_scheduler import TaskScheduler
 from dashboard.blueprints.evaluation_workbench import create_worker_app
 from dashboard.utils.comparator import ALGORITHM_VERSION, CollusionDetector, ComparisonLimitError, MAX_PDF_PAGES
+from multi_pattern import contains_any, found_terms
 
 
 # 解析、综合评审与查重共用同一单文件 PDF 页数上限，避免某一环节接受后
@@ -49,6 +51,8 @@ COMPARE_AI_PROMPT_VERSION = "compare-evidence-ai-v6"
 # 单条线索的证据包虽小，但查重往往同时命中多种维度；以较小批次起步，并在
 # 截断时继续局部拆分，避免某一批过长导致整批线索都只能降级为人工核验。
 COMPARE_AI_BATCH_SIZE = 8
+# 模型响应缓存键的格式版本；请求构造或响应解析口径变化时递增，旧条目随之失效。
+MODEL_RESPONSE_CACHE_VERSION = 1
 
 
 class TaskCancellationRequested(BaseException):
@@ -125,6 +129,133 @@ class _EvaluationRequestGate:
             return True
 
 
+# 跨投标人合批（可选）：同一规则组的首轮请求最多合并几家、先到者最多等待同伴多久，
+# 以及合并后的输出预算上限（与 _output_token_budget 的单次上限一致）。
+CROSS_DOCUMENT_BATCH_MAX_DOCUMENTS = 4
+CROSS_DOCUMENT_BATCH_WAIT_SECONDS = 20.0
+CROSS_DOCUMENT_BATCH_OUTPUT_TOKENS = 12_000
+
+
+class _CrossDocumentBatcher:
+    """把不同投标人同一规则组的首轮请求合并为一次模型调用。
+
+    各投标人仍在各自线程内执行。先到达某规则组的线程作为发起方，在限定时间内等待
+    其他“已就绪”投标人带着完全相同的规则载荷到达，然后在锁外发送一次合并请求并把
+    结果按文件分发；没有同伴、超出输入/输出预算或合并请求失败时返回 None，由调用方
+    回到原有单文件请求。就绪投标人指已进入规则组阶段、按整份短文件送审的文件。
+    """
+
+    def __init__(self, *, max_documents: int = CROSS_DOCUMENT_BATCH_MAX_DOCUMENTS,
+                 wait_seconds: float = CROSS_DOCUMENT_BATCH_WAIT_SECONDS,
+                 max_context_chars: int = 64_000, max_output_tokens: int = CROSS_DOCUMENT_BATCH_OUTPUT_TOKENS):
+        self.max_documents = max(2, int(max_documents))
+        self.wait_seconds = max(0.0, float(wait_seconds))
+        self.max_context_chars = int(max_context_chars)
+        self.max_output_tokens = int(max_output_tokens)
+        self.ready: set[str] = set()
+        self.seen: dict[str, set[str]] = {}
+        self.open_batches: dict[str, dict] = {}
+        self.condition = threading.Condition()
+
+    def enter(self, document_id: str) -> None:
+        with self.condition:
+            self.ready.add(document_id)
+            self.condition.notify_all()
+
+    def leave(self, document_id: str) -> None:
+        with self.condition:
+            self.ready.discard(document_id)
+            self.condition.notify_all()
+
+    def pass_key(self, key: str, document_id: str) -> None:
+        """该文件不会为此规则组发起请求（如本地已定位无证据），发起方不必再等它。"""
+        with self.condition:
+            self.seen.setdefault(key, set()).add(document_id)
+            self.condition.notify_all()
+
+    def _fits(self, batch: dict, member: dict) -> bool:
+        return (
+            len(batch["members"]) < self.max_documents
+            and all(item["document_id"] != member["document_id"] for item in batch["members"])
+            and batch["chars"] + member["chars"] <= self.max_context_chars
+            and batch["output_tokens"] + member["output_tokens"] <= self.max_output_tokens
+        )
+
+    def submit(self, key: str, member: dict, send, cancellation_check=None) -> object | None:
+        """返回本文件在合并请求中的解析结果；返回 None 表示应发送单文件请求。
+
+        ``member`` 至少包含 ``document_id``、``chars`` 与 ``output_tokens``；``send`` 接收
+        成员列表并返回 ``{document_id: parsed}``，只由发起方在锁外调用一次。等待期间发起方
+        与同伴都会调用 ``cancellation_check``；发起方因终止退出时，同伴同样抛出终止异常。
+        """
+        document_id = member["document_id"]
+        with self.condition:
+            self.seen.setdefault(key, set()).add(document_id)
+            self.condition.notify_all()
+            if (document_id not in self.ready or member["chars"] * 2 > self.max_context_chars
+                    or member["output_tokens"] * 2 > self.max_output_tokens):
+                return None
+            batch = self.open_batches.get(key)
+            if batch is not None:
+                if not self._fits(batch, member):
+                    return None
+                batch["members"].append(member)
+                batch["chars"] += member["chars"]
+                batch["output_tokens"] += member["output_tokens"]
+                self.condition.notify_all()
+                try:
+                    while "results" not in batch:
+                        if cancellation_check:
+                            cancellation_check()
+                        self.condition.wait(timeout=0.5)
+                except BaseException:
+                    # 发起方尚未取走成员列表时退出本批，不再为已终止的文件占用合并预算。
+                    if self.open_batches.get(key) is batch and any(item is member for item in batch["members"]):
+                        batch["members"] = [item for item in batch["members"] if item is not member]
+                        batch["chars"] -= member["chars"]
+                        batch["output_tokens"] -= member["output_tokens"]
+                        self.condition.notify_all()
+                    raise
+                if batch.get("cancelled"):
+                    # 发起方因任务终止退出；同伴不能把空结果当作“改发单文件请求”。
+                    if cancellation_check:
+                        cancellation_check()
+                    raise TaskCancellationRequested()
+                return batch["results"].get(document_id)
+            batch = {"members": [member], "chars": member["chars"], "output_tokens": member["output_tokens"]}
+            self.open_batches[key] = batch
+        results: dict = {}
+        try:
+            deadline = time.monotonic() + self.wait_seconds
+            with self.condition:
+                while True:
+                    pending = self.ready - self.seen.get(key, set())
+                    remaining = deadline - time.monotonic()
+                    if not pending or len(batch["members"]) >= self.max_documents or remaining <= 0:
+                        break
+                    if cancellation_check:
+                        cancellation_check()
+                    self.condition.wait(timeout=min(0.5, remaining))
+                self.open_batches.pop(key, None)
+                members = list(batch["members"])
+            if len(members) > 1:
+                try:
+                    results = send(members) or {}
+                except Exception:
+                    traceback.print_exc()
+                    results = {}
+        except BaseException:
+            batch["cancelled"] = True
+            raise
+        finally:
+            with self.condition:
+                if self.open_batches.get(key) is batch:
+                    self.open_batches.pop(key, None)
+                batch["results"] = results
+                self.condition.notify_all()
+        return results.get(document_id)
+
+
 def _is_rate_limit_error(error: Exception) -> bool:
     message = str(error).lower()
     return any(term in message for term in (
@@ -200,6 +331,15 @@ def _prompt_char_limit(profile: dict, default: int, ceiling: int) -> int:
     return min(ceiling, max(8_000, int(context_limit * 0.7))) if context_limit else default
 
 
+def _prompt_token_budget(profile: dict) -> int | None:
+    """检索页上下文的 token 预算：模型窗口的一半，其余留给提示模板、规则清单和输出。"""
+    try:
+        context_limit = int(profile.get("context_limit") or 0)
+    except (TypeError, ValueError):
+        context_limit = 0
+    return max(4_000, context_limit // 2) if context_limit else None
+
+
 def _lock_path(app) -> Path:
     return storage.data_dir(app) / "worker.lock"
 
@@ -371,6 +511,68 @@ def _task_request_profile(profile: dict, phase: str, thinking_mode: str | None =
     return effective
 
 
+# 这些任务每次提交都强制生成新结果集（见入队接口），但同一招标模板的规则提取正是
+# 跨项目复用的主要来源，因此不把其恒定的 force_rerun 视为“要求模型重新作答”。
+_ALWAYS_FORCED_TASK_TYPES = {"extract_rules", "extract_price_rules", "calculate_price_scores"}
+
+
+def _model_response_cache_mode(task: dict | None) -> str:
+    """``off``：任务载荷 ``model_response_cache: false``，既不读也不写；
+    ``refresh``：用户明确要求重评，只写入新响应；``on``：读写缓存。"""
+    payload = task.get("payload") if isinstance(task, dict) else None
+    payload = payload if isinstance(payload, dict) else {}
+    if payload.get("model_response_cache") is False:
+        return "off"
+    if payload.get("rerun_selected") or (
+        payload.get("force_rerun") is True and task.get("task_type") not in _ALWAYS_FORCED_TASK_TYPES
+    ):
+        return "refresh"
+    return "on"
+
+
+def _first_model_request_in_task(task: dict, cache_key: str) -> bool:
+    """同一任务内再次发出完全相同的请求，必然是调用方判定上一份响应不合格后的重试；
+    此时必须真实请求模型，并用新响应覆盖缓存条目。"""
+    lock = task.get("_model_response_cache_lock")
+    if not hasattr(lock, "acquire") or not hasattr(lock, "release"):
+        lock = threading.Lock()
+        task["_model_response_cache_lock"] = lock
+    with lock:
+        seen = task.setdefault("_model_response_cache_keys", set())
+        if cache_key in seen:
+            return False
+        seen.add(cache_key)
+        return True
+
+
+def _model_response_cache_key(profile: dict, phase: str, system_prompt: str, user_prompt: object, *,
+                              context_mode: str, max_tokens: int | None) -> str:
+    """模型名称、接口地址、思考模式与完整请求内容的哈希；阶段和上下文标签也参与，
+    使“同提示词严格重试”等调用不会拿到上一轮被判为不合格的响应。"""
+    prompt = user_prompt if isinstance(user_prompt, str) else _stable_prompt_json(user_prompt)
+    parts = (
+        MODEL_RESPONSE_CACHE_VERSION, profile.get("model_name") or "", str(profile.get("base_url") or "").rstrip("/"),
+        profile.get("thinking_mode") or "", bool(profile.get("json_mode")), max_tokens or "",
+        phase, context_mode, system_prompt, prompt,
+    )
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _save_model_response(app, cache_key: str, profile: dict, result: dict) -> None:
+    try:
+        storage.save_model_response_cache(
+            app, cache_key, result, model_name=str(profile.get("model_name") or ""),
+            base_url=str(profile.get("base_url") or "").rstrip("/"), thinking_mode=str(profile.get("thinking_mode") or ""),
+        )
+    except Exception:
+        # 缓存只是省时省量，数据库短暂锁定时放弃写入，不影响本次模型结果。
+        traceback.print_exc()
+
+
 def _raise_if_task_cancelled(app, task: dict) -> None:
     """只对综合评审查询终止标记，其他任务不增加数据库读取。"""
     if task and task.get("task_type") == "evaluate_all" and storage.task_cancellation_requested(app, task["task_id"]):
@@ -395,10 +597,29 @@ def _cancellable_backoff(app, task: dict, seconds: float) -> None:
 
 def _request_task_json(app, task: dict, profile: dict, phase: str, system_prompt: str, user_prompt: object,
                        *, document_id: str | None = None, context_mode: str = "full_prefix",
-                       max_tokens: int | None = None, thinking_mode: str | None = None) -> dict:
-    """调用模型并只记录用量元数据，不记录正文或提示词。"""
+                       max_tokens: int | None = None, thinking_mode: str | None = None,
+                       stream_field: str | None = None, item_callback=None,
+                       expected_items: int | None = None, document_ids: list[str] | None = None) -> dict:
+    """调用模型并只记录用量元数据，不记录正文或提示词。
+
+    ``stream_field``/``item_callback``/``expected_items`` 原样交给网关；仅在开启流式接收时生效。
+    跨投标人合并请求用 ``document_ids`` 记录全部成员文件。
+    """
     gate = task.get("_evaluation_request_gate")
     effective_profile = _task_request_profile(profile, phase, thinking_mode)
+    cache_key = ""
+    cache_mode = _model_response_cache_mode(task)
+    if cache_mode != "off":
+        # 同一招标模板被多个标段复用、项目复制后重跑时，完全相同的请求直接复用
+        # 已解析的响应：不占并发位、不消耗 token，也不写用量行。
+        cache_key = _model_response_cache_key(
+            effective_profile, phase, system_prompt, user_prompt, context_mode=context_mode, max_tokens=max_tokens,
+        )
+        if cache_mode == "on" and _first_model_request_in_task(task, cache_key):
+            cached = storage.get_model_response_cache(app, cache_key)
+            if cached is not None:
+                _record_task_timing(task, "model_response_cache_hit", count=1)
+                return cached
     for attempt in range(len(_REQUEST_RETRY_BACKOFF_SECONDS) + 1):
         _raise_if_task_cancelled(app, task)
         # 每一次真实请求单独落一行用量。此前重试会覆盖上一轮 usage，导致 token
@@ -422,6 +643,7 @@ def _request_task_json(app, task: dict, profile: dict, phase: str, system_prompt
                     result = request_json(
                         effective_profile, system_prompt, user_prompt, usage_callback=record_usage,
                         response_metadata_callback=record_response_metadata, max_tokens=max_tokens,
+                        stream_field=stream_field, item_callback=item_callback, expected_items=expected_items,
                     )
                 finally:
                     _record_task_timing(
@@ -429,6 +651,8 @@ def _request_task_json(app, task: dict, profile: dict, phase: str, system_prompt
                     )
                 if gate:
                     gate.record_success()
+                if cache_key and isinstance(result, dict):
+                    _save_model_response(app, cache_key, effective_profile, result)
                 _raise_if_task_cancelled(app, task)
                 return result
             except ValueError as exc:
@@ -457,7 +681,8 @@ def _request_task_json(app, task: dict, profile: dict, phase: str, system_prompt
                 # 部分兼容接口不返回 usage；仍保留发送字符数与截断元数据以便统计和优化。
                 storage.record_model_call(
                     app, task["task_id"], task["project_id"], phase, profile.get("profile_id"),
-                    document_id=document_id, input_chars=len(system_prompt) + _prompt_input_chars(user_prompt),
+                    document_id=document_id, document_ids=document_ids,
+                    input_chars=len(system_prompt) + _prompt_input_chars(user_prompt),
                     context_mode=context_mode, usage=usage, response_metadata=response_metadata,
                 )
         finally:
@@ -524,6 +749,83 @@ def _extract_docx_text(path: Path) -> str:
     return result
 
 
+def _mark_document_parsed(app, document: dict, parsed_path: Path, page_count: int | None, text_length: int) -> None:
+    with storage.connection(app) as conn:
+        conn.execute(
+            "UPDATE ew_documents SET page_count=?, text_length=?, parse_status='success', parse_error=NULL, parsed_path=?, updated_at=? WHERE document_id=?",
+            (page_count, text_length, str(parsed_path), storage.now_iso(), document["document_id"]),
+        )
+
+
+def _mark_document_parse_error(app, document: dict, error: object) -> None:
+    with storage.connection(app) as conn:
+        conn.execute(
+            "UPDATE ew_documents SET parse_status='error', parse_error=?, updated_at=? WHERE document_id=?",
+            (str(error), storage.now_iso(), document["document_id"]),
+        )
+
+
+def _parse_pdf_documents(jobs: list[dict], progress) -> None:
+    """按页段并行提取多份 PDF，并按页序增量写入解析文件。
+
+    所有文件的页段按顺序进入一个有界窗口，由进程池并行提取；主进程按提交顺序取回，
+    因此每份文件都能边提取边追加写入 ``.partial`` 文件，成功后原子改名。窗口同时限制了
+    主进程中驻留的已提取未写入文本量。单个文件的页数或字符超限、提取异常只让该文件失败。
+    """
+    units = [
+        (job, start, end)
+        for job in jobs if not job.get("error")
+        for start, end in pdf_text.page_ranges(job["page_count"])
+    ]
+    workers = pdf_text.parse_worker_count()
+    executor = pdf_text.create_parse_pool(workers) if workers > 1 and len(units) > 1 else None
+    window: list = []
+    next_unit = 0
+
+    def refill() -> None:
+        nonlocal next_unit
+        while executor and next_unit < len(units) and len(window) < workers * 2:
+            job, start, end = units[next_unit]
+            window.append(executor.submit(pdf_text.extract_page_range, job["source"], start, end))
+            next_unit += 1
+
+    try:
+        refill()
+        for job, start, end in units:
+            future = window.pop(0) if executor else None
+            refill()
+            if job.get("error"):
+                if future:
+                    future.cancel()
+                continue
+            try:
+                page_texts = future.result() if future else pdf_text.extract_page_range(job["source"], start, end)
+                if job.get("writer") is None:
+                    job["writer"] = parsed_text.PageIndexWriter(job["partial_path"])
+                for offset, page_text in enumerate(page_texts):
+                    page = start + offset + 1
+                    job["text_length"] += len(parsed_text.page_header(page)) + len(page_text)
+                    if job["text_length"] > MAX_PARSED_CHARS:
+                        raise ValueError("文件可提取文本过长，超过低资源解析限制")
+                    job["writer"].write_page(page, page_text)
+            except Exception as exc:
+                job["error"] = exc
+                continue
+            job["pages_done"] = end
+            if end == job["page_count"]:
+                writer = job.pop("writer")
+                writer.close()
+                job["page_index"], job["written_length"] = writer.pages, writer.text_length
+            progress(job, end == job["page_count"])
+    finally:
+        for job in jobs:
+            writer = job.pop("writer", None)
+            if writer:
+                writer.close()
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
 def _parse_document(app, task: dict) -> dict:
     documents = storage.list_documents(app, task["project_id"])
     pending_documents = [
@@ -538,45 +840,84 @@ def _parse_document(app, task: dict) -> dict:
         storage.update_task(app, task["task_id"], progress=40, message="解析缓存已存在，正在核对文件报价缓存…")
     else:
         total = len(pending_documents)
+        parsed_dir = storage.project_dir(app, task["project_id"]) / "parsed"
+        jobs = []
         for document in pending_documents:
-            source = storage.document_path(app, document)
-            storage.update_task(app, task["task_id"], progress=int(parsed * 100 / total), message=f"正在解析：{document['original_name']}")
+            parsed_path = parsed_dir / f"{document['document_id']}.txt"
+            job = {
+                "document": document, "source": str(storage.document_path(app, document)),
+                "parsed_path": parsed_path, "partial_path": parsed_path.with_name(parsed_path.name + ".partial"),
+                "page_count": 0, "pages_done": 0, "text_length": 0, "error": None,
+            }
+            jobs.append(job)
+            if document["extension"] != ".pdf":
+                continue
+            try:
+                with fitz.open(job["source"]) as pdf:
+                    job["page_count"] = pdf.page_count
+                if job["page_count"] > MAX_PARSE_PAGES:
+                    raise ValueError(f"PDF 页数超过 {MAX_PARSE_PAGES} 页限制")
+            except Exception as exc:
+                job["error"] = exc
+        # 进度按页计：DOCX 视为 1 页，避免 12 份 800 页文件时进度长期停在同一个百分比。
+        total_units = sum(max(1, job["page_count"]) for job in jobs) or 1
+        done_units = 0
+
+        def finish(job: dict, text_length: int | None = None) -> None:
+            nonlocal parsed
+            document = job["document"]
             try:
-                if document["extension"] == ".pdf":
-                    with fitz.open(source) as pdf:
-                        if pdf.page_count > MAX_PARSE_PAGES:
-                            raise ValueError(f"PDF 页数超过 {MAX_PARSE_PAGES} 页限制")
-                        pages = []
-                        text_length = 0
-                        for page_number, page in enumerate(pdf, start=1):
-                            page_text = page.get_text("text", sort=True)
-                            page_text = f"[第{page_number}页]\n{page_text}"
-                            text_length += len(page_text)
-                            if text_length > MAX_PARSED_CHARS:
-                                raise ValueError("文件可提取文本过长，超过低资源解析限制")
-                            pages.append(page_text)
-                        page_count = pdf.page_count
-                    text = "\n\n".join(pages)
+                if job["error"]:
+                    raise job["error"]
+                if text_length is None:
+                    if not job["page_count"]:
+                        raise ValueError("未提取到可检索文本；扫描件暂不支持 OCR")
+                    job["partial_path"].replace(job["parsed_path"])
+                    parsed_text.write_page_index(job["parsed_path"], job["page_index"])
+                    if page_embeddings.semantic_pages_enabled():
+                        # 语义选页开启时在解析阶段一次建好页向量，评审线程只读取旁路文件。
+                        storage.update_task(app, task["task_id"],
+                                            message=f"正在建立语义页索引：{document['original_name']}")
+                        page_embeddings.build_page_embeddings(job["parsed_path"])
+                    # 字符上限只按页文本累计（与串行解析一致）；落库长度另计页间分隔符。
+                    _mark_document_parsed(app, document, job["parsed_path"], job["page_count"], job["written_length"])
                 else:
-                    text = _extract_docx_text(source)
-                    page_count = None
-                if not text.strip():
-                    raise ValueError("未提取到可检索文本；扫描件暂不支持 OCR")
-                parsed_path = storage.project_dir(app, task["project_id"]) / "parsed" / f"{document['document_id']}.txt"
-                parsed_path.write_text(text, encoding="utf-8")
-                with storage.connection(app) as conn:
-                    conn.execute(
-                        "UPDATE ew_documents SET page_count=?, text_length=?, parse_status='success', parse_error=NULL, parsed_path=?, updated_at=? WHERE document_id=?",
-                        (page_count, len(text), str(parsed_path), storage.now_iso(), document["document_id"]),
-                    )
+                    _mark_document_parsed(app, document, job["parsed_path"], None, text_length)
             except Exception as exc:
+                job["partial_path"].unlink(missing_ok=True)
                 errors.append(f"{document['original_name']}：{exc}")
-                with storage.connection(app) as conn:
-                    conn.execute(
-                        "UPDATE ew_documents SET parse_status='error', parse_error=?, updated_at=? WHERE document_id=?",
-                        (str(exc), storage.now_iso(), document["document_id"]),
-                    )
+                _mark_document_parse_error(app, document, exc)
             parsed += 1
+
+        def report(job: dict, complete: bool) -> None:
+            pages_done = done_units + sum(item["pages_done"] for item in jobs)
+            storage.update_task(
+                app, task["task_id"], progress=min(99, int(pages_done * 100 / total_units)),
+                message=(f"正在解析 {parsed + 1}/{total}：{job['document']['original_name']}"
+                         f"（第 {job['pages_done']}/{job['page_count']} 页）"),
+            )
+            if complete:
+                finish(job)
+
+        for job in jobs:
+            if job["document"]["extension"] == ".pdf":
+                continue
+            storage.update_task(app, task["task_id"], progress=int(done_units * 100 / total_units),
+                                message=f"正在解析 {parsed + 1}/{total}：{job['document']['original_name']}")
+            try:
+                text = _extract_docx_text(Path(job["source"]))
+                if not text.strip():
+                    raise ValueError("未提取到可检索文本；扫描件暂不支持 OCR")
+                job["parsed_path"].write_text(text, encoding="utf-8")
+            except Exception as exc:
+                job["error"] = exc
+            done_units += 1
+            finish(job, None if job["error"] else len(text))
+        pdf_jobs = [job for job in jobs if job["document"]["extension"] == ".pdf"]
+        _parse_pdf_documents(pdf_jobs, report)
+        for job in pdf_jobs:
+            if job["error"] or not job["page_count"]:
+                finish(job)
         if errors:
             raise ValueError("；".join(errors[:5]))
     # 报价缓存补全：对全部已解析的投标文件统一提取（缺失或过期的才重扫），
@@ -617,19 +958,31 @@ def _compare_documents(app, task: dict) -> dict:
         raise ValueError("当前多文件查重仅支持 PDF；DOCX 已可解析和管理，通用文本查重将在后续阶段接入")
 
     tender_path = str(storage.document_path(app, tender)) if tender else None
-    detector = CollusionDetector(tender_path, build_text_index=True)
+    tender_sha256 = str((tender or {}).get("sha256") or "")
+    # 比对结果只取决于两份投标文件、招标文件的内容和算法版本；项目增删投标文件后，
+    # 未变化的文件对直接复用缓存，招标文本索引也只在确有文件对需要计算时才建立。
+    detector = None
     pairs = list(itertools.combinations(bids, 2))
     summaries = []
     analyzed_pairs = []
+    reused = 0
     for index, (left, right) in enumerate(pairs, start=1):
-        storage.update_task(app, task["task_id"], progress=int((index - 1) * 100 / len(pairs)), message=f"正在比较 {index}/{len(pairs)}：{left['original_name']} 与 {right['original_name']}")
-        result = detector.find_collisions(
-            str(storage.document_path(app, left)),
-            str(storage.document_path(app, right)),
-            check_entity=True,
-            check_text=True,
-            check_spelling=True,
-        )
+        cache_key = (str(left.get("sha256") or ""), str(right.get("sha256") or ""), tender_sha256, ALGORITHM_VERSION)
+        result = storage.get_compare_pair_cache(app, *cache_key)
+        if result is not None:
+            reused += 1
+        else:
+            storage.update_task(app, task["task_id"], progress=int((index - 1) * 100 / len(pairs)), message=f"正在比较 {index}/{len(pairs)}：{left['original_name']} 与 {right['original_name']}")
+            if detector is None:
+                detector = CollusionDetector(tender_path, build_text_index=True)
+            result = detector.find_collisions(
+                str(storage.document_path(app, left)),
+                str(storage.document_path(app, right)),
+                check_entity=True,
+                check_text=True,
+                check_spelling=True,
+            )
+            storage.save_compare_pair_cache(app, *cache_key, result)
         storage.save_compare_pair(app, task["task_id"], left["document_id"], right["document_id"], result)
         analyzed_pairs.append((left, right, result))
         summaries.append({
@@ -648,7 +1001,7 @@ def _compare_documents(app, task: dict) -> dict:
     analysis["pipeline"]["analysis_version"] = ANALYSIS_VERSION
     analysis["pipeline"]["comparator_version"] = ALGORITHM_VERSION
     _assess_compare_signals_with_ai(app, task, analysis)
-    return {"pair_count": len(pairs), "pairs": summaries, "cross_bid_analysis": analysis}
+    return {"pair_count": len(pairs), "reused_pair_count": reused, "pairs": summaries, "cross_bid_analysis": analysis}
 
 
 def _compare_evidence_packet(signal: dict) -> dict:
@@ -6453,16 +6806,20 @@ _MATERIAL_ROLE_TERMS = {
     "personnel": ("人员简历", "人员证件", "执业证", "资格证", "社保证明"),
     "requirement": ("采购需求", "招标要求", "技术要求", "评分标准"),
 }
+_MATERIAL_ROLE_MATCH_TERMS = tuple(dict.fromkeys(
+    term.lower() for terms in _MATERIAL_ROLE_TERMS.values() for term in terms
+))
 
 
 def _rule_material_roles(rule: dict) -> set[str]:
     """从规则自身文本归纳所需材料角色，不依赖任何项目或行业关键词。"""
     text = "\n".join(str(rule.get(key) or "") for key in ("title", "check_rule", "source_text"))
+    hits = found_terms(text.lower(), _MATERIAL_ROLE_MATCH_TERMS)
     roles: set[str] = set()
     for role, terms in _MATERIAL_ROLE_TERMS.items():
         if role == "directory":
             continue
-        if any(term.lower() in text.lower() for term in terms):
+        if any(term.lower() in hits for term in terms):
             roles.add(role)
     # 签字、盖章是表单/授权材料的视觉事实，不能让合同或普通承诺页替代。
     if any(term in text for term in ("签字", "签章", "盖章", "电子签章")):
@@ -6512,8 +6869,9 @@ def _page_material_role(text: object) -> str:
         "business_license", "response_form", "authorization", "platform_screenshot", "acceptance",
         "contract", "identity", "personnel", "certificate", "directory", "requirement",
     )
+    hits = found_terms(lowered, _MATERIAL_ROLE_MATCH_TERMS)
     for role in ordered_roles:
-        if any(term.lower() in lowered for term in _MATERIAL_ROLE_TERMS[role]):
+        if any(term.lower() in hits for term in _MATERIAL_ROLE_TERMS[role]):
             return role
     return "other"
 
@@ -6590,7 +6948,7 @@ def _directory_material_candidates(page_texts: dict[int, str], rule: dict, page_
             if not refs:
                 continue
             material_text = re.sub(r"[\s\W_]+", "", _DIRECTORY_TRAILING_PAGE_PATTERN.sub("", entry))
-            matches = [term for term in terms if term in material_text]
+            matches = found_terms(material_text, terms)
             # 一个较长的共同材料名，或两个独立的四字片段，才将目录页码提升为首选。
             if not matches or (max(map(len, matches)) < 5 and len([term for term in matches if len(term) >= 4]) < 2):
                 continue
@@ -7166,7 +7524,9 @@ def _evaluation_output_budget(profile: dict, component: str, rules: list[dict],
     return _output_token_budget(profile, target)
 
 
-def _combined_batch_prompt(app, component: str, document: dict, payload: list[dict], text: str, *, compact: bool) -> str:
+def _combined_batch_task_prompt(app, component: str, payload: list[dict], *, document_name: str, bidder_name: str,
+                                text: str, compact: bool) -> str:
+    """规则组任务提示词中与具体文件附注无关的部分；跨投标人合批复用同一份任务要求。"""
     template_id = f"evaluate_all_{component}_user"
     retry_note = (
         "这是格式异常后的严格 JSON 重试：必须只输出一个 JSON 对象；不得使用 Markdown、注释或前后说明；"
@@ -7175,16 +7535,9 @@ def _combined_batch_prompt(app, component: str, document: dict, payload: list[di
     )
     prompt = storage.render_prompt_template(
         app, template_id, rules=_stable_prompt_json(payload),
-        document_name=document["original_name"], bidder_name=document["bidder_name"] or "未填写", text=text,
+        document_name=document_name, bidder_name=bidder_name, text=text,
         retry_note=retry_note,
     )
-    if _document_text_coverage_status(document) == "uncovered":
-        # 将扫描件边界直接告诉模型；后端仍有独立守卫，二者互为校验，避免模型把
-        # “全文未命中”误写成“未提供”或“满足”。
-        prompt += (
-            "\n\n【机器可读文本覆盖不足】本文件大部分页面可能为扫描件，当前文本包未覆盖整份材料。"
-            "文本未命中不等于材料缺失，也不等于规则满足；未含实际 OCR/图片证据时须按提示词返回待 OCR 结论。"
-        )
     # 范围一致性规则需要同时呈现不同类型的偏离对象；不把该额外约束发送给其他
     # 规则组，避免无关上下文和输出长度占用。模板本身可在提示词配置中维护。
     if component == "review" and any(_is_scope_consistency_rule(item) for item in payload):
@@ -7196,13 +7549,34 @@ def _combined_batch_prompt(app, component: str, document: dict, payload: list[di
             "其他规则仍遵守原有证据长度限制。\n\n"
             + prompt
         )
+    return prompt
+
+
+def _document_prompt_notes(document: dict, payload: list[dict]) -> str:
+    """单份文件的文本覆盖提示与已核验价格事实，附在该文件正文之后。"""
+    notes = ""
+    if _document_text_coverage_status(document) == "uncovered":
+        # 将扫描件边界直接告诉模型；后端仍有独立守卫，二者互为校验，避免模型把
+        # “全文未命中”误写成“未提供”或“满足”。
+        notes += (
+            "\n\n【机器可读文本覆盖不足】本文件大部分页面可能为扫描件，当前文本包未覆盖整份材料。"
+            "文本未命中不等于材料缺失，也不等于规则满足；未含实际 OCR/图片证据时须按提示词返回待 OCR 结论。"
+        )
     # 价格事实由同一任务内的本地保守解析统一提供给符合性审查和客观评分；它位于
     # 可变尾部，不影响前面规则组与正文的既有提示词协议。
     if document.get("_shared_price_facts") and any(storage.is_price_rule(
         f"{item.get('title', '')} {item.get('check_rule', '')} {item.get('source_text', '')}"
     ) for item in payload):
-        prompt += f"\n\n【已核验价格事实】\n{document['_shared_price_facts']}"
-    return prompt
+        notes += f"\n\n【已核验价格事实】\n{document['_shared_price_facts']}"
+    return notes
+
+
+def _combined_batch_prompt(app, component: str, document: dict, payload: list[dict], text: str, *, compact: bool) -> str:
+    prompt = _combined_batch_task_prompt(
+        app, component, payload, document_name=document["original_name"],
+        bidder_name=document["bidder_name"] or "未填写", text=text, compact=compact,
+    )
+    return prompt + _document_prompt_notes(document, payload)
 
 
 def _combined_batch_payload(component: str, rules: list[dict]) -> list[dict]:
@@ -8047,13 +8421,16 @@ def _scan_document_fulltext(app, task: dict, profile: dict, document: dict, rule
 
 
 def _full_scan_chunk_count(document: dict) -> int:
-    """返回需要 AI 全文证据扫描的页块数；只在任务启动时短暂读取解析文本。"""
+    """返回需要 AI 全文证据扫描的页块数；有页偏移索引时只按各页字符数规划，不读取正文。"""
     try:
         text_length = int(document.get("text_length") or 0)
     except (TypeError, ValueError):
         text_length = 0
     if text_length <= FULL_SCAN_THRESHOLD_CHARS or not document.get("parsed_path"):
         return 0
+    ranges = plan_full_text_chunks(document["parsed_path"], FULL_SCAN_CHUNK_CHARS, overlap_pages=1)
+    if ranges:
+        return len(ranges)
     return len(split_full_text_chunks(document["parsed_path"], FULL_SCAN_CHUNK_CHARS, overlap_pages=1))
 
 
@@ -9446,6 +9823,12 @@ _VISION_MAX_PIXELS_PER_PAGE = 10_000_000
 # 对超大图纸而言，优先返回较小但可用的图，而不是因最小比例导致瞬时内存峰值。
 _VISION_MIN_RENDER_SCALE = 0.05
 _VISION_TASK_RENDER_CACHE_BYTES = 24 * 1024 * 1024
+# 落盘渲染缓存的渲染器口径：fitz 版本或像素上限变化时，旧页图不再命中。
+_PAGE_RENDER_CACHE_RENDERER = f"fitz{fitz.VersionBind}:px{_VISION_MAX_PIXELS_PER_PAGE}"
+# 预测比例后仍超出体积上限时的逐级降采样：(比例系数, 最小比例, 质量步长, 最低质量)。
+_VISION_RENDER_FALLBACK = (0.75, _VISION_MIN_RENDER_SCALE, 8, 60)
+_OCR_RENDER_FALLBACK = (0.8, 1.0, 6, 68)
+_VISION_IMAGE_MAX_BYTES = 4 * 1024 * 1024
 
 _OCR_PAGE_LIMITS = {"low": 2, "standard": 6, "high": 10}
 _OCR_ROUTE_TABLE_TERMS = ("评分表", "业绩表", "参数表", "清单", "报价表", "人员表", "明细表", "统计表")
@@ -9636,8 +10019,49 @@ def _ocr_service_candidates_for_page(rule: dict, level: str, page_text: object)
     return base
 
 
+# 渲染参数（缩放、JPEG 质量、降采样上限）调整时递增，使“文件+页码+档位→图片哈希”
+# 的旧映射全部失效，回到先渲染、再按图片哈希核对 OCR 缓存。
+OCR_RENDER_PROFILE_VERSION = 1
+
+
+def _ocr_render_settings(service: str) -> tuple[float, int]:
+    scale = 2.0 if service in {"accurate", "table", "biz_license"} else 1.5
+    return scale, 88 if scale >= 2 else 80
+
+
+def _ocr_render_profile(service: str, *, pixels: bool = False) -> str:
+    scale, quality = _ocr_render_settings(service)
+    if pixels:
+        # 本地 OCR 直接使用 RGB 像素，不经过 JPEG 编码和降采样。
+        return f"v{OCR_RENDER_PROFILE_VERSION}:rgb:{scale:g}x:{_VISION_MAX_PIXELS_PER_PAGE}:fitz{fitz.VersionBind}"
+    raw_limit = "5m" if service == "biz_license" else "7m"
+    return (f"v{OCR_RENDER_PROFILE_VERSION}:{scale:g}x:q{quality}:{raw_limit}:"
+            f"{_VISION_MAX_PIXELS_PER_PAGE}:fitz{fitz.VersionBind}")
+
+
+def _ocr_page_cache_before_render(app, document: dict, page_number: int, render_service: str,
+                                  cache_service: str, task: dict | None = None, *, pixels: bool = False) -> dict | None:
+    """按文件 sha256、页码和渲染档位找到上次的图片哈希；OCR 缓存命中时完全跳过渲染。
+
+    只返回当前解析版本、且有文字或已确认空白的缓存；其余情况由调用方照常渲染，
+    再按图片哈希核对缓存，保证需要重新识别时手里一定有图片。
+    """
+    image_hash = storage.get_ocr_render_hash(
+        app, str(document.get("sha256") or ""), page_number, _ocr_render_profile(render_service, pixels=pixels),
+    )
+    if not image_hash:
+        return None
+    cached = storage.get_ocr_page_cache(app, document["document_id"], page_number, image_hash, cache_service)
+    if not cached or cached.get("parser_version") != _ocr_parser_version_for_service(cache_service):
+        return None
+    if not str(cached.get("text") or "").strip() and not cached.get("empty"):
+        return None
+    _record_task_timing(task, "ocr_render_skipped", count=1)
+    return cached
+
+
 def _render_ocr_page(app, document: dict, page_number: int, service: str, task: dict | None = None) -> tuple[bytes, str] | None:
-    """仅在内存中渲染候选页，并在 Pixmap 前限制超大页面内存。"""
+    """渲染候选页，并在 Pixmap 前限制超大页面内存；先查任务内存缓存，再查落盘渲染缓存。"""
     if document.get("extension") != ".pdf":
         return None
     # 同一页同一档位在同一任务内可能被多条规则重复选中；任务级缓存避免重复 fitz
@@ -9651,45 +10075,110 @@ def _render_ocr_page(app, document: dict, page_number: int, service: str, task:
         if cached_content is not None:
             _record_task_timing(task, "ocr_render_cache_hit", count=1)
             return cached_content, hashlib.sha256(cached_content).hexdigest()
+    scale, quality = _ocr_render_settings(service)
+    # 腾讯接口限制的是 Base64 后大小：营业执照 7M、通用/表格通常 10M。
+    # 留出编码和协议余量，仅在超限时逐级降采样，避免白白消耗一次额度。
+    raw_limit = 5 * 1024 * 1024 if service == "biz_license" else 7 * 1024 * 1024
+    content = _cached_page_render(app, document, page_number, scale, quality, raw_limit, task)
+    if content is None:
+        content = _render_ocr_jpeg(app, document, page_number, scale, quality, raw_limit, task)
+    if content is None:
+        return None
+    if task_cache and len(content) <= 4 * 1024 * 1024:
+        cache, lock = task_cache
+        with lock:
+            # FIFO 淘汰，与图片模型渲染缓存共用容量上限。
+            while cache["items"] and cache["bytes"] + len(content) > _VISION_TASK_RENDER_CACHE_BYTES:
+                oldest_key = next(iter(cache["items"]))
+                removed = cache["items"].pop(oldest_key)
+                cache["bytes"] -= len(removed)
+            cache["items"][cache_key] = content
+            cache["bytes"] += len(content)
+    image_hash = hashlib.sha256(content).hexdigest()
+    storage.save_ocr_render_hash(
+        app, str(document.get("sha256") or ""), int(page_number), _ocr_render_profile(service), image_hash,
+    )
+    return content, image_hash
+
+
+def _render_ocr_jpeg(app, document: dict, page_number: int, scale: float, quality: int, raw_limit: int,
+                     task: dict | None) -> bytes | None:
+    # 不要等 JPEG 压缩后才限尺寸：超大图纸在 get_pixmap 时就可能耗尽 2 GB
+    # 容器内存。与图片模型链路共用相同的像素上限和比例预测，保持 OCR/视觉行为一致。
+    if page_number < 1:
+        return None
     source = storage.document_path(app, document)
-    scale = 2.0 if service in {"accurate", "table", "biz_license"} else 1.5
-    quality = 88 if scale >= 2 else 80
+    render_started_at = time.monotonic()
+    try:
+        rendered = page_render.render_batch(
+            str(source), [(int(page_number), scale, quality)], byte_limit=raw_limit,
+            max_pixels=_VISION_MAX_PIXELS_PER_PAGE, fallback=_OCR_RENDER_FALLBACK,
+        )
+    except (OSError, RuntimeError, ValueError, IndexError):
+        return None
+    finally:
+        _record_task_timing(task, "ocr_render_seconds", time.monotonic() - render_started_at, count=1)
+    content, reduced = rendered[int(page_number)]
+    if not reduced:
+        _store_page_render(app, document, page_number, scale, quality, content)
+    return content
+
+
+def _render_ocr_pixels(app, document: dict, page_number: int, service: str, task: dict | None = None) -> dict | None:
+    """渲染本地 OCR 用的 RGB 像素，不做 JPEG 编码；缓存键为像素哈希。"""
+    if document.get("extension") != ".pdf":
+        return None
+    source = storage.document_path(app, document)
+    scale, quality = _ocr_render_settings(service)
     render_started_at = time.monotonic()
     try:
         with fitz.open(source) as pdf:
             if not 1 <= page_number <= pdf.page_count:
                 return None
             page = pdf[page_number - 1]
-            # 不要等 JPEG 压缩后才限尺寸：超大图纸在 get_pixmap 时就可能耗尽 2 GB
-            # 容器内存。与图片模型链路共用相同的像素上限，保持 OCR/视觉行为一致。
             scale = _safe_vision_render_scale(page, scale)
-            content = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False).tobytes(
-                "jpeg", jpg_quality=quality,
-            )
-            # 腾讯接口限制的是 Base64 后大小：营业执照 7M、通用/表格通常 10M。
-            # 留出编码和协议余量，仅在超限时逐级降采样，避免白白消耗一次额度。
-            raw_limit = 5 * 1024 * 1024 if service == "biz_license" else 7 * 1024 * 1024
-            while len(content) > raw_limit and scale > 1.0:
-                scale = max(1.0, scale * 0.8)
-                quality = max(68, quality - 6)
-                content = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False).tobytes(
-                    "jpeg", jpg_quality=quality,
-                )
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+            rendered = {
+                "samples": pixmap.samples, "width": pixmap.width, "height": pixmap.height,
+                "dpi": (pixmap.xres, pixmap.yres), "quality": quality,
+            }
+            del pixmap
     except (OSError, RuntimeError, ValueError):
         return None
     finally:
         _record_task_timing(task, "ocr_render_seconds", time.monotonic() - render_started_at, count=1)
-    if task_cache and len(content) <= 4 * 1024 * 1024:
-        cache, lock = task_cache
-        with lock:
-            # FIFO 淘汰，与图片模型渲染缓存共用容量上限。
-            while cache["items"] and cache["bytes"] + len(content) > _VISION_TASK_RENDER_CACHE_BYTES:
-                oldest_key = next(iter(cache["items"]))
-                removed = cache["items"].pop(oldest_key)
-                cache["bytes"] -= len(removed)
-            cache["items"][cache_key] = content
-            cache["bytes"] += len(content)
-    return content, hashlib.sha256(content).hexdigest()
+    header = f"rgb:{rendered['width']}x{rendered['height']}:".encode("ascii")
+    rendered["image_hash"] = hashlib.sha256(header + rendered["samples"]).hexdigest()
+    storage.save_ocr_render_hash(
+        app, str(document.get("sha256") or ""), int(page_number), _ocr_render_profile(service, pixels=True),
+        rendered["image_hash"],
+    )
+    return rendered
+
+
+def _ocr_pixels_jpeg(rendered: dict) -> bytes:
+    """把已渲染像素编码成与 ``_render_ocr_page`` 首档完全相同的 JPEG（临时文件回退与旧缓存核对用）。"""
+    if "jpeg" not in rendered:
+        pixmap = fitz.Pixmap(fitz.csRGB, rendered["width"], rendered["height"], rendered["samples"], 0)
+        pixmap.set_dpi(*rendered["dpi"])
+        rendered["jpeg"] = pixmap.tobytes("jpeg", jpg_quality=rendered["quality"])
+    return rendered["jpeg"]
+
+
+def _legacy_local_ocr_cache(app, document: dict, page_number: int, rendered: dict) -> dict | None:
+    """像素哈希未命中时，按升级前的 JPEG 哈希找回本地 OCR 缓存，并迁移到像素哈希下。
+
+    只有该页已有本地 OCR 缓存行（可能是升级前按 JPEG 哈希保存的）时才编码一次 JPEG
+    核对；从未识别过的页面只多一次索引查询，不在热路径上重新引入编码。
+    """
+    if not storage.has_ocr_page_cache(app, document["document_id"], page_number, LOCAL_OCR_SERVICE):
+        return None
+    legacy_hash = hashlib.sha256(_ocr_pixels_jpeg(rendered)).hexdigest()
+    cached = storage.get_ocr_page_cache(app, document["document_id"], page_number, legacy_hash, LOCAL_OCR_SERVICE)
+    if not cached or cached.get("parser_version") != LOCAL_OCR_PARSER_VERSION:
+        return None
+    storage.save_ocr_page_cache(app, document["document_id"], page_number, rendered["image_hash"], LOCAL_OCR_SERVICE, cached)
+    return cached
 
 
 def _ocr_response_coverage(value: dict) -> str:
@@ -9925,7 +10414,7 @@ def _ocr_discovery_is_sufficient(rule: dict, values: list[dict]) -> bool:
     terms = [term for term in _rule_material_terms(rule) if len(term) >= 4][:48]
     for role in _rule_material_roles(rule):
         terms.extend(term for term in _MATERIAL_ROLE_TERMS.get(role, ()) if len(term) >= 2)
-    material_hit = any(re.sub(r"[\s\W_]+", "", term) in compact for term in dict.fromkeys(terms))
+    material_hit = contains_any(compact, [re.sub(r"[\s\W_]+", "", term) for term in dict.fromkeys(terms)])
     if not material_hit:
         return False
     if not _uses_explicit_field_acquisition_plan(rule):
@@ -9975,6 +10464,9 @@ def _record_task_local_ocr_metrics(task: dict | None, runtime_metrics: dict) ->
             0, int(runtime_metrics.get("elapsed_ms") or 0),
         )
         task["_local_ocr_engine_run_count"] = int(task.get("_local_ocr_engine_run_count") or 0) + 1
+    # 检测、识别等阶段耗时并入任务性能指标（local_ocr_det / local_ocr_rec …），便于判断合批是否划算。
+    for stage, milliseconds in (runtime_metrics.get("stage_ms") or {}).items():
+        _record_task_timing(task, f"local_ocr_{stage}", seconds=float(milliseconds or 0) / 1_000)
 
 
 def _ocr_parser_version_for_service(service: str) -> int:
@@ -9992,7 +10484,7 @@ def _local_ocr_page_texts(app, document: dict, pages: list[int], *, rule: dict |
     empty_pages: list[int] = []
     failed_pages: list[int] = []
     page_texts = _document_page_texts(document) if rule else {}
-    with tempfile.TemporaryDirectory(prefix="rapidocr-") as temp_dir:
+    with tempfile.TemporaryDirectory(prefix="rapidocr-") as temp_dir, LocalOcrImageBatch() as image_batch:
         pending: list[dict] = []
         hashes: dict[int, str] = {}
         for index, page in enumerate(_normalise_result_pages(pages), start=1):
@@ -10000,12 +10492,18 @@ def _local_ocr_page_texts(app, document: dict, pages: list[int], *, rule: dict |
             # 本地没有腾讯的专项接口，但仍按规则强度与页面角色选择渲染质量：
             # 普通正文保持快速档，证照/表格/精细核验才使用高精度渲染。
             render_service = _ocr_service_candidates_for_page(rule or {}, level, page_texts.get(page, ""))[0]
-            rendered = _render_ocr_page(app, document, page, render_service, task=task)
-            if not rendered:
-                failed_pages.append(page)
-                continue
-            image, image_hash = rendered
-            cached = storage.get_ocr_page_cache(app, document["document_id"], page, image_hash, LOCAL_OCR_SERVICE)
+            cached = _ocr_page_cache_before_render(
+                app, document, page, render_service, LOCAL_OCR_SERVICE, task, pixels=True,
+            )
+            if cached is None:
+                rendered = _render_ocr_pixels(app, document, page, render_service, task=task)
+                if not rendered:
+                    failed_pages.append(page)
+                    continue
+                image_hash = rendered["image_hash"]
+                cached = storage.get_ocr_page_cache(app, document["document_id"], page, image_hash, LOCAL_OCR_SERVICE)
+                if not cached or cached.get("parser_version") != LOCAL_OCR_PARSER_VERSION:
+                    cached = _legacy_local_ocr_cache(app, document, page, rendered)
             if cached and cached.get("parser_version") == LOCAL_OCR_PARSER_VERSION:
                 _record_task_timing(task, "local_ocr_page_cache_hit", count=1)
                 if str(cached.get("text") or "").strip():
@@ -10013,11 +10511,16 @@ def _local_ocr_page_texts(app, document: dict, pages: list[int], *, rule: dict |
                 elif cached.get("empty"):
                     empty_pages.append(page)
                 continue
-            path = Path(temp_dir) / f"page-{index}.jpg"
-            path.write_bytes(image)
-            # 释放当前页 bytes；主进程不保留整批渲染图，控制 2GB 服务器峰值。
-            del image
-            pending.append({"page": page, "path": str(path)})
+            # 像素直接写入共享内存段交给 OCR 子进程；共享内存不可用或超出单批预算时
+            # 回退为临时 JPEG 文件。
+            item = image_batch.add_pixels(page, rendered["samples"], rendered["width"], rendered["height"])
+            if item is None:
+                path = Path(temp_dir) / f"page-{index}.jpg"
+                path.write_bytes(_ocr_pixels_jpeg(rendered))
+                item = {"page": page, "path": str(path)}
+            # 释放当前页像素；主进程不保留整批渲染图，控制 2GB 服务器峰值。
+            del rendered
+            pending.append(item)
             hashes[page] = image_hash
             _record_task_timing(task, "local_ocr_page_cache_miss", count=1)
         if not pending:
@@ -10119,11 +10622,13 @@ def _tencent_ocr_page_texts(app, task: dict, document: dict, rule: dict, result:
         page_empty = False
         for service in ordered:
             _raise_if_task_cancelled(app, task)
-            rendered = _render_ocr_page(app, document, page, service, task=task)
-            if not rendered:
-                continue
-            image, image_hash = rendered
-            cached = storage.get_ocr_page_cache(app, document["document_id"], page, image_hash, service)
+            cached = _ocr_page_cache_before_render(app, document, page, service, service, task)
+            if cached is None:
+                rendered = _render_ocr_page(app, document, page, service, task=task)
+                if not rendered:
+                    continue
+                image, image_hash = rendered
+                cached = storage.get_ocr_page_cache(app, document["document_id"], page, image_hash, service)
             # 旧缓存可能来自 SDK 响应层级错误，或丢失了营业执照字段名/表格行列；
             # 只复用当前解析版本。成功但无文字的页面也缓存为 empty，避免纯图片/空白页
             # 在每次重跑时重复消耗 OCR 额度；它只跳过同一接口，不阻断后续页面和多模态。
@@ -11251,18 +11756,15 @@ def _document_page_texts(document: dict) -> dict[int, str]:
         cached = _PAGE_TEXTS_CACHE.get(key)
         if cached is not None:
             return cached
-    text = Path(path).read_text(encoding="utf-8", errors="ignore")
-    parts = re.split(r"\[第(\d+)页\]\n", text)
-    pages: dict[int, str] = {}
-    for index in range(1, len(parts) - 1, 2):
-        pages[int(parts[index])] = parts[index + 1]
+    pages = parsed_text.ParsedText(path).read_pages()
+    size = sum(len(value) for value in pages.values())
     with _PAGE_TEXTS_CACHE_LOCK:
-        while _PAGE_TEXTS_CACHE and _PAGE_TEXTS_CACHE_TOTAL_CHARS + len(text) > _PAGE_TEXTS_CACHE_MAX_CHARS:
+        while _PAGE_TEXTS_CACHE and _PAGE_TEXTS_CACHE_TOTAL_CHARS + size > _PAGE_TEXTS_CACHE_MAX_CHARS:
             oldest_key = next(iter(_PAGE_TEXTS_CACHE))
             removed = _PAGE_TEXTS_CACHE.pop(oldest_key)
             _PAGE_TEXTS_CACHE_TOTAL_CHARS -= sum(len(value) for value in removed.values())
         _PAGE_TEXTS_CACHE[key] = pages
-        _PAGE_TEXTS_CACHE_TOTAL_CHARS += len(text)
+        _PAGE_TEXTS_CACHE_TOTAL_CHARS += size
     return pages
 
 
@@ -11359,7 +11861,7 @@ def _rule_text_anchor_pages(page_texts: dict[int, str], rule: dict, page_count:
         if not (1 <= int(page) <= page_count):
             continue
         text = re.sub(r"[\s\W_]+", "", str(raw_text or ""))
-        hits = [term for term in terms if term in text]
+        hits = found_terms(text, terms)
         if hits:
             ranked.append((max(map(len, hits)) * 10 + len(hits), int(page)))
     return [page for _, page in sorted(ranked, key=lambda item: (-item[0], item[1]))[:8]]
@@ -11768,13 +12270,37 @@ def _vision_render_setting(rule: dict, level: str) -> dict:
 def _safe_vision_render_scale(page, requested_scale: float) -> float:
     """在生成 Pixmap 前限制像素数，避免超大图纸造成瞬时内存峰值。"""
     try:
-        area = max(1.0, float(page.rect.width) * float(page.rect.height))
-        max_scale = (_VISION_MAX_PIXELS_PER_PAGE / area) ** 0.5
-    except (AttributeError, TypeError, ValueError):
-        max_scale = requested_scale
-    # `max_scale` 已按页面面积计算。不要把它反向抬到最小比例，否则超大页面
-    # 会重新突破像素上限；0.01 只是异常页面的 API 安全下限。
-    return max(0.01, min(float(requested_scale), max_scale))
+        width, height = page.rect.width, page.rect.height
+    except AttributeError:
+        return max(0.01, float(requested_scale))
+    return page_render.pixel_capped_scale(width, height, requested_scale, _VISION_MAX_PIXELS_PER_PAGE)
+
+
+def _cached_page_render(app, document: dict, page_number: int, scale: float, quality: int, size_limit: int,
+                        task: dict | None) -> bytes | None:
+    """按（文件哈希、页码、请求比例、质量）读取落盘页图，跨任务、图片模型与 OCR 共用。
+
+    请求比例经 ``_safe_vision_render_scale`` 的像素上限换算只取决于页面尺寸，同一文件内容
+    下结果确定，因此查找前无需打开 PDF。缓存只保存未降采样的首次渲染；超过调用方体积上限
+    的页图按未命中处理，由调用方自行降采样。
+    """
+    document_sha256 = str(document.get("sha256") or "")
+    if not document_sha256 or storage.PAGE_RENDER_CACHE_MB <= 0:
+        return None
+    content = storage.get_page_render_cache(
+        app, document_sha256, page_number, scale, quality, _PAGE_RENDER_CACHE_RENDERER,
+    )
+    if content is not None and len(content) <= size_limit:
+        _record_task_timing(task, "page_render_disk_cache_hit", count=1)
+        return content
+    _record_task_timing(task, "page_render_disk_cache_miss", count=1)
+    return None
+
+
+def _store_page_render(app, document: dict, page_number: int, scale: float, quality: int, content: bytes) -> None:
+    storage.save_page_render_cache(
+        app, str(document.get("sha256") or ""), page_number, scale, quality, _PAGE_RENDER_CACHE_RENDERER, content,
+    )
 
 
 def _task_vision_render_cache(task: dict | None) -> tuple[dict, threading.Lock] | None:
@@ -11794,46 +12320,53 @@ def _task_vision_render_cache(task: dict | None) -> tuple[dict, threading.Lock]
 
 def _render_vision_images(app, document: dict, pages: list[int], level: str, setting: dict | None = None,
                           *, task: dict | None = None) -> list[dict]:
+    # 每页都按同一份请求设置渲染；比例预测与降采样只作用于单页，不会让同批后续证书页
+    # 也被无故降清晰度。
     setting = dict(setting or _VISION_LEVEL_SETTINGS[level])
-    source = storage.document_path(app, document)
-    images: list[dict] = []
+    scale, quality = float(setting["scale"]), int(setting["quality"])
     task_cache = _task_vision_render_cache(task)
-    with fitz.open(source) as pdf:
-        for page_number in pages[:setting["max_pages"]]:
-            page = pdf[page_number - 1]
-            # 必须为每一页复制设置。旧代码在一张大图降采样后会修改外层 setting，
-            # 使同批后续证书页也被无故降清晰度。
-            page_setting = dict(setting)
-            page_setting["scale"] = _safe_vision_render_scale(page, float(page_setting["scale"]))
-            cache_key = (
-                str(document.get("document_id") or ""), int(page_number),
-                round(float(page_setting["scale"]), 3), int(page_setting["quality"]),
+    requested = list(pages[:setting["max_pages"]])
+    contents: dict[int, bytes] = {}
+    for page_number in requested:
+        if page_number in contents:
+            continue
+        # 请求比例经像素上限换算只取决于页面尺寸，缓存键用请求值即可在打开 PDF 前查找。
+        cache_key = (str(document.get("document_id") or ""), int(page_number), round(scale, 3), quality)
+        content = None
+        if task_cache:
+            cache, lock = task_cache
+            with lock:
+                content = cache["items"].get(cache_key)
+        if content is not None:
+            _record_task_timing(task, "vision_render_cache_hit", count=1)
+        else:
+            content = _cached_page_render(app, document, page_number, scale, quality, _VISION_IMAGE_MAX_BYTES, task)
+        if content is not None:
+            contents[page_number] = content
+    missing = [page_number for page_number in dict.fromkeys(requested) if page_number not in contents]
+    if missing:
+        # 未命中的页整批交给渲染进程池，每个子进程只打开一次 PDF。
+        render_started_at = time.monotonic()
+        try:
+            rendered = page_render.render_batch(
+                str(storage.document_path(app, document)), [(int(page), scale, quality) for page in missing],
+                byte_limit=_VISION_IMAGE_MAX_BYTES, max_pixels=_VISION_MAX_PIXELS_PER_PAGE,
+                fallback=_VISION_RENDER_FALLBACK,
             )
-            content = None
-            if task_cache:
+        finally:
+            _record_task_timing(task, "vision_render_seconds", time.monotonic() - render_started_at, count=len(missing))
+        for page_number in missing:
+            content, reduced = rendered[int(page_number)]
+            if not reduced:
+                _store_page_render(app, document, page_number, scale, quality, content)
+            contents[page_number] = content
+            if task_cache and len(content) <= _VISION_IMAGE_MAX_BYTES:
                 cache, lock = task_cache
+                cache_key = (str(document.get("document_id") or ""), int(page_number), round(scale, 3), quality)
                 with lock:
-                    content = cache["items"].get(cache_key)
-            if content is None:
-                render_started_at = time.monotonic()
-                try:
-                    pixmap = page.get_pixmap(matrix=fitz.Matrix(page_setting["scale"], page_setting["scale"]), alpha=False)
-                    content = pixmap.tobytes("jpeg", jpg_quality=page_setting["quality"])
-                    # 一张图片控制在约 4MB 内，既低于接口上限，也避免 2GB 小服务器出现大块内存峰值。
-                    while len(content) > 4 * 1024 * 1024 and page_setting["scale"] > _VISION_MIN_RENDER_SCALE:
-                        page_setting = {
-                            **page_setting,
-                            "scale": max(_VISION_MIN_RENDER_SCALE, page_setting["scale"] * 0.75),
-                            "quality": max(60, page_setting["quality"] - 8),
-                        }
-                        pixmap = page.get_pixmap(matrix=fitz.Matrix(page_setting["scale"], page_setting["scale"]), alpha=False)
-                        content = pixmap.tobytes("jpeg", jpg_quality=page_setting["quality"])
-                finally:
-                    _record_task_timing(task, "vision_render_seconds", time.monotonic() - render_started_at, count=1)
-                if task_cache and len(content) <= 4 * 1024 * 1024:
-                    cache, lock = task_cache
-                    with lock:
-                        # FIFO 淘汰，且只缓存 JPEG 字节，不持有 PDF/Pixmap 对象。
+                    # FIFO 淘汰，且只缓存 JPEG 字节，不持有 PDF/Pixmap 对象。并行投标人可能同时
+                    # 未命中同一页，已由其他线程写入的页不再重复累计字节数。
+                    if cache_key not in cache["items"]:
                         while cache["items"] and cache["bytes"] + len(content) > _VISION_TASK_RENDER_CACHE_BYTES:
                             oldest_key = next(iter(cache["items"]))
                             removed = cache["items"].pop(oldest_key)
@@ -11841,15 +12374,15 @@ def _render_vision_images(app, document: dict, pages: list[int], level: str, set
                         if cache["bytes"] + len(content) <= _VISION_TASK_RENDER_CACHE_BYTES:
                             cache["items"][cache_key] = content
                             cache["bytes"] = int(cache["bytes"]) + len(content)
-            else:
-                _record_task_timing(task, "vision_render_cache_hit", count=1)
-            images.append({
-                "page": page_number,
-                "mime_type": "image/jpeg",
-                "image_bytes": content,
-                "detail": page_setting["detail"],
-            })
-    return images
+    return [
+        {
+            "page": page_number,
+            "mime_type": "image/jpeg",
+            "image_bytes": contents[page_number],
+            "detail": setting["detail"],
+        }
+        for page_number in requested
+    ]
 
 
 def _vision_content(prompt: str, images: list[dict], profile: dict) -> list[dict]:
@@ -12376,12 +12909,75 @@ def _normalise_partial_combined_results(component: str, output: list[dict], rule
     return _combined_batch_results(component, output, present_rules, payload, tender_baseline, source_chunks), missing_rules
 
 
+def _cross_document_batch_key(component: str, payload: list[dict], system_prompt: str) -> str:
+    """只有规则载荷与系统提示词完全一致的规则组才能跨投标人合批。"""
+    digest = hashlib.sha256()
+    for part in (component, _stable_prompt_json(payload), system_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cross_document_batch_prompt(app, component: str, payload: list[dict], members: list[dict]) -> str:
+    task_prompt = _combined_batch_task_prompt(
+        app, component, payload, document_name="见下方各文件", bidder_name="见下方各文件",
+        text="见下方各文件编号对应的原文", compact=False,
+    )
+    blocks = []
+    for index, member in enumerate(members, start=1):
+        document = member["document"]
+        blocks.append(
+            f"【文件 D{index}】投标文件：{document['original_name']}；投标人：{document['bidder_name'] or '未填写'}\n"
+            f"{member['text']}{_document_prompt_notes(document, payload)}"
+        )
+    return storage.render_prompt_template(
+        app, "evaluate_all_cross_document_user", task=task_prompt, documents="\n\n".join(blocks),
+    )
+
+
+def _request_cross_document_batch(app, task: dict, profile: dict, component: str, payload: list[dict],
+                                  system_prompt: str, thinking_mode: str | None, members: list[dict]) -> dict:
+    """发送一次跨投标人合并请求，返回 ``{document_id: {"results": [...]}}``。
+
+    输出触顶时只回收完整返回的文件条目；缺失或格式不符的文件不出现在结果中，由各自
+    线程回到单文件请求。
+    """
+    keys = {f"D{index}": member["document_id"] for index, member in enumerate(members, start=1)}
+    try:
+        parsed = _request_task_json(
+            app, task, profile, f"evaluate_all_{component}_cross_document_batch", system_prompt,
+            _cross_document_batch_prompt(app, component, payload, members),
+            context_mode=f"cross_document:{len(members)}",
+            max_tokens=_output_token_budget(profile, sum(member["output_tokens"] for member in members)),
+            thinking_mode=thinking_mode, document_ids=list(keys.values()),
+        )
+    except InvalidJsonResponse as exc:
+        if exc.finish_reason.lower() not in {"length", "max_tokens"}:
+            raise
+        parsed = _recover_complete_json_array(exc.raw_content, "documents") or {}
+    results = {}
+    entries = parsed.get("documents") if isinstance(parsed, dict) else None
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("results"), list):
+            continue
+        document_id = keys.get(str(entry.get("document_key") or "").strip())
+        if document_id and document_id not in results:
+            results[document_id] = {"results": entry["results"]}
+    _record_task_timing(task, "cross_document_batch", count=1)
+    _record_task_timing(task, "cross_document_batch_documents", count=len(results))
+    return results
+
+
 def _run_combined_batch(app, task: dict, profile: dict, document: dict, component: str, rules: list[dict],
                         system_prompt: str, char_limit: int, label: str, depth: int = 0,
                         scan_index: dict | None = None, allow_missing_retry: bool = True,
                         targeted_retry: bool = False, allow_item_split: bool = True,
-                        compact_retry: bool = False) -> tuple[list[dict], int, int, int, str]:
-    """运行一个可独立保存的综合评审规则组；异常时仅拆分当前组。"""
+                        compact_retry: bool = False, item_sink=None) -> tuple[list[dict], int, int, int, str]:
+    """运行一个可独立保存的综合评审规则组；异常时仅拆分当前组。
+
+    ``item_sink`` 仅在开启流式接收时，由本组首个请求对每条到达的完整结论调用一次，参数为
+    规范化后的结论列表；半句截断或契约冲突、随后需定向补评的条目不会交给它。
+    """
     payload = _combined_batch_payload(component, rules)
     strategy = _scan_strategy(rules)
     context_limit = min(char_limit, EVALUATION_BATCH_CONTEXT_CHARS,
@@ -12400,7 +12996,10 @@ def _run_combined_batch(app, task: dict, profile: dict, document: dict, componen
             context = {"text": full_text[:context_limit], "mode": "full_document", "pages": [], "unmatched_rule_ids": []}
         else:
             # 兼容异常元数据或旧解析记录；正常长文件会在调用前建立全文扫描索引。
-            context = build_rule_context(document["parsed_path"], rules, context_limit, allow_partial=True)
+            context = build_rule_context(document["parsed_path"], rules, context_limit, allow_partial=True,
+                                         token_budget=_prompt_token_budget(profile))
+            if context.get("dropped_pages"):
+                _record_task_timing(task, "context_packed_dropped_pages", count=len(context["dropped_pages"]))
     # 短文件不经过全文扫描索引；仍需以同一套本地逻辑保护固定表单日期的交叉核验。
     # 这项证据包很小，只在存在跨年异常时写入，不会扩大普通审查的上下文或 token。
     if component == "review" and not context.get("form_date_consistency"):
@@ -12435,7 +13034,14 @@ def _run_combined_batch(app, task: dict, profile: dict, document: dict, componen
         _record_evidence_context_shadow(
             task, document.get("document_id"), component, context.get("pages"), len(str(context.get("text") or "")),
         )
+    # 跨投标人合批只作用于首轮请求；缺失、不完整和格式恢复仍按单文件执行。
+    batcher = task.get("_cross_document_batcher") if (
+        depth == 0 and not targeted_retry and not compact_retry
+    ) else None
+    batch_key = _cross_document_batch_key(component, payload, system_prompt) if batcher else ""
     if context["mode"] == "unmatched_rules":
+        if batcher:
+            batcher.pass_key(batch_key, document["document_id"])
         reason = "本地页级检索未定位到该规则的直接证据，未发送无关全文；请结合投标文件人工核验。"
         return _combined_manual_results(component, rules, payload, reason), 0, 0, len(rules), context["mode"]
     # 首次判断沿用模型档案的思考能力；只在服务商明确支持时传入合法参数。
@@ -12503,16 +13109,74 @@ def _run_combined_batch(app, task: dict, profile: dict, document: dict, componen
 
     format_error: ValueError | None = None
     try:
+        output_budget = _evaluation_output_budget(profile, component, rules, thinking_mode)
+        if batcher and context["mode"] == "full_document":
+            packed = batcher.submit(
+                batch_key,
+                {"document_id": document["document_id"], "document": document, "text": context["text"],
+                 "chars": len(context["text"]),
+                 "output_tokens": output_budget or _combined_batch_output_budget(component, rules)},
+                lambda members: _request_cross_document_batch(
+                    app, task, profile, component, payload, system_prompt, thinking_mode, members,
+                ),
+                cancellation_check=lambda: _raise_if_task_cancelled(app, task),
+            )
+            if packed is not None:
+                return finish(packed, 0, f"{context['mode']}+cross_document")
+        elif batcher:
+            batcher.pass_key(batch_key, document["document_id"])
+        received_count = 0
+
+        def report_item(item: dict) -> None:
+            # 仅在开启流式接收时调用：每条结论到达即更新进度，不必等整组响应结束。
+            nonlocal received_count
+            received_count += 1
+            storage.update_task(app, task["task_id"], message=f"{label} 已收到 {received_count}/{len(rules)} 条结论")
+            if not item_sink or not isinstance(item, dict) or _raw_result_text_incomplete(component, item):
+                return
+            try:
+                streamed, _ = _normalise_partial_combined_results(
+                    component, [item], rules, str((scan_index or {}).get("tender_technical_baseline") or ""),
+                    (scan_index or {}).get("chunks") if isinstance(scan_index, dict) else None,
+                )
+                if component == "review":
+                    streamed = _apply_form_date_consistency_guard(
+                        streamed, rules, context.get("form_date_consistency") or {},
+                    )
+                streamed = [entry for entry in streamed if not entry.get("score_recovered")]
+                if streamed:
+                    item_sink(streamed)
+            except Exception:
+                # 逐条落库只为提前可见和失败后少重跑；异常不能打断正在接收的响应。
+                traceback.print_exc()
+
         parsed = _request_task_json(
             app, task, profile, f"evaluate_all_{component}_batch", system_prompt,
             _combined_batch_prompt(app, component, document, payload, context["text"], compact=compact_retry),
             document_id=document["document_id"], context_mode=f"{label}:{context['mode']}",
-            max_tokens=_evaluation_output_budget(profile, component, rules, thinking_mode), thinking_mode=thinking_mode,
+            max_tokens=output_budget, thinking_mode=thinking_mode,
+            stream_field="results", item_callback=report_item, expected_items=len(rules),
         )
         return finish(parsed, 0, context["mode"])
     except InvalidJsonResponse as exc:
         format_error = exc
-        if exc.finish_reason.lower() not in {"length", "max_tokens"}:
+        recovered = _recover_complete_json_array(exc.raw_content, "results") if (
+            exc.stream_aborted and allow_missing_retry and len(rules) > 1
+        ) else None
+        if recovered:
+            # 流式接收已预判必然触顶并提前断开：保留边界完整的结论，只对其余规则
+            # 定向补评，不再把整组拆分重发；半截条目一律丢弃，不做补写。
+            storage.update_task(
+                app, task["task_id"],
+                message=f"{label} 输出将超出上限，已保留 {len(recovered['results'])} 条完整结论，正在仅补评其余规则",
+            )
+            try:
+                return finish(recovered, 0, f"{context['mode']}+stream_partial")
+            except ValueError as recover_exc:
+                if not _is_model_format_error(recover_exc):
+                    raise
+                format_error = recover_exc
+        elif exc.finish_reason.lower() not in {"length", "max_tokens"}:
             storage.update_task(app, task["task_id"], message=f"{label} 模型结果正在规范化")
             try:
                 repaired = _repair_invalid_json(
@@ -13069,6 +13733,9 @@ def _evaluate_document(app, task: dict, document: dict, *, rule_set: dict, profi
     # 全文扫描临时不可用时，后续逐规则审查已经用本地章节检索继续完成；这是恢复告警
     # 而非可单独重跑的规则失败，不能把所有已完成规则误显示为“部分完成”。
     values["full_scan_recovery_warning"] = bool(scan_unavailable and scan_units)
+    batcher = task.get("_cross_document_batcher")
+    if batcher and not scan_index:
+        batcher.enter(document["document_id"])
     components = component_specs
     for component, component_rules, run in components:
         component_rules = [rule for rule in component_rules if rule["rule_id"] not in reused_rule_ids[component]]
@@ -13090,14 +13757,37 @@ def _evaluate_document(app, task: dict, document: dict, *, rule_set: dict, profi
         def run_group(group_index: int, group: list[dict]):
             label = f"{bidder_name}·{component} 第{group_index}组"
             progress.message(f"正在综合评审：{label}")
+            streamed: dict[str, dict] = {}
+
+            def persist_streamed(items: list[dict]) -> None:
+                # 流式接收的结论逐条落库：页面提前可见；整组随后连接失败时，这些规则
+                # 按已完成处理并写入断点，“仅重跑失败项”只重发其余规则。
+                streamed.update({item["rule_id"]: item for item in items})
+                if not run:
+                    return
+                guarded = [
+                    _apply_document_evidence_guard(document, component, rules_by_id[str(item["rule_id"])], item)
+                    for item in _with_scan_visual_candidates(items, scan_index, document)
+                    if str(item.get("rule_id") or "") in rules_by_id
+                ]
+                if component == "review":
+                    storage.save_review_results(app, run["review_run_id"], document["document_id"], guarded)
+                else:
+                    storage.save_score_results(app, run["score_run_id"], document["document_id"], guarded)
+
             try:
                 results, compact_count, split_count, fallback_count, _ = _run_combined_batch(
                     app, task, profile, document, component, group, system_prompt, char_limit, label, scan_index=scan_index,
+                    item_sink=persist_streamed,
                 )
                 return group_index, label, results, compact_count, split_count, fallback_count, []
             except ValueError as exc:
                 if not _is_isolatable_model_error(exc):
                     raise
+                received = [streamed[rule["rule_id"]] for rule in group if rule["rule_id"] in streamed]
+                group = [rule for rule in group if rule["rule_id"] not in streamed]
+                if not group:
+                    return group_index, label, received, 0, 0, 0, []
                 payload = _combined_batch_payload(component, group)
                 content_filtered = _is_content_filtered_model_error(exc)
                 reason = (
@@ -13105,7 +13795,7 @@ def _evaluate_document(app, task: dict, document: dict, *, rule_set: dict, profi
                     if content_filtered else
                     "模型连接连续恢复失败，本规则组暂未获得可靠 AI 结论；其他规则已继续完成，可仅重跑本组。"
                 )
-                results = _combined_manual_results(component, group, payload, reason)
+                results = received + _combined_manual_results(component, group, payload, reason)
                 failure = {
                     "document_id": document["document_id"], "bidder_name": bidder_name,
                     "component": component, "rule_ids": [rule["rule_id"] for rule in group],
@@ -13158,6 +13848,8 @@ def _evaluate_document(app, task: dict, document: dict, *, rule_set: dict, profi
         else:
             for index, group in enumerate(groups, start=1):
                 persist_completed(run_group(index, group))
+    if batcher:
+        batcher.leave(document["document_id"])
     visual_components = (
         ("review", review_rules, review_run),
         ("objective", objective_rules, objective_run),
@@ -13987,18 +14679,29 @@ def _evaluate_all(app, task: dict) -> dict:
         max_limit=parallel_limit,
     )
     progress = _EvaluationProgress(app, task, total_work_units, len(documents))
+    # 可选的跨投标人合批：多家短文件同一规则组的首轮判断合并为一次请求，减少重复发送
+    # 的任务要求与规则载荷；默认关闭，结果仍按文件独立校验、落库。
+    batcher = _CrossDocumentBatcher(max_context_chars=EVALUATION_BATCH_CONTEXT_CHARS) if (
+        task.get("payload", {}).get("cross_document_batching") and len(documents) > 1
+    ) else None
+    task["_cross_document_batcher"] = batcher
 
     def run_document(document: dict) -> dict:
         _raise_if_task_cancelled(app, task)
-        value = _evaluate_document(
-            app, task, document, rule_set=rule_set, profile=profile, char_limit=char_limit,
-            expected_rule_ids=expected_rule_ids, review_rules=review_rules, objective_rules=objective_rules,
-            subjective_rules=subjective_rules, review_run=review_run, objective_run=objective_run,
-            subjective_run=subjective_run, project_scope=project_scope, system_prompt=system_prompt,
-            scan_units=scan_units_by_document[document["document_id"]], groups_per_document=groups_per_document,
-            vision_profile=vision_profile, ocr_features_enabled=ocr_features_enabled,
-            visual_units=visual_rule_count, progress=progress,
-        )
+        try:
+            value = _evaluate_document(
+                app, task, document, rule_set=rule_set, profile=profile, char_limit=char_limit,
+                expected_rule_ids=expected_rule_ids, review_rules=review_rules, objective_rules=objective_rules,
+                subjective_rules=subjective_rules, review_run=review_run, objective_run=objective_run,
+                subjective_run=subjective_run, project_scope=project_scope, system_prompt=system_prompt,
+                scan_units=scan_units_by_document[document["document_id"]], groups_per_document=groups_per_document,
+                vision_profile=vision_profile, ocr_features_enabled=ocr_features_enabled,
+                visual_units=visual_rule_count, progress=progress,
+            )
+        finally:
+            if batcher:
+                # 异常退出的文件不能让其他投标人的合批发起方继续等待。
+                batcher.leave(document["document_id"])
         # 单份文件的所有规则组已完整落库后，才原子切换“当前结果”索引。这样局部
         # 重评失败不会覆盖旧结果，未选择投标人也不会因新任务而从页面或报告消失。
         _raise_if_task_cancelled(app, task)
@@ -14235,11 +14938,7 @@ def main() -> int:
     try:
         lock.write_text(str(os.getpid()), encoding="utf-8")
         storage.interrupt_stale_running_tasks(app)
-        while True:
-            task = storage.next_queued_task(app)
-            if not task:
-                break
-            run_task(app, task)
+        TaskScheduler(app, run_task).run()
     finally:
         try:
             lock.unlink()
@@ -2,6 +2,7 @@
   const api = '/api/evaluation-workbench';
   let activeProject = null;
   let poller = null;
+  let projectChangeToken = '';
   let wasTaskActive = false;
   let lastActiveTaskId = null;
   let lastCompareTask = null;
@@ -333,8 +334,26 @@
   }
   document.addEventListener('click', () => { if (completionTicker) stopCompletionTicker(); }, true);
   async function loadProjects() { const data = await request('/projects'); $('projects').innerHTML = data.projects.length ? data.projects.map((p) => `<article class="card" data-project="${p.project_id}"><h3>${escapeHtml(projectDisplayName(p))}</h3><p>${escapeHtml(projectMeta(p))}</p><p>${p.document_count || 0} 份文件 · ${p.bid_count || 0} 份投标文件</p></article>`).join('') : '<p class="muted">尚未创建评标项目。</p>'; document.querySelectorAll('[data-project]').forEach((node) => node.onclick = () => openProject(node.dataset.project)); }
-  function stopPolling() { if (poller) clearInterval(poller); poller = null; }
-  function startPolling() { if (!poller) poller = setInterval(() => refreshProject().catch((error) => { stopPolling(); $('task-status').textContent = error.message; }), 2500); }
+  function stopPolling() { if (poller) poller.stopped = true; poller = null; }
+  // 长轮询：服务端在项目内容版本号变化时立即返回；每次刷新后至少间隔 1.5 秒，空闲时不重建项目数据。
+  // 同步 worker 部署下服务端不挂起请求（long_poll=false），改为每 2.5 秒查询一次版本号。
+  function startPolling() {
+    if (poller) return;
+    const state = poller = {stopped:false};
+    (async () => {
+      while (!state.stopped && activeProject) {
+        const project = activeProject;
+        try {
+          const data = await request(`/projects/${project}/changes?since=${encodeURIComponent(projectChangeToken)}&wait=20`);
+          if (!data.long_poll && !data.changed) await new Promise((resolve) => setTimeout(resolve, 2500));
+          if (state.stopped || project !== activeProject || !data.changed) continue;
+          await refreshProject();
+          await new Promise((resolve) => setTimeout(resolve, 1500));
+        } catch (error) { if (poller === state) stopPolling(); $('task-status').textContent = error.message; }
+      }
+      if (poller === state) poller = null;
+    })();
+  }
   function resetProjectPanels() { ['documents','rules','price-sheet-content','review-results','objective-results','subjective-results'].forEach((id) => { const node = $(id); if (node) node.innerHTML = '<p class="muted">正在加载当前项目…</p>'; }); $('token-usage').textContent = '正在加载当前项目…'; $('latest-run-usage').textContent = '正在加载当前项目…'; $('task-status').textContent = '正在加载当前项目…'; lastPartialDocumentsKey = ''; currentPriceSheet = null; selectedPriceRuleId = ''; priceDraft = null; lastObservedPriceTaskId = null; scoreComparisonState = {objective:null, subjective:null}; closeScoreComparison(); updateScoreComparisonButton(); }
   async function openProject(id) { activeProject = id; wasTaskActive = false; lastActiveTaskId = null; lastCompareTask = null; resetProjectPanels(); stopCompletionTicker(); $('projects-panel').classList.add('hidden'); $('project-form').classList.add('hidden'); $('workspace').classList.remove('hidden'); await refreshProject(); await loadProfiles(); await refreshRules(); await refreshPriceSheet(false, true); await refreshReview(); await refreshScores(); await refreshUsage(); }
   async function refreshUsage() { if (!activeProject) return; const data = await request(`/projects/${activeProject}/token-usage`); const u = data.usage; const localPerf = u.local_ocr_performance || {}; if (!u.call_count && !u.ocr_requests && !u.local_ocr_pages && !localPerf.run_count) { $('token-usage').textContent = '尚无调用记录'; } else { const detail = u.metered_calls ? `输入 ${u.prompt_tokens.toLocaleString()} / 输出 ${u.completion_tokens.toLocaleString()} / 合计 ${u.total_tokens.toLocaleString()} Token` : `模型接口未返回 Token；已发送 ${u.input_chars.toLocaleString()} 字符`; const families = u.families || {}; const extras = []; if (families.vision && families.vision.call_count) extras.push(`图片识别 ${families.vision.call_count} 次`); if (u.ocr_requests) extras.push(`腾讯 OCR ${u.ocr_requests} 页`); if (u.local_ocr_pages || localPerf.run_count) { let localLabel = `本地 OCR ${u.local_ocr_pages || 0} 页`; if (localPerf.average_ms_per_page) localLabel += `，平均 ${(localPerf.average_ms_per_page / 1000).toFixed(1)} 秒/页`; if (localPerf.peak_rss_kb) localLabel += `，峰值约 ${Math.ceil(localPerf.peak_rss_kb / 1024)} MB`; extras.push(localLabel); } const cache = u.prompt_tokens ? `；缓存命中 ${Math.round((u.cache_hit_tokens || 0) * 100 / u.prompt_tokens)}%` : ''; $('token-usage').textContent = `${detail}（${u.call_count} 次调用${extras.length ? '；其中' + extras.join('、') : ''}${cache}）`; } renderLatestRunUsage(data.latest_run); }
@@ -348,7 +367,7 @@
       await refreshProject();
     } catch (error) { alert(error.message); }
   }
-  async function refreshProject() { if (!activeProject) return; const data = await request(`/projects/${activeProject}`); const p = data.project; $('workspace-name').textContent = projectDisplayName(p); $('workspace-meta').textContent = projectMeta(p); const active = data.tasks.find((t) => ['queued','running'].includes(t.status)); if (active) lastActiveTaskId = active.task_id; $('task-status').innerHTML = taskText(active || data.tasks[0], data.queue_contexts?.[active?.task_id]); document.querySelectorAll('.retry-failed-evaluation').forEach((button) => button.onclick = () => queue('evaluate_all', {retry_failed_task_id:button.dataset.task})); document.querySelectorAll('.cancel-evaluation-task').forEach((button) => button.onclick = () => cancelEvaluationTask(button.dataset.task, button.dataset.status)); if (active) startPolling(); else stopPolling(); renderDocuments(data.documents); const completed = data.tasks.find((t) => t.task_type === 'compare_documents' && t.status === 'success'); if (completed && completed.task_id !== lastCompareTask) { lastCompareTask = completed.task_id; await renderCompare(completed.task_id, data.documents); } const completedDocuments = active?.task_type === 'evaluate_all' ? (active.completed_documents || []) : []; const partialKey = completedDocuments.length ? `${active.task_id}:${completedDocuments.map((item) => item.document_id).sort().join(',')}` : ''; if (partialKey && partialKey !== lastPartialDocumentsKey) { lastPartialDocumentsKey = partialKey; await Promise.all([refreshReview(), refreshScores()]); } if (!active) lastPartialDocumentsKey = ''; const justFinished = wasTaskActive && !active; const finishedTask = justFinished ? data.tasks.find((task) => task.task_id === lastActiveTaskId && task.status === 'success') : null; wasTaskActive = Boolean(active); const priceCompleted = data.tasks.find((task) => ['extract_price_rules','calculate_price_scores'].includes(task.task_type) && task.status === 'success'); const priceJustCompleted = priceCompleted && priceCompleted.task_id !== lastObservedPriceTaskId; if (priceCompleted) lastObservedPriceTaskId = priceCompleted.task_id; if (justFinished || priceJustCompleted) { lastActiveTaskId = null; await Promise.all([refreshRules(), refreshPriceSheet(false, true), refreshReview(), refreshScores(), refreshUsage()]); if (finishedTask) startCompletionTicker(finishedTask); } }
+  async function refreshProject() { if (!activeProject) return; const data = await request(`/projects/${activeProject}`); projectChangeToken = data.change_token || ''; const p = data.project; $('workspace-name').textContent = projectDisplayName(p); $('workspace-meta').textContent = projectMeta(p); const active = data.tasks.find((t) => ['queued','running'].includes(t.status)); if (active) lastActiveTaskId = active.task_id; $('task-status').innerHTML = taskText(active || data.tasks[0], data.queue_contexts?.[active?.task_id]); document.querySelectorAll('.retry-failed-evaluation').forEach((button) => button.onclick = () => queue('evaluate_all', {retry_failed_task_id:button.dataset.task})); document.querySelectorAll('.cancel-evaluation-task').forEach((button) => button.onclick = () => cancelEvaluationTask(button.dataset.task, button.dataset.status)); if (active) startPolling(); else stopPolling(); renderDocuments(data.documents); const completed = data.tasks.find((t) => t.task_type === 'compare_documents' && t.status === 'success'); if (completed && completed.task_id !== lastCompareTask) { lastCompareTask = completed.task_id; await renderCompare(completed.task_id, data.documents); } const completedDocuments = active?.task_type === 'evaluate_all' ? (active.completed_documents || []) : []; const partialKey = completedDocuments.length ? `${active.task_id}:${completedDocuments.map((item) => item.document_id).sort().join(',')}` : ''; if (partialKey && partialKey !== lastPartialDocumentsKey) { lastPartialDocumentsKey = partialKey; await Promise.all([refreshReview(), refreshScores()]); } if (!active) lastPartialDocumentsKey = ''; const justFinished = wasTaskActive && !active; const finishedTask = justFinished ? data.tasks.find((task) => task.task_id === lastActiveTaskId && task.status === 'success') : null; wasTaskActive = Boolean(active); const priceCompleted = data.tasks.find((task) => ['extract_price_rules','calculate_price_scores'].includes(task.task_type) && task.status === 'success'); const priceJustCompleted = priceCompleted && priceCompleted.task_id !== lastObservedPriceTaskId; if (priceCompleted) lastObservedPriceTaskId = priceCompleted.task_id; if (justFinished || priceJustCompleted) { lastActiveTaskId = null; await Promise.all([refreshRules(), refreshPriceSheet(false, true), refreshReview(), refreshScores(), refreshUsage()]); if (finishedTask) startCompletionTicker(finishedTask); } }
   function renderDocuments(documents) { $('documents').innerHTML = documents.length ? `<table><thead><tr><th>角色</th><th>文件</th><th>投标人</th><th>报价（万元）</th><th>解析</th><th>页数/字符</th><th>操作</th></tr></thead><tbody>${documents.map((d) => `<tr><td><span class="tag">${roleLabel(d.role)}</span></td><td>${escapeHtml(d.original_name)}</td><td>${escapeHtml(d.bidder_name || '-')}</td>${documentQuoteCell(d)}<td class="status-${d.parse_status}">${escapeHtml(parseStatusLabel(d.parse_status))}${d.parse_error ? `<br>${escapeHtml(d.parse_error)}` : ''}</td><td>${d.page_count ?? '-'} / ${d.text_length ?? '-'}</td><td><a class="download-document" href="/api/evaluation-workbench/projects/${activeProject}/documents/${d.document_id}/download">下载</a><button class="delete-document" data-document="${d.document_id}">删除</button></td></tr>`).join('')}</tbody></table>` : '<p class="muted">尚未上传文件。</p>'; $('documents').querySelectorAll('.delete-document').forEach((button) => button.onclick = async () => { if (!confirm('删除文件会同时移除其历史审查和评分结果，是否继续？')) return; try { await request(`/projects/${activeProject}/documents/${button.dataset.document}`, {method:'DELETE'}); await refreshProject(); await refreshPriceSheet(false, true); await refreshReview(); await refreshScores(); } catch (error) { alert(error.message); } }); }
   function documentQuoteCell(d) {
     if (d.role !== 'bid') return '<td>—</td>';
@@ -0,0 +1,117 @@
+"""多模式字符串匹配：一次扫描文本，找出一组词中所有出现过的词。
+
+各处“逐词 ``term in text``”的写法对每个词都要把长文本扫一遍，词表越长越慢。这里把词表
+编译成前缀树，再由前缀树生成一个按字符分支的正则（公共前缀只比较一次）。扫描分两步：
+
+* 正则在 C 层跳过不可能开始任何词的位置，找到最左侧“某个词从这里开始”的命中；
+* 只在命中区间内的各起点沿前缀树逐字走，列出从该起点开始的全部词（含互相包含的词）。
+
+结果与逐词 ``in`` / ``find`` 完全一致：每个出现位置都会被报告，包括重叠和嵌套的命中。
+纯 Python 的 Aho-Corasick 逐字符状态转移在 CPython 下比逐词 ``in`` 还慢（2,500 页、80 个词
+约慢 2-3 倍），因此不采用状态机扫描。编译结果按词表缓存，同一词表只编译一次。
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+
+# 不同规则的材料词表各不相同；保留最近使用的若干份即可覆盖一次评审中的重复调用。
+MATCHER_CACHE_SIZE = 256
+
+_END = None
+
+
+class PatternMatcher:
+    """Compiled multi-pattern matcher yielding ``(start, end, value)`` for every hit.
+
+    ``patterns`` holds plain strings or ``(pattern, value)`` pairs; the same pattern may
+    carry several values. Empty patterns are ignored.
+    """
+
+    def __init__(self, patterns):
+        self._trie = {}
+        for item in patterns:
+            pattern, value = (item, item) if isinstance(item, str) else item
+            if not pattern:
+                continue
+            node = self._trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node.setdefault(_END, []).append(value)
+        self._search = re.compile(_trie_regex(self._trie)).search if self._trie else None
+
+    def _walk(self, text, start):
+        node = self._trie
+        for index in range(start, len(text)):
+            node = node.get(text[index])
+            if node is None:
+                return
+            values = node.get(_END)
+            if values:
+                for value in values:
+                    yield start, index + 1, value
+
+    def iter_matches(self, text):
+        """Yield every occurrence ordered by start, then by length (overlaps included)."""
+        if self._search is None or not text:
+            return
+        search = self._search
+        cursor = 0
+        while True:
+            match = search(text, cursor)
+            if match is None:
+                return
+            # 正则只报告最左起点的一个最短词；命中区间内的其余起点也可能开始别的词。
+            for start in range(match.start(), match.end()):
+                yield from self._walk(text, start)
+            cursor = match.end()
+
+    def found(self, text):
+        """Return the set of values whose pattern occurs in ``text``."""
+        return {value for _, _, value in self.iter_matches(text)}
+
+    def contains_any(self, text):
+        return self._search is not None and bool(text) and self._search(text) is not None
+
+
+def _trie_regex(node):
+    # 词尾节点只需最短命中即可确定起点，后续更长的词由前缀树逐字列出。
+    if _END in node:
+        return ""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in node.items() if char is not _END]
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+_MATCHERS = OrderedDict()
+_MATCHERS_LOCK = threading.Lock()
+
+
+def matcher(terms):
+    """Return the cached :class:`PatternMatcher` for ``terms`` (order-insensitive)."""
+    key = frozenset(term for term in terms if term)
+    with _MATCHERS_LOCK:
+        compiled = _MATCHERS.get(key)
+        if compiled is not None:
+            _MATCHERS.move_to_end(key)
+            return compiled
+    compiled = PatternMatcher(sorted(key))
+    with _MATCHERS_LOCK:
+        _MATCHERS[key] = compiled
+        while len(_MATCHERS) > MATCHER_CACHE_SIZE:
+            _MATCHERS.popitem(last=False)
+    return compiled
+
+
+def found_terms(text, terms):
+    """Return the non-empty ``terms`` occurring in ``text``, i.e. ``{t for t in terms if t and t in text}``."""
+    if not text:
+        return set()
+    return matcher(terms).found(text)
+
+
+def contains_any(text, terms):
+    """Same as ``any(term in text for term in terms)`` for non-empty terms."""
+    return bool(text) and matcher(terms).contains_any(text)
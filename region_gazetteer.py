@@ -0,0 +1,161 @@
+"""山西省市、县（区）地名词典与多模式匹配。
+
+取代 ``extract_region`` 中“逐城市子串判断 + 正则猜县名 + 黑名单过滤”的做法：
+全部地名（含简称和撤并前旧称）预编译为一个多模式匹配器，每个字段只扫描一遍，
+只接受词典内的真实地名，县区所属地级市由词典直接给出。
+"""
+
+import threading
+
+from multi_pattern import PatternMatcher
+
+
+# 地级市 -> 下辖县级行政区（2019 年区划调整后的现行名称）。
+SHANXI_DIVISIONS = {
+    "太原": ("小店区", "迎泽区", "杏花岭区", "尖草坪区", "万柏林区", "晋源区",
+             "清徐县", "阳曲县", "娄烦县", "古交市"),
+    "大同": ("新荣区", "平城区", "云冈区", "云州区", "阳高县", "天镇县", "广灵县",
+             "灵丘县", "浑源县", "左云县"),
+    "阳泉": ("城区", "矿区", "郊区", "平定县", "盂县"),
+    "长治": ("潞州区", "上党区", "屯留区", "潞城区", "襄垣县", "平顺县", "黎城县",
+             "壶关县", "长子县", "武乡县", "沁县", "沁源县"),
+    "晋城": ("城区", "沁水县", "阳城县", "陵川县", "泽州县", "高平市"),
+    "朔州": ("朔城区", "平鲁区", "山阴县", "应县", "右玉县", "怀仁市"),
+    "晋中": ("榆次区", "太谷区", "榆社县", "左权县", "和顺县", "昔阳县", "寿阳县",
+             "祁县", "平遥县", "灵石县", "介休市"),
+    "运城": ("盐湖区", "临猗县", "万荣县", "闻喜县", "稷山县", "新绛县", "绛县",
+             "垣曲县", "夏县", "平陆县", "芮城县", "永济市", "河津市"),
+    "忻州": ("忻府区", "定襄县", "五台县", "代县", "繁峙县", "宁武县", "静乐县",
+             "神池县", "五寨县", "岢岚县", "河曲县", "保德县", "偏关县", "原平市"),
+    "临汾": ("尧都区", "曲沃县", "翼城县", "襄汾县", "洪洞县", "古县", "安泽县",
+             "浮山县", "吉县", "乡宁县", "大宁县", "隰县", "永和县", "蒲县", "汾西县",
+             "侯马市", "霍州市"),
+    "吕梁": ("离石区", "文水县", "交城县", "兴县", "临县", "柳林县", "石楼县", "岚县",
+             "方山县", "中阳县", "交口县", "孝义市", "汾阳市"),
+}
+
+# 撤并/更名前的旧称仍常见于采购人名称和历史公告，统一归到现行名称。
+FORMER_NAMES = {
+    "大同县": ("大同", "云州区"),
+    "大同市南郊区": ("大同", "云冈区"),
+    "大同市矿区": ("大同", "云冈区"),
+    "大同市城区": ("大同", "平城区"),
+    "长治县": ("长治", "上党区"),
+    "屯留县": ("长治", "屯留区"),
+    "潞城市": ("长治", "潞城区"),
+    "长治市城区": ("长治", "潞州区"),
+    "长治市郊区": ("长治", "潞州区"),
+    "太谷县": ("晋中", "太谷区"),
+    "怀仁县": ("朔州", "怀仁市"),
+}
+
+# 省级功能区不属于任何县，但采购人大量以其名义发布，按所在地级市归属。
+SPECIAL_ZONES = {
+    "山西转型综合改革示范区": ("太原", "综改示范区"),
+    "综改示范区": ("太原", "综改示范区"),
+    "综改区": ("太原", "综改示范区"),
+}
+
+# 去掉“县/区/市”后仍是常用词或易与普通词混淆的地名，只接受带后缀的全称。
+_AMBIGUOUS_BARE_NAMES = {"小店", "上党", "交口", "柳林", "永和", "平定", "和顺", "长子"}
+# “城区”“矿区”“郊区”是通用词，必须紧跟所属城市名才算县区。
+_GENERIC_DISTRICTS = {"城区", "矿区", "郊区"}
+# 单字县名（如“兴县”“应县”）容易在“振兴县域”“对应县级”中误命中，要求前一个字是边界。
+_SHORT_NAME_PREFIX_ALLOWED = set("省市共")
+
+
+def _entries():
+    """Yield ``(surface, (city, district_or_None, short_name))`` for every known name."""
+    for city, districts in SHANXI_DIVISIONS.items():
+        city_name = f"{city}市"
+        yield city, (city_name, None, False)
+        yield city_name, (city_name, None, False)
+        for district in districts:
+            base = district[:-1]
+            if district in _GENERIC_DISTRICTS:
+                yield f"{city_name}{district}", (city_name, district, False)
+                yield f"{city}{district}", (city_name, district, False)
+                continue
+            yield district, (city_name, district, len(district) == 2)
+            if len(base) >= 2 and base not in _AMBIGUOUS_BARE_NAMES:
+                yield base, (city_name, district, False)
+    for surface, (city, district) in {**FORMER_NAMES, **SPECIAL_ZONES}.items():
+        yield surface, (f"{city}市", district, False)
+
+
+_AUTOMATON = None
+_AUTOMATON_LOCK = threading.Lock()
+
+
+def _automaton():
+    global _AUTOMATON
+    if _AUTOMATON is None:
+        with _AUTOMATON_LOCK:
+            if _AUTOMATON is None:
+                _AUTOMATON = PatternMatcher(list(_entries()))
+    return _AUTOMATON
+
+
+def scan_places(text):
+    """Return non-overlapping place hits in ``text`` (leftmost, then longest)."""
+    if not text:
+        return []
+    hits = []
+    for start, end, (city, district, short_name) in _automaton().iter_matches(text):
+        if short_name and start > 0:
+            previous = text[start - 1]
+            if "一" <= previous <= "龥" and previous not in _SHORT_NAME_PREFIX_ALLOWED \
+                    and not text[:start].endswith(city[:-1]):
+                continue
+        hits.append((start, end, city, district))
+    hits.sort(key=lambda hit: (hit[0], -(hit[1] - hit[0])))
+    selected = []
+    cursor = 0
+    for hit in hits:
+        if hit[0] >= cursor:
+            selected.append(hit)
+            cursor = hit[1]
+    return selected
+
+
+def _clean_field(value):
+    if value is None:
+        return ""
+    text = str(value)
+    return "" if text in {"未找到", "待采集", "nan", "None"} else text
+
+
+def resolve_region(location, title, purchaser, agency):
+    """Resolve ``(地区_市, 地区_县)`` from one scan of each field.
+
+    字段优先级沿用原规则：开标地点 > 标题与采购人 > 代理机构。县区所属城市由词典给出，
+    因此开标地点中识别到的县区同时决定城市；开标地点只给出城市时，标题、采购人或代理
+    机构中的县区必须属于该城市才采纳，冲突时保留开标地点的城市、县区留空。
+    """
+    fields = (
+        _clean_field(location),
+        f"{_clean_field(title)} {_clean_field(purchaser)}",
+        _clean_field(agency),
+    )
+    city = "未知市"
+    for rank, text in enumerate(fields):
+        hits = scan_places(text)
+        district_hit = next((hit for hit in hits if hit[3]), None)
+        if district_hit is not None:
+            if rank == 0 or city in ("未知市", district_hit[2]):
+                return district_hit[2], district_hit[3]
+            return city, ""
+        if hits and city == "未知市":
+            city = hits[0][2]
+    return city, ""
+
+
+def resolve_regions(records):
+    """Batch form of :func:`resolve_region` for dict records keyed like scraper items."""
+    return [
+        resolve_region(
+            record.get("开标地点", ""), record.get("标题", ""),
+            record.get("采购人名称", ""), record.get("代理机构", ""),
+        )
+        for record in records
+    ]
@@ -0,0 +1,197 @@
+"""采集日期持久化队列。
+
+Web 进程只负责入队，``scrape_worker.py --queue`` 子进程按入队顺序逐个领取并执行；
+同一日期在排队或执行中时重复请求会被合并，不再因已有采集任务而丢弃用户请求。
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+QUEUE_DB = os.getenv("SCRAPER_QUEUE_DB", os.path.join(PROJECT_DIR, "data", "scrape_queue.db"))
+# 排队上限只限制 queued 日期数；单日期最长 15 分钟，20 个日期已覆盖多人同时补采的场景。
+MAX_QUEUED_DATES = 20
+# 已结束记录只用于状态页展示最近结果，超过保留数量即清理。
+FINISHED_JOBS_KEEP = 200
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _connect():
+    os.makedirs(os.path.dirname(os.path.abspath(QUEUE_DB)), exist_ok=True)
+    conn = sqlite3.connect(QUEUE_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS scrape_jobs (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               target_date TEXT NOT NULL,
+               status TEXT NOT NULL DEFAULT 'queued',
+               scheduled INTEGER NOT NULL DEFAULT 0,
+               requests INTEGER NOT NULL DEFAULT 1,
+               result_json TEXT,
+               created_at TEXT NOT NULL,
+               started_at TEXT,
+               finished_at TEXT
+           )"""
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scrape_jobs_status ON scrape_jobs(status, id)"
+    )
+    return conn
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _job_to_dict(row):
+    return {
+        "id": row["id"],
+        "date": row["target_date"],
+        "status": row["status"],
+        "scheduled": bool(row["scheduled"]),
+        "requests": row["requests"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+
+
+def enqueue_dates(dates, scheduled=False):
+    """Enqueue ISO dates, coalescing with queued/running jobs of the same date.
+
+    Returns ``(added, coalesced)`` lists of ISO date strings. Raises
+    ``ValueError`` when the queue is full so callers can reject the request.
+    """
+    values = []
+    for value in dates:
+        iso = value.strftime("%Y-%m-%d") if hasattr(value, "strftime") else str(value)
+        if iso not in values:
+            values.append(iso)
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            added, coalesced = [], []
+            queued_count = conn.execute(
+                "SELECT COUNT(*) FROM scrape_jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+            for iso in values:
+                existing = conn.execute(
+                    "SELECT id FROM scrape_jobs WHERE target_date = ? AND status IN (?, ?) "
+                    "ORDER BY id LIMIT 1",
+                    (iso, *ACTIVE_STATUSES),
+                ).fetchone()
+                if existing:
+                    conn.execute(
+                        "UPDATE scrape_jobs SET requests = requests + 1, "
+                        "scheduled = MAX(scheduled, ?) WHERE id = ?",
+                        (1 if scheduled else 0, existing["id"]),
+                    )
+                    coalesced.append(iso)
+                    continue
+                if queued_count >= MAX_QUEUED_DATES:
+                    raise ValueError(f"采集队列已满（最多 {MAX_QUEUED_DATES} 个日期排队）")
+                conn.execute(
+                    "INSERT INTO scrape_jobs(target_date, scheduled, created_at) VALUES (?, ?, ?)",
+                    (iso, 1 if scheduled else 0, _now()),
+                )
+                queued_count += 1
+                added.append(iso)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return added, coalesced
+    finally:
+        conn.close()
+
+
+def claim_next_job():
+    """Mark the oldest queued job running and return it, or ``None`` when drained."""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM scrape_jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE scrape_jobs SET status = 'running', started_at = ? WHERE id = ?",
+                    (_now(), row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = _job_to_dict(row)
+        job["status"] = "running"
+        return job
+    finally:
+        conn.close()
+
+
+def finish_job(job_id, result):
+    status = (result or {}).get("status") or "failed"
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE scrape_jobs SET status = ?, result_json = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result or {}, ensure_ascii=False), _now(), job_id),
+        )
+        conn.execute(
+            "DELETE FROM scrape_jobs WHERE status NOT IN (?, ?) AND id NOT IN "
+            "(SELECT id FROM scrape_jobs WHERE status NOT IN (?, ?) ORDER BY id DESC LIMIT ?)",
+            (*ACTIVE_STATUSES, *ACTIVE_STATUSES, FINISHED_JOBS_KEEP),
+        )
+    finally:
+        conn.close()
+
+
+def requeue_interrupted_jobs():
+    """Return jobs left ``running`` by a crashed worker to the queue head.
+
+    Only call while holding the scraper process lock: no other drainer can then
+    own a running job.
+    """
+    conn = _connect()
+    try:
+        return conn.execute(
+            "UPDATE scrape_jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+        ).rowcount
+    finally:
+        conn.close()
+
+
+def pending_count():
+    conn = _connect()
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM scrape_jobs WHERE status = 'queued'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def list_jobs(limit=20):
+    """Active jobs in queue order followed by the most recent finished ones."""
+    conn = _connect()
+    try:
+        active = conn.execute(
+            "SELECT * FROM scrape_jobs WHERE status IN (?, ?) ORDER BY id",
+            ACTIVE_STATUSES,
+        ).fetchall()
+        finished = conn.execute(
+            "SELECT * FROM scrape_jobs WHERE status NOT IN (?, ?) ORDER BY id DESC LIMIT ?",
+            (*ACTIVE_STATUSES, max(0, limit - len(active))),
+        ).fetchall()
+        return [_job_to_dict(row) for row in active] + [_job_to_dict(row) for row in finished]
+    finally:
+        conn.close()
+
@@ -2,6 +2,7 @@ import datetime
 import json
 import sys
 
+import scrape_queue
 import scraper
 
 
@@ -12,7 +13,58 @@ def emit_event(payload):
     print(EVENT_PREFIX + json.dumps(payload, ensure_ascii=False), flush=True)
 
 
+def _chinese_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date().strftime("%Y年%m月%d日")
+
+
+def _run_date(chinese_date, index, total, extra=None):
+    emit_event({
+        "type": "date_start", "date": chinese_date,
+        "index": index, "total": total, **(extra or {}),
+    })
+    result = scraper.run_scraper_for_date(chinese_date)
+    emit_event({"type": "date_result", "date": chinese_date, "result": result, **(extra or {})})
+    return result
+
+
+def drain_queue():
+    """Run queued dates in enqueue order until the persisted queue is empty.
+
+    The caller holds the scraper process lock, so jobs still marked running
+    belong to a previous worker that died and are safe to requeue.
+    """
+    scrape_queue.requeue_interrupted_jobs()
+    failed = False
+    index = 0
+    try:
+        while True:
+            job = scrape_queue.claim_next_job()
+            if job is None:
+                break
+            index += 1
+            chinese_date = _chinese_date(job["date"])
+            try:
+                result = _run_date(
+                    chinese_date, index, index + scrape_queue.pending_count(),
+                    {"job_id": job["id"], "scheduled": job["scheduled"]},
+                )
+            except Exception as exc:
+                result = {"status": "failed", "total": 0, "file": None, "error": str(exc)}
+                emit_event({
+                    "type": "date_result", "date": chinese_date, "result": result,
+                    "job_id": job["id"], "scheduled": job["scheduled"],
+                })
+            scrape_queue.finish_job(job["id"], result)
+            if result.get("status") == "failed":
+                failed = True
+    finally:
+        scraper.release_model()
+    return 1 if failed else 0
+
+
 def main(date_args):
+    if date_args == ["--queue"]:
+        return drain_queue()
     if not date_args:
         print("未提供采集日期", file=sys.stderr, flush=True)
         return 2
@@ -20,14 +72,7 @@ def main(date_args):
     failed = False
     try:
         for index, value in enumerate(date_args, start=1):
-            day = datetime.datetime.strptime(value, "%Y-%m-%d").date()
-            chinese_date = day.strftime("%Y年%m月%d日")
-            emit_event({
-                "type": "date_start", "date": chinese_date,
-                "index": index, "total": len(date_args),
-            })
-            result = scraper.run_scraper_for_date(chinese_date)
-            emit_event({"type": "date_result", "date": chinese_date, "result": result})
+            result = _run_date(_chinese_date(value), index, len(date_args))
             if result.get("status") == "failed":
                 failed = True
     finally:
@@ -15,6 +15,10 @@ import uuid
 from urllib.parse import urljoin
 from openpyxl.styles import Alignment
 from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import multi_pattern
+import region_gazetteer
 
 
 BASE_URL = "http://search.ccgp.gov.cn/bxsearch"
@@ -23,6 +27,8 @@ REGION_ID = "14"
 DAYS_AGO = 90
 MAX_PAGES = 100  # 安全上限（自动分页会提前停止）
 MAX_RUN_SECONDS = 15 * 60
+# 搜索翻页最小间隔，降低触发 WAF 的概率；离线回放基准可置 0。
+SEARCH_REQUEST_INTERVAL = 1.5
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.getenv("SCRAPER_OUTPUT_DIR", os.path.join(PROJECT_DIR, "results"))
 DATA_DIR = os.path.join(PROJECT_DIR, "data")
@@ -30,11 +36,19 @@ DETAIL_CACHE_DB = os.getenv("SCRAPER_CACHE_DB", os.path.join(DATA_DIR, "scraper_
 DETAIL_CACHE_TTL_SECONDS = 6 * 60 * 60
 DETAIL_CACHE_MAX_ROWS = 10000
 DETAIL_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# 全进程共享一个连接池：搜索、详情线程和原公告回溯各用线程内 Session，
+# 但复用同一组 keep-alive 连接。
+# 详情线程 3 个 + 搜索 1 个，默认 8 留出重试余量；超出时临时连接用完即关。
+HTTP_POOL_SIZE = max(1, int(os.getenv("SCRAPER_HTTP_POOL_SIZE", "8")))
 REQUIRED_RESULT_COLUMNS = {
     "标题", "是否信息化", "语义匹配度", "开标具体时间", "开标地点", "链接"
 }
 
 _http_local = threading.local()
+_http_adapter = None
+_http_adapter_lock = threading.Lock()
+_http_stats = {"requests": 0, "new_connections": 0}
+_http_stats_lock = threading.Lock()
 _model_lock = threading.Lock()
 _cache_init_lock = threading.Lock()
 _cache_initialized = False
@@ -87,11 +101,68 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
 
+def _count_http(key):
+    with _http_stats_lock:
+        _http_stats[key] += 1
+
+
+def _http_stats_snapshot():
+    with _http_stats_lock:
+        return dict(_http_stats)
+
+
+def _http_stats_since(snapshot):
+    current = _http_stats_snapshot()
+    requests_sent = current["requests"] - snapshot["requests"]
+    new_connections = current["new_connections"] - snapshot["new_connections"]
+    return {
+        "requests": requests_sent,
+        "new_connections": new_connections,
+        "reused_connections": max(0, requests_sent - new_connections),
+        "pool_size": HTTP_POOL_SIZE,
+    }
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count_http("new_connections")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count_http("new_connections")
+        return super()._new_conn()
+
+
+class _PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count every new TCP connection for reuse metrics."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _shared_http_adapter():
+    global _http_adapter
+    with _http_adapter_lock:
+        if _http_adapter is None:
+            _http_adapter = _PooledHTTPAdapter(
+                pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=0
+            )
+        return _http_adapter
+
+
 def _get_http_session():
+    # Session 的 Cookie 等可变状态按线程隔离，只有线程安全的 urllib3 连接池在进程内共享；
+    # 每个日期新建的详情线程因此仍能直接复用已建立的长连接。
     session = getattr(_http_local, "session", None)
     if session is None:
         session = requests.Session()
-        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0)
+        adapter = _shared_http_adapter()
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         _http_local.session = session
@@ -260,6 +331,7 @@ def fetch_page(url, params=None, with_status=False):
     last_status = "network_error"
     for attempt in range(max_retries):
         try:
+            _count_http("requests")
             response = _get_http_session().get(
                 url, params=params, headers=headers, timeout=(10, 30)
             )
@@ -358,72 +430,7 @@ def extract_region(location, title, purchaser, agency):
     优先级：1. 开标地点 2. 标题/采购人/代理机构
     返回: (地区_市, 地区_县)
     """
-    cities = ['太原', '大同', '朔州', '忻州', '阳泉', '吕梁', '晋中', '长治', '晋城', '临汾', '运城']
-    
-    city_found = "未知市"
-    valid_location = location if location and location not in ["未找到", "待采集"] else ""
-    core_info = f"{title} {purchaser}"
-    full_text = f"{valid_location} {title} {purchaser} {agency}"
-    
-    # 策略 A：优先从开标/评标地点提取地级市（最准确）
-    if valid_location:
-        for city in cities:
-            if city in valid_location:
-                city_found = f"{city}市"
-                break
-                
-    # 策略 B：若地点无结果，再从核心信息（标题、采购人）识别
-    if city_found == "未知市":
-        for city in cities:
-            if city in core_info:
-                city_found = f"{city}市"
-                break
-                
-    # 策略 C：若前两者均无结果，从全文搜索
-    if city_found == "未知市":
-        for city in cities:
-            if city in full_text:
-                city_found = f"{city}市"
-                break
-            
-    # 提取县/区：同样分为三个优先级进行匹配：1. 地点 2. 核心信息 3. 代理机构
-    district_found = ""
-    blacklist = ['山西省', '中国', '中共', '共产党', '委员会', '办公室', '采购', '项目', '招标', '代理']
-    
-    def find_district(text):
-        if not text: return ""
-        potential_districts = re.findall(r"([\u4e00-\u9fa5]{2,6}(?:县|区))", text)
-        if not potential_districts:
-            potential_districts = re.findall(r"([\u4e00-\u9fa5]{2,6}市)", text)
-            
-        for d in potential_districts:
-            temp_d = d
-            is_major_city = any((temp_d == f"{c}市" or temp_d == c) for c in cities)
-            if is_major_city: continue
-            
-            temp_d = re.sub(r"^(?:山西省|山西|省)", "", temp_d)
-            for city in cities:
-                temp_d = temp_d.replace(city, "").replace("市", "")
-                
-            clean_match = re.search(r"([\u4e00-\u9fa5]{2,4})(县|区|市)?$", temp_d)
-            if clean_match:
-                base_name = clean_match.group(1)
-                suffix = clean_match.group(2) or ""
-                if suffix == "市": suffix = ""
-                
-                if not any(b in base_name for b in blacklist) and len(base_name) >= 2:
-                    return base_name + suffix
-        return ""
-
-    # 按优先级尝试提取县区
-    if valid_location:
-        district_found = find_district(valid_location)
-    if not district_found:
-        district_found = find_district(core_info)
-    if not district_found:
-        district_found = find_district(agency)
-
-    return city_found, district_found
+    return region_gazetteer.resolve_region(location, title, purchaser, agency)
 
 def extract_requirements(soup, text):
     """
@@ -864,6 +871,7 @@ def fetch_and_parse_details(item, deadline=None):
 
     html, fetch_status = fetch_page(url, with_status=True)
     if html:
+        parse_started = time.perf_counter()
         try:
             detail_data = parse_project_details(html)
         except Exception as exc:
@@ -873,6 +881,7 @@ def fetch_and_parse_details(item, deadline=None):
             return item
         item.update(detail_data)
         item["_detail_status"] = "ok"
+        item["_parse_seconds"] = time.perf_counter() - parse_started
         _cache_details(url, detail_data, html)
         
         # --- 更正公告回填逻辑 ---
@@ -1130,21 +1139,19 @@ def _has_strong_it_title_evidence(title):
     normalized = _normalize_classification_text(title)
     if not normalized:
         return False
-    if any(keyword in normalized for keyword in STRONG_IT_KEYWORDS):
+    if multi_pattern.contains_any(normalized, STRONG_IT_KEYWORDS):
         return True
     return any(pattern.search(normalized) for pattern in STRONG_IT_TITLE_PATTERNS)
 
 
 def _weak_it_title_signal_count(title):
     normalized = _normalize_classification_text(title)
-    return len({
-        keyword for keyword in WEAK_IT_TITLE_KEYWORDS if keyword in normalized
-    })
+    return len(multi_pattern.found_terms(normalized, WEAK_IT_TITLE_KEYWORDS))
 
 
 def _detail_it_signal_count(requirement):
     normalized = _normalize_classification_text(requirement)
-    return len({signal for signal in DETAIL_IT_SIGNALS if signal in normalized})
+    return len(multi_pattern.found_terms(normalized, DETAIL_IT_SIGNALS))
 
 
 def _should_review_with_details(title, title_score, requirement):
@@ -1267,7 +1274,9 @@ def run_scraper_for_date(target_date_str, callback=None):
         return {"status": "failed", "total": 0, "file": None, "error": message}
 
     log(f"开始采集日期: {target_date_str} (匹配格式: {date_variants})")
-    deadline = time.monotonic() + MAX_RUN_SECONDS
+    run_started = time.monotonic()
+    http_before = _http_stats_snapshot()
+    deadline = run_started + MAX_RUN_SECONDS
     start_time, end_time = get_date_range()
     raw_results = {}
     source_errors = []
@@ -1289,8 +1298,8 @@ def run_scraper_for_date(target_date_str, callback=None):
                         "metrics": {"raw_records": len(raw_results), "search_requests": search_requests},
                     }
                 elapsed = time.monotonic() - last_search_request
-                if search_requests and elapsed < 1.5:
-                    time.sleep(1.5 - elapsed)
+                if search_requests and elapsed < SEARCH_REQUEST_INTERVAL:
+                    time.sleep(SEARCH_REQUEST_INTERVAL - elapsed)
                 params = build_search_url(page, start_time, end_time, full_keyword)
                 html, fetch_status = fetch_page(BASE_URL, params=params, with_status=True)
                 search_requests += 1
@@ -1345,6 +1354,7 @@ def run_scraper_for_date(target_date_str, callback=None):
                 successful_keywords += 1
 
     log(f"共采集到 {len(raw_results)} 条原始记录。")
+    timings = {"search": time.monotonic() - run_started}
     if not raw_results:
         if source_errors:
             message = "；".join(source_errors[:3])
@@ -1373,10 +1383,14 @@ def run_scraper_for_date(target_date_str, callback=None):
 
     final_list = list(raw_results.values())
     log(f"正在对 {len(final_list)} 个项目进行深度采集...")
+    phase_started = time.monotonic()
     with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
         list(executor.map(lambda item: fetch_and_parse_details(item, deadline), final_list))
+    timings["detail"] = time.monotonic() - phase_started
+    timings["parse"] = sum(item.get("_parse_seconds", 0.0) for item in final_list)
 
     log("正在进行语义分析...")
+    phase_started = time.monotonic()
     try:
         classify_information_projects(final_list, model, anchor_embeddings)
     except Exception as exc:
@@ -1387,6 +1401,7 @@ def run_scraper_for_date(target_date_str, callback=None):
             "metrics": {"raw_records": len(raw_results), "search_requests": search_requests},
         }
 
+    timings["classification"] = time.monotonic() - phase_started
     detail_failures = 0
     cache_hits = 0
     for item in final_list:
@@ -1395,10 +1410,7 @@ def run_scraper_for_date(target_date_str, callback=None):
             cache_hits += 1
         elif status != "ok":
             detail_failures += 1
-        city, district = extract_region(
-            item.get("开标地点", ""), item.get("标题", ""),
-            item.get("采购人名称", ""), item.get("代理机构", "")
-        )
+    for item, (city, district) in zip(final_list, region_gazetteer.resolve_regions(final_list)):
         item["地区（市）"] = city
         item["地区（县）"] = district
 
@@ -1487,6 +1499,7 @@ def run_scraper_for_date(target_date_str, callback=None):
         return {"status": "failed", "total": len(final_list), "file": None, "error": message}
 
     log(f"保存成功: {filename}")
+    timings["total"] = time.monotonic() - run_started
     return {
         "status": result_status,
         "total": len(final_list),
@@ -1500,6 +1513,8 @@ def run_scraper_for_date(target_date_str, callback=None):
             "detail_failures": detail_failures,
             "cache_hits": cache_hits,
             "dropped_by_date_change": dropped_count,
+            "timings": {name: round(value, 4) for name, value in timings.items()},
+            "http": _http_stats_since(http_before),
         },
     }
 
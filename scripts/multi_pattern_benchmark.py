@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""多模式匹配基准：逐词 ``term in text`` 与 ``multi_pattern`` 单次扫描的对比。
+
+按 2,500 页投标文件的规模逐页查找规则材料词（与 ``_rule_text_anchor_pages`` 相同的词表
+来源），并逐页判断材料角色（``_page_material_role`` 的词表）。页文本默认由仓库内提示词
+模板和评审代码中的中文语句拼成，也可用 ``--text`` 指定一份真实解析文本（``[第N页]`` 分页）。
+两种写法的结果逐页比对，不一致时返回非零。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_RULE = {
+    "title": "信息安全管理体系认证证书",
+    "check_rule": "投标人须提供有效的信息安全管理体系认证证书复印件，以及近三年类似项目合同业绩证明材料并加盖公章",
+}
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def synthetic_pages(page_count: int, page_chars: int, seed: int) -> list[str]:
+    sources = [
+        REPO_ROOT / "dashboard" / "evaluation_workbench" / "prompt_templates.py",
+        REPO_ROOT / "dashboard" / "evaluation_workbench" / "worker.py",
+    ]
+    lines = []
+    for source in sources:
+        for line in source.read_text(encoding="utf-8").splitlines():
+            line = re.sub(r"[ -~]+", "", line)
+            if len(line) >= 8:
+                lines.append(line)
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(page_count):
+        parts: list[str] = []
+        while sum(map(len, parts)) < page_chars:
+            parts.append(rng.choice(lines))
+        pages.append("\n".join(parts)[:page_chars])
+    return pages
+
+
+def file_pages(path: Path, page_count: int) -> list[str]:
+    pages = [
+        page for page in re.split(r"\[第\d+页\]\n", path.read_text(encoding="utf-8", errors="ignore"))
+        if page.strip()
+    ]
+    if not pages:
+        raise SystemExit(f"{path} 中没有可用的页文本")
+    return [pages[index % len(pages)] for index in range(page_count)]
+
+
+def _timed(function) -> tuple[float, object]:
+    started = time.perf_counter()
+    value = function()
+    return round((time.perf_counter() - started) * 1000, 1), value
+
+
+def run_benchmark(pages: list[str]) -> dict:
+    import multi_pattern
+    from dashboard.evaluation_workbench import worker
+
+    terms = [term for term in worker._rule_material_terms(DEFAULT_RULE) if len(term) >= 4][:80]
+    compact = [re.sub(r"[\s\W_]+", "", page) for page in pages]
+    role_terms = [term.lower() for terms in worker._MATERIAL_ROLE_TERMS.values() for term in terms]
+    lowered = [page.lower() for page in pages]
+    multi_pattern.matcher(terms)  # 编译计入首次调用，这里单独预热以只比较扫描本身
+
+    cases = {
+        "material_terms": (
+            lambda: [{term for term in terms if term in text} for text in compact],
+            lambda: [multi_pattern.found_terms(text, terms) for text in compact],
+            len(terms),
+        ),
+        "material_roles": (
+            lambda: [{term for term in role_terms if term in text} for text in lowered],
+            lambda: [multi_pattern.found_terms(text, role_terms) for text in lowered],
+            len(role_terms),
+        ),
+    }
+    report = {"pages": len(pages), "chars": sum(map(len, pages)), "cases": {}}
+    for name, (naive, scanned, term_count) in cases.items():
+        naive_ms, expected = _timed(naive)
+        scan_ms, actual = _timed(scanned)
+        report["cases"][name] = {
+            "terms": term_count, "naive_ms": naive_ms, "matcher_ms": scan_ms,
+            "speedup": round(naive_ms / scan_ms, 2) if scan_ms else None,
+            "pages_with_hits": sum(1 for hits in expected if hits), "identical": expected == actual,
+        }
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="多模式匹配与逐词子串查找的耗时对比")
+    parser.add_argument("--pages", type=int, default=2500)
+    parser.add_argument("--page-chars", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--text", type=Path, help="真实解析文本（按 [第N页] 分页），页数不足时循环使用")
+    args = parser.parse_args()
+
+    pages = file_pages(args.text, args.pages) if args.text else synthetic_pages(args.pages, args.page_chars, args.seed)
+    report = run_benchmark(pages)
+    print(json.dumps(report, ensure_ascii=False, indent=1))
+    return 0 if all(case["identical"] for case in report["cases"].values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
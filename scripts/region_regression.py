@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""地区识别回归：从历史采集结果提取语料，或用语料核对当前 extract_region 的输出。"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_RESULTS_DIR = REPO_ROOT / "results"
+DEFAULT_CORPUS = REPO_ROOT / "tests" / "fixtures" / "region_corpus.json"
+INPUT_FIELDS = ("开标地点", "标题", "采购人名称", "代理机构")
+EXPECTED_FIELDS = ("地区（市）", "地区（县）")
+
+# 手工确认的回归样例；语料可被 export 覆盖，这里的样例始终参与核对。
+REGRESSION_CASES = (
+    # 开标地点已确定城市时，标题中其他城市的县区不得覆盖该城市。
+    {"开标地点": "大同市公共资源交易中心", "标题": "小店区某学校信息化采购", "采购人名称": "", "代理机构": "",
+     "地区（市）": "大同市", "地区（县）": ""},
+    {"开标地点": "太原市公共资源交易中心", "标题": "小店区某学校信息化采购", "采购人名称": "", "代理机构": "",
+     "地区（市）": "太原市", "地区（县）": "小店区"},
+)
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def _cell(value: object) -> str:
+    text = "" if value is None else str(value)
+    return "" if text.lower() == "nan" else text
+
+
+def export_corpus(results_dir: Path) -> list[dict]:
+    """Collect unique input/label rows from historical ``shanxi_informatization_*.xlsx`` files."""
+    import pandas as pd
+
+    rows: dict[tuple, dict] = {}
+    for path in sorted(glob.glob(str(results_dir / "shanxi_informatization_*.xlsx"))):
+        frame = pd.read_excel(path, sheet_name=0)
+        if any(field not in frame.columns for field in INPUT_FIELDS + EXPECTED_FIELDS):
+            continue
+        for record in frame.to_dict("records"):
+            row = {field: _cell(record.get(field)) for field in INPUT_FIELDS + EXPECTED_FIELDS}
+            rows.setdefault(tuple(row[field] for field in INPUT_FIELDS), row)
+    return list(rows.values())
+
+
+def check_corpus(corpus: list[dict]) -> dict:
+    import region_gazetteer
+
+    started = time.perf_counter()
+    resolved = region_gazetteer.resolve_regions(corpus)
+    elapsed = time.perf_counter() - started
+    mismatches = []
+    for row, (city, district) in zip(corpus, resolved):
+        if (city, district) != (row["地区（市）"], row["地区（县）"]):
+            mismatches.append({**row, "当前（市）": city, "当前（县）": district})
+    return {
+        "records": len(corpus),
+        "mismatches": mismatches,
+        "seconds": round(elapsed, 4),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="地区识别回归语料导出与核对")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="从历史结果文件导出语料（导出后须人工复核标签）")
+    export.add_argument("--results-dir", type=Path, default=DEFAULT_RESULTS_DIR)
+    export.add_argument("--output", type=Path, default=DEFAULT_CORPUS)
+    check = sub.add_parser("check", help="用语料核对当前识别结果")
+    check.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        corpus = export_corpus(args.results_dir)
+        args.output.write_text(
+            json.dumps(corpus, ensure_ascii=False, indent=1) + "\n", encoding="utf-8"
+        )
+        print(f"已导出 {len(corpus)} 条语料: {args.output}")
+        return 0
+
+    corpus = json.loads(args.corpus.read_text(encoding="utf-8")) + list(REGRESSION_CASES)
+    report = check_corpus(corpus)
+    for item in report["mismatches"]:
+        print(json.dumps(item, ensure_ascii=False))
+    print(f"{report['records']} 条语料，{len(report['mismatches'])} 条不一致，耗时 {report['seconds']}s")
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
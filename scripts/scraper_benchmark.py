@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""采集器离线基准：本地回放服务器 + run_scraper_for_date 计时。
+
+回放目录由 ``manifest.json`` 描述：搜索页按“关键词 -> 分页文件列表”、详情页按 URL
+路径映射到已录制的 HTML。``record`` 子命令在真实网络下运行一次采集并录制该目录；
+``run`` 子命令把 scraper 指向本地回放服务器（可注入延迟与 WAF 拦截页），输出请求速率、
+解析、语义分类与总耗时，用于离线验证采集性能改动。
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_FIXTURES = REPO_ROOT / "tests" / "fixtures" / "scraper_replay"
+ORIGIN_HOST = "http://www.ccgp.gov.cn"
+WAF_PAGE = "<html><body>您的访问过于频繁，请稍后再试</body></html>"
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+class ReplayServer:
+    """Serve recorded search/detail pages on localhost with optional latency and WAF hits."""
+
+    def __init__(self, fixtures_dir: Path, *, latency_ms: float = 0.0, waf_every: int = 0):
+        self.fixtures_dir = Path(fixtures_dir)
+        self.manifest = json.loads((self.fixtures_dir / "manifest.json").read_text(encoding="utf-8"))
+        self.latency = max(0.0, latency_ms) / 1000.0
+        self.waf_every = max(0, int(waf_every))
+        self.requests = 0
+        self.waf_responses = 0
+        self._lock = threading.Lock()
+        self._pages: dict[str, str] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _page(self, name: str) -> str:
+        if name not in self._pages:
+            html = (self.fixtures_dir / name).read_text(encoding="utf-8")
+            # 录制页中的详情链接指向真实站点，回放时改写到本地服务器。
+            self._pages[name] = html.replace(ORIGIN_HOST, self.base_url)
+        return self._pages[name]
+
+    def resolve(self, path: str, query: dict[str, list[str]]) -> tuple[int, str]:
+        with self._lock:
+            self.requests += 1
+            inject_waf = bool(self.waf_every) and self.requests % self.waf_every == 0
+            if inject_waf:
+                self.waf_responses += 1
+        if inject_waf:
+            return 200, WAF_PAGE
+        if path == "/bxsearch":
+            keyword = (query.get("kw") or [""])[0]
+            page_index = int((query.get("page_index") or ["1"])[0] or 1)
+            pages = self.manifest.get("search", {}).get(keyword, [])
+            if 1 <= page_index <= len(pages):
+                return 200, self._page(pages[page_index - 1])
+            return 200, self._page(self.manifest["empty_search"])
+        name = self.manifest.get("detail", {}).get(path)
+        if not name:
+            return 404, "not found"
+        return 200, self._page(name)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+                status, body = server.resolve(parts.path, parse_qs(parts.query))
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _stub_scores(model, texts, anchor_embeddings):
+    """Deterministic stand-in when ``model_data`` is unavailable; classification time is then not representative."""
+    return [0.6 if any(word in text for word in ("系统", "平台", "数据")) else 0.3 for text in texts]
+
+
+@contextlib.contextmanager
+def _scraper_environment(scraper, base_url: str, *, stub_model: bool, warm_cache: bool):
+    with tempfile.TemporaryDirectory() as temp_dir, contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(scraper, "BASE_URL", f"{base_url}/bxsearch"))
+        stack.enter_context(mock.patch.object(scraper, "OUTPUT_DIR", temp_dir))
+        stack.enter_context(mock.patch.object(scraper, "SEARCH_REQUEST_INTERVAL", 0))
+        if not warm_cache:
+            stack.enter_context(mock.patch.object(
+                scraper, "DETAIL_CACHE_DB", os.path.join(temp_dir, "scraper_cache.db")
+            ))
+            stack.enter_context(mock.patch.object(scraper, "_cache_initialized", False))
+        if stub_model:
+            stack.enter_context(mock.patch.object(scraper, "validate_semantic_runtime", return_value=object()))
+            stack.enter_context(mock.patch.object(scraper, "get_anchor_embeddings", return_value=None))
+            stack.enter_context(mock.patch.object(scraper, "_encode_semantic_scores", side_effect=_stub_scores))
+        yield
+
+
+def run_benchmark(fixtures_dir: Path, *, date: str | None = None, latency_ms: float = 0.0,
+                  waf_every: int = 0, stub_model: bool = True, warm_cache: bool = False) -> dict:
+    import scraper
+
+    with ReplayServer(fixtures_dir, latency_ms=latency_ms, waf_every=waf_every) as server:
+        target_date = date or server.manifest["date"]
+        with _scraper_environment(scraper, server.base_url, stub_model=stub_model, warm_cache=warm_cache), \
+             contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = scraper.run_scraper_for_date(target_date)
+            wall = time.perf_counter() - started
+        metrics = result.get("metrics", {})
+        timings = metrics.get("timings", {})
+        return {
+            "date": target_date,
+            "status": result.get("status"),
+            "records": result.get("total", 0),
+            "http_requests": server.requests,
+            "waf_responses": server.waf_responses,
+            "requests_per_second": round(server.requests / wall, 2) if wall else None,
+            "parse_seconds": timings.get("parse"),
+            "classification_seconds": timings.get("classification"),
+            "timings": timings,
+            "connections": metrics.get("http", {}),
+            "wall_seconds": round(wall, 4),
+            "stub_model": stub_model,
+        }
+
+
+def record_fixtures(date: str, output_dir: Path) -> dict:
+    """Run a live scrape for ``date`` and store every fetched page in replay format."""
+    import scraper
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {"date": date, "search": {}, "detail": {}, "empty_search": "search_empty.html"}
+    (output_dir / "search_empty.html").write_text(
+        "<html><body><div>没有找到相关数据</div></body></html>\n", encoding="utf-8"
+    )
+    original_fetch = scraper.fetch_page
+    lock = threading.Lock()
+
+    def recording_fetch(url, params=None, with_status=False):
+        response = original_fetch(url, params=params, with_status=True)
+        html = response[0]
+        if html:
+            with lock:
+                if params is not None:
+                    keyword, page_index = params.get("kw", ""), int(params.get("page_index", 1))
+                    pages = manifest["search"].setdefault(keyword, [])
+                    if len(pages) == page_index - 1:
+                        name = f"search_{len(manifest['search']):02d}_p{page_index}.html"
+                        (output_dir / name).write_text(html, encoding="utf-8")
+                        pages.append(name)
+                else:
+                    path = urlsplit(url).path
+                    name = f"detail_{len(manifest['detail']) + 1:04d}.html"
+                    (output_dir / name).write_text(html, encoding="utf-8")
+                    manifest["detail"].setdefault(path, name)
+        return response if with_status else html
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         mock.patch.object(scraper, "fetch_page", side_effect=recording_fetch), \
+         mock.patch.object(scraper, "OUTPUT_DIR", temp_dir), \
+         mock.patch.object(scraper, "DETAIL_CACHE_DB", os.path.join(temp_dir, "scraper_cache.db")), \
+         mock.patch.object(scraper, "_cache_initialized", False):
+        result = scraper.run_scraper_for_date(date)
+    (output_dir / "manifest.json").write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=1) + "\n", encoding="utf-8"
+    )
+    return {"status": result.get("status"), "search_pages": sum(map(len, manifest["search"].values())),
+            "detail_pages": len(manifest["detail"])}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="采集器离线回放基准")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="在本地回放服务器上运行 run_scraper_for_date 并计时")
+    run.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    run.add_argument("--date", help="采集日期，默认取 manifest 中的日期")
+    run.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的模拟网络延迟")
+    run.add_argument("--waf-every", type=int, default=0, help="每 N 个请求返回一次 WAF 拦截页")
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--real-model", action="store_true", help="使用本地 model_data 语义模型")
+    run.add_argument("--warm-cache", action="store_true", help="复用正式详情缓存库（测缓存命中路径）")
+    record = sub.add_parser("record", help="联网采集一次并录制回放目录")
+    record.add_argument("date")
+    record.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        print(json.dumps(record_fixtures(args.date, args.output), ensure_ascii=False))
+        return 0
+    for _ in range(max(1, args.repeat)):
+        report = run_benchmark(
+            args.fixtures, date=args.date, latency_ms=args.latency_ms, waf_every=args.waf_every,
+            stub_model=not args.real_model, warm_cache=args.warm_cache,
+        )
+        print(json.dumps(report, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
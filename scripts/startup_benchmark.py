@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Dashboard 进程启动基准：``python -X importtime`` 导入剖析。
+
+在独立子进程中导入 ``dashboard.app``（与 gunicorn worker 启动时相同），统计导入墙钟时间、
+最慢的顶层导入，并检查 ``DEFERRED_MODULES`` 中的重型依赖是否被提前加载。这些依赖只应在
+对应接口首次调用时导入；``--check`` 在它们回到启动路径或超过 ``--budget-ms`` 时返回非零。
+
+注意：导入 ``dashboard.app`` 会像正常启动一样初始化 data/ 下的数据库与锁文件。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MODULE = "dashboard.app"
+# 仅在对应接口首次调用时才应加载的重型模块（顶层包名）。
+DEFERRED_MODULES = (
+    "pandas",            # 开标记录查询、专家名单导入
+    "bs4",               # 采集器
+    "openpyxl",          # 采集结果写入
+    "fitz",              # 投标文件对比
+    "jieba",             # 知识库检索（加载词典约 0.7 秒）
+    "scraper",
+    "dashboard.utils.comparator",
+)
+
+# 必须用 import 语句：importlib.import_module 不计入 importtime 的层级，目标模块不会出现在报告里。
+_PROBE = (
+    "import {module}\n"
+    "import json, sys\n"
+    "sys.stdout.write('\\n__LOADED__' + json.dumps(sorted(sys.modules)) + '\\n')\n"
+)
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parse ``-X importtime`` output into ``{"module", "self_us", "cumulative_us", "depth"}`` rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头行
+        name = parts[2].rstrip()
+        stripped = name.lstrip(" ")
+        rows.append({
+            "module": stripped,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+            "depth": (len(name) - len(stripped) - 1) // 2,
+        })
+    return rows
+
+
+def _deferred_loaded(loaded: list[str]) -> list[str]:
+    names = set(loaded)
+    return [module for module in DEFERRED_MODULES if module in names]
+
+
+def profile_once(module: str = DEFAULT_MODULE) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.getenv("PYTHONPATH")])))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    marker = completed.stdout.rfind("__LOADED__")
+    if completed.returncode != 0 or marker < 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{completed.stderr[-2000:]}")
+    loaded = json.loads(completed.stdout[marker + len("__LOADED__"):].strip())
+    rows = parse_importtime(completed.stderr)
+    target = next((row for row in reversed(rows) if row["module"] == module), None)
+    return {
+        "import_ms": round(target["cumulative_us"] / 1000, 1) if target else None,
+        "rows": rows,
+        "deferred_loaded": _deferred_loaded(loaded),
+    }
+
+
+def run_benchmark(module: str = DEFAULT_MODULE, *, repeat: int = 3, top: int = 15) -> dict:
+    profile_once(module)  # 预热 __pycache__，排除首次编译开销
+    runs = [profile_once(module) for _ in range(max(1, repeat))]
+    last = runs[-1]
+    top_level = [row for row in last["rows"] if row["depth"] == 1]
+    top_level.sort(key=lambda row: row["cumulative_us"], reverse=True)
+    return {
+        "module": module,
+        "repeat": len(runs),
+        "import_ms_median": statistics.median(run["import_ms"] for run in runs if run["import_ms"] is not None),
+        "import_ms_runs": [run["import_ms"] for run in runs],
+        "slowest_imports": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_us"] / 1000, 1),
+             "self_ms": round(row["self_us"] / 1000, 1)}
+            for row in top_level[:top]
+        ],
+        "deferred_loaded": last["deferred_loaded"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Dashboard 启动导入耗时基准")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="输出最慢的前 N 个顶层导入")
+    parser.add_argument("--budget-ms", type=float, help="导入耗时中位数上限，配合 --check 使用")
+    parser.add_argument("--check", action="store_true", help="重型模块被提前加载或超出预算时返回 1")
+    parser.add_argument("--output", type=Path, help="同时把报告写入 JSON 文件")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.module, repeat=args.repeat, top=args.top)
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    if not args.check:
+        return 0
+    failures = []
+    if report["deferred_loaded"]:
+        failures.append(f"启动时提前加载了: {', '.join(report['deferred_loaded'])}")
+    if args.budget_ms is not None and report["import_ms_median"] > args.budget_ms:
+        failures.append(f"导入耗时 {report['import_ms_median']}ms 超出预算 {args.budget_ms}ms")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""用量汇总一致性核对：按调用台账重新聚合，与 ``ew_usage_rollups`` / ``ew_usage_project_rollups`` 逐项比对。
+
+默认只读；发现不一致时返回 1。``--repair`` 在同一事务内按台账重建两张汇总表。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DB = REPO_ROOT / "data" / "evaluation_workspace.db"
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def _connect(db_path: Path, writable: bool) -> sqlite3.Connection:
+    if not db_path.is_file():
+        raise FileNotFoundError(f"数据库不存在：{db_path}")
+    mode = "rw" if writable else "ro"
+    connection = sqlite3.connect(f"file:{db_path}?mode={mode}", uri=True, timeout=30)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def check(db_path: Path, repair: bool = False) -> dict:
+    from dashboard.evaluation_workbench.storage import rebuild_usage_rollups, usage_rollup_mismatches
+
+    connection = _connect(db_path, repair)
+    try:
+        mismatches = usage_rollup_mismatches(connection)
+        report = {"db": str(db_path), "mismatch_count": len(mismatches), "mismatches": mismatches[:50]}
+        if repair and mismatches:
+            with connection:
+                rebuild_usage_rollups(connection)
+            report["repaired"] = True
+            report["remaining_mismatch_count"] = len(usage_rollup_mismatches(connection))
+        return report
+    finally:
+        connection.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="核对用量汇总表与模型调用台账是否一致")
+    parser.add_argument("--db", default=str(DEFAULT_DB), help="evaluation_workspace.db 路径")
+    parser.add_argument("--repair", action="store_true", help="不一致时按台账重建汇总表")
+    args = parser.parse_args()
+
+    report = check(Path(args.db), repair=args.repair)
+    print(json.dumps(report, ensure_ascii=False, indent=1))
+    if report.get("repaired"):
+        return 0 if report["remaining_mismatch_count"] == 0 else 1
+    return 0 if report["mismatch_count"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,7 @@ import io
 import hashlib
 import json
 import os
+import random
 import re
 import shutil
 import tempfile
@@ -11,7 +12,7 @@ import unittest
 import uuid
 from decimal import Decimal
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import fitz
 from werkzeug.datastructures import FileStorage
@@ -19,11 +20,13 @@ from werkzeug.security import generate_password_hash
 
 from dashboard.blueprints import evaluation_workbench as evaluation_workbench_module
 from dashboard.blueprints.evaluation_workbench import create_worker_app, evaluation_workbench_bp
-from dashboard.evaluation_workbench import local_ocr_gateway, ocr_gateway, price_sheet, storage, worker
+from dashboard.evaluation_workbench import (
+    local_ocr_gateway, ocr_gateway, page_embeddings, parsed_text, price_sheet, storage, worker,
+)
 from dashboard.evaluation_workbench.collusion_signals import build_cross_bid_analysis
 from dashboard.evaluation_workbench.prompt_context import (
-    _anchors, build_rule_context, select_rule_chunk_evidence_map, select_rule_chunk_map, select_rule_chunks,
-    split_full_text_chunks,
+    _anchors, _text_index, build_rule_context, estimate_tokens, select_rule_chunk_evidence_map,
+    select_rule_chunk_map, select_rule_chunks, split_full_text_chunks,
 )
 from dashboard.evaluation_workbench.prompt_templates import PROMPT_TEMPLATES
 from dashboard.utils.comparator import CollusionDetector, MAX_PDF_PAGES
@@ -166,7 +169,12 @@ class EvaluationWorkbenchTests(unittest.TestCase):
             def __iter__(self):
                 return iter([FakePage()] * self.page_count)
 
-        with patch("dashboard.evaluation_workbench.worker.fitz.open", return_value=FakePdf()):
+            def __getitem__(self, index):
+                return FakePage()
+
+        # 页段提取在子进程中看不到 patch，这里固定为进程内执行。
+        with patch("dashboard.evaluation_workbench.worker.fitz.open", return_value=FakePdf()), \
+                patch("dashboard.evaluation_workbench.pdf_text.parse_worker_count", return_value=1):
             finished = self._run_next_task()
 
         self.assertEqual(finished["status"], "success")
@@ -325,6 +333,114 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(request_json.call_count, 1)
         sleep.assert_not_called()
 
+    def test_identical_model_request_reuses_cached_response_across_projects(self):
+        other_project = storage.create_project(self.app, "复用同一招标模板", "TEST-02")
+        first = storage.create_task(self.app, self.project["project_id"], "extract_rules")
+        second = storage.create_task(self.app, other_project["project_id"], "extract_rules")
+        profile = {"profile_id": "profile-1", "model_name": "m", "base_url": "https://api.example.com/v1/"}
+
+        with patch("dashboard.evaluation_workbench.worker.request_json", return_value={"rules": [1]}) as request_json:
+            worker._request_task_json(self.app, first, profile, "test_phase", "system", "user", max_tokens=32)
+            cached = worker._request_task_json(self.app, second, profile, "test_phase", "system", "user", max_tokens=32)
+            # 思考模式或提示词不同都是不同请求。
+            worker._request_task_json(self.app, second, profile, "test_phase", "system", "user", max_tokens=32,
+                                      thinking_mode="disabled")
+            worker._request_task_json(self.app, second, profile, "test_phase", "system", "user2", max_tokens=32)
+
+        self.assertEqual(cached, {"rules": [1]})
+        self.assertEqual(request_json.call_count, 3)
+        self.assertEqual(worker._task_performance_metrics(second).get("model_response_cache_hit_count"), 1)
+        with storage.connection(self.app) as conn:
+            calls = conn.execute("SELECT COUNT(*) FROM ew_model_calls").fetchone()[0]
+        self.assertEqual(calls, 3)
+
+    def test_model_response_cache_retries_refreshes_and_opt_out(self):
+        profile = {"profile_id": "profile-1", "model_name": "m", "base_url": "https://api.example.com/v1"}
+        seed = storage.create_task(self.app, self.project["project_id"], "extract_rules")
+        with patch("dashboard.evaluation_workbench.worker.request_json", return_value={"value": "旧"}):
+            worker._request_task_json(self.app, seed, profile, "p", "system", "user")
+
+        # 同一任务内的相同请求是调用方判定响应不合格后的重试：第二次必须真实请求并覆盖缓存。
+        retrying = storage.create_task(self.app, self.project["project_id"], "review_documents")
+        with patch("dashboard.evaluation_workbench.worker.request_json", return_value={"value": "新"}) as request_json:
+            first = worker._request_task_json(self.app, retrying, profile, "p", "system", "user")
+            retried = worker._request_task_json(self.app, retrying, profile, "p", "system", "user")
+        self.assertEqual((first, retried, request_json.call_count), ({"value": "旧"}, {"value": "新"}, 1))
+
+        opted_out = storage.create_task(self.app, self.project["project_id"], "score_objective",
+                                        {"model_response_cache": False})
+        other_project = storage.create_project(self.app, "另一项目", "TEST-02")
+        rerun = storage.create_task(self.app, other_project["project_id"], "evaluate_all", {"rerun_selected": True})
+        with patch("dashboard.evaluation_workbench.worker.request_json", return_value={"value": "实时"}) as request_json:
+            self.assertEqual(worker._request_task_json(self.app, opted_out, profile, "p", "system", "user"),
+                             {"value": "实时"})
+            self.assertEqual(worker._request_task_json(self.app, rerun, profile, "p", "system", "user"),
+                             {"value": "实时"})
+        self.assertEqual(request_json.call_count, 2)
+        probe = storage.create_task(self.app, other_project["project_id"], "score_subjective")
+        with patch("dashboard.evaluation_workbench.worker.request_json") as request_json:
+            self.assertEqual(worker._request_task_json(self.app, probe, profile, "p", "system", "user"),
+                             {"value": "实时"})
+        request_json.assert_not_called()
+
+    def test_model_response_cache_evicts_least_recently_used_entries(self):
+        entry = {"text": "x" * 400}
+        with patch.object(storage, "MODEL_RESPONSE_CACHE_MB", 1):
+            for index in range(3):
+                storage.save_model_response_cache(self.app, f"key-{index}", entry, model_name="m", base_url="u")
+            with storage.connection(self.app) as conn:
+                conn.execute("UPDATE ew_model_response_cache SET last_used_at='2000-01-01T00:00:00Z' WHERE cache_key<>'key-0'")
+            self.assertIsNotNone(storage.get_model_response_cache(self.app, "key-0"))
+            with storage.connection(self.app) as conn:
+                conn.execute("UPDATE ew_model_response_cache SET size_bytes=400000")
+            storage.save_model_response_cache(self.app, "key-3", entry, model_name="m", base_url="u")
+            with storage.connection(self.app) as conn:
+                remaining = sorted(row[0] for row in conn.execute("SELECT cache_key FROM ew_model_response_cache"))
+
+        # 超出 1 MB 后只淘汰到回到上限内：最早写入但刚被命中的 key-0 保留，最久未用的 key-1 被删。
+        self.assertEqual(remaining, ["key-0", "key-2", "key-3"])
+
+    def test_connection_is_reused_per_thread_and_rolled_back_on_error(self):
+        with storage.connection(self.app) as first:
+            with storage.connection(self.app) as nested:
+                self.assertIsNot(nested, first)
+        with storage.connection(self.app) as second:
+            self.assertIs(second, first)
+        with self.assertRaises(RuntimeError):
+            with storage.connection(self.app) as conn:
+                conn.execute("UPDATE ew_projects SET name='未提交' WHERE project_id=?", (self.project["project_id"],))
+                raise RuntimeError("中途失败")
+        other = []
+        thread = threading.Thread(target=lambda: other.append(storage.get_project(self.app, self.project["project_id"])))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(other[0]["name"], "评标测试项目")
+        with storage.connection(self.app) as conn:
+            self.assertIs(conn, first)
+
+    def test_progress_updates_are_coalesced_and_never_overwrite_finished_task(self):
+        task = storage.create_task(self.app, self.project["project_id"], "evaluate_all")
+        storage.claim_queued_task(self.app, task["task_id"])
+
+        def stored_message():
+            with storage.connection(self.app) as conn:
+                return conn.execute("SELECT message FROM ew_tasks WHERE task_id=?", (task["task_id"],)).fetchone()[0]
+
+        with patch.object(storage, "PROGRESS_FLUSH_MS", 60_000):
+            storage.update_task(self.app, task["task_id"], progress=10, message="第一步")
+            storage.update_task(self.app, task["task_id"], progress=20, message="第二步")
+            storage.update_task(self.app, task["task_id"], progress=30, message="第三步")
+            self.assertEqual(stored_message(), "第一步")
+            self.assertEqual(storage.get_task(self.app, task["task_id"])["message"], "第三步")
+
+            storage.update_task(self.app, task["task_id"], progress=40, message="第四步")
+            storage.finalize_task(self.app, task["task_id"], status="success", progress=100, message="完成")
+            storage.flush_task_progress(self.app)
+
+        finished = storage.get_task(self.app, task["task_id"])
+        self.assertEqual((finished["progress"], finished["message"]), (100, "完成"))
+
     def test_score_rule_dedupe_merges_same_clause_with_score_suffix(self):
         rules = worker._dedupe_rule_candidates([
             {
@@ -470,6 +586,40 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(results[0]["status"], "manual")
         self.assertIn("内容安全策略", results[0]["reason"])
 
+    def test_streamed_results_survive_later_group_failure_and_are_not_rerun(self):
+        self._add_pdf("bid.pdf", "bid", "甲公司", "投标文件包含承诺事项与售后服务。")
+        storage.create_task(self.app, self.project["project_id"], "parse_documents")
+        self._run_next_task()
+        rules = [
+            storage.add_rule(self.app, self.project["project_id"], {
+                "category": "qualification", "title": title, "source_text": title,
+            })
+            for title in ("承诺事项", "售后服务")
+        ]
+        storage.confirm_rule_set(self.app, self.project["project_id"])
+        storage.create_task(self.app, self.project["project_id"], "evaluate_all")
+        error = worker.ModelResponseEnvelopeError(
+            "模型接口因内容安全限制未返回可用正文", retryable=False, failure_kind="content_filtered",
+        )
+
+        def respond(profile, system_prompt, prompt, **kwargs):
+            if kwargs.get("item_callback"):
+                kwargs["item_callback"]({
+                    "rule_id": rules[0]["rule_id"], "status": "satisfied", "evidence": "第1页：承诺事项",
+                    "reason": "已提供承诺", "risk_level": "low", "confidence": "high", "evidence_quality": "sufficient",
+                })
+            raise error
+
+        with patch("dashboard.evaluation_workbench.worker.request_json", side_effect=respond):
+            finished = self._run_next_task()
+
+        _, results = storage.latest_review_results(self.app, self.project["project_id"])
+        by_rule = {item["rule_id"]: item for item in results}
+        self.assertEqual(finished["result"]["completion_state"], "partial_success")
+        self.assertEqual(finished["result"]["failed_units"][0]["rule_ids"], [rules[1]["rule_id"]])
+        self.assertEqual(by_rule[rules[0]["rule_id"]]["status"], "satisfied")
+        self.assertEqual(by_rule[rules[1]["rule_id"]]["status"], "manual")
+
     def test_full_scan_checkpoint_is_reusable_by_chunk_hash(self):
         document = self._add_pdf("bid.pdf", "bid", "甲公司", "技术方案：稳定运行。")
         findings = [{"rule_id": "rule-1", "chunk_id": "chunk_1", "evidence": "技术方案", "page_hint": "1"}]
@@ -548,6 +698,47 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(usage["cache_by_phase"][0]["phase"], "test")
         self.assertEqual(usage["cache_by_phase"][0]["cache_hit_tokens"], 80)
 
+    def test_usage_rollups_track_ledger_and_can_be_checked_and_rebuilt(self):
+        task = storage.create_task(self.app, self.project["project_id"], "evaluate_all")
+        project_id = self.project["project_id"]
+        storage.record_model_call(self.app, task["task_id"], project_id, "evaluate_all_review_batch", "p1",
+                                  input_chars=300, usage={"prompt_tokens": 90, "completion_tokens": 10, "cached_tokens": 30})
+        storage.record_model_call(self.app, task["task_id"], project_id, "evaluate_all_review_batch", "p1",
+                                  input_chars=200, usage={"total_tokens": 50})
+        storage.record_model_call(self.app, task["task_id"], project_id, "evaluate_all_review_vision_1", None,
+                                  context_mode="Vision_standard_1")
+        storage.update_task(self.app, task["task_id"], status="success")
+        expected = storage.project_token_usage(self.app, project_id)
+        latest = storage.latest_evaluation_run_usage(self.app, project_id)
+
+        with storage.connection(self.app) as conn:
+            clean = storage.usage_rollup_mismatches(conn)
+            conn.execute("UPDATE ew_usage_project_rollups SET total_tokens = total_tokens + 7")
+            conn.execute("DELETE FROM ew_usage_rollups WHERE family='vision'")
+            broken = storage.usage_rollup_mismatches(conn)
+            storage.rebuild_usage_rollups(conn)
+            repaired = storage.usage_rollup_mismatches(conn)
+            conn.execute("DELETE FROM ew_usage_rollups")
+            conn.execute("DELETE FROM ew_usage_project_rollups")
+        self.app.extensions.pop("evaluation_workbench_database", None)
+        storage.init_database(self.app)
+
+        self.assertEqual(clean, [])
+        self.assertEqual(
+            sorted({(item["table"], item["key"]["family"]) for item in broken}),
+            [("ew_usage_project_rollups", "text"), ("ew_usage_project_rollups", "vision"), ("ew_usage_rollups", "vision")],
+        )
+        self.assertEqual(repaired, [])
+        self.assertEqual(
+            {key: expected[key] for key in ("call_count", "input_chars", "prompt_tokens", "total_tokens", "cache_hit_tokens", "metered_calls")},
+            {"call_count": 3, "input_chars": 500, "prompt_tokens": 90, "total_tokens": 150, "cache_hit_tokens": 30, "metered_calls": 2},
+        )
+        self.assertEqual(expected["families"]["vision"]["call_count"], 1)
+        self.assertEqual(expected["cache_by_phase"][0]["call_count"], 1)
+        self.assertEqual((latest["call_count"], latest["total_tokens"]), (3, 150))
+        # 旧库升级：汇总表为空时初始化按台账补建，面板数值不变。
+        self.assertEqual(storage.project_token_usage(self.app, project_id), expected)
+
     def test_token_usage_breaks_down_vision_and_ocr_families(self):
         task = storage.create_task(self.app, self.project["project_id"], "evaluate_all")
         storage.record_model_call(self.app, task["task_id"], self.project["project_id"], "evaluate_all_review_batch", None,
@@ -1021,6 +1212,121 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(direct["level"], "high")
         self.assertIn("另有线索", direct["basis"])
 
+    def test_parse_task_extracts_page_ranges_in_process_pool(self):
+        from dashboard.evaluation_workbench import pdf_text
+
+        def add_pages(filename, bidder_name, texts):
+            pdf = fitz.open()
+            for text in texts:
+                pdf.new_page().insert_text((72, 72), text)
+            content = pdf.tobytes()
+            pdf.close()
+            return storage.store_upload(
+                self.app, self.project["project_id"], "bid", bidder_name,
+                FileStorage(stream=io.BytesIO(content), filename=filename),
+            )
+
+        long_bid = add_pages("long.pdf", "Long Co", [f"Page body {index}" for index in range(1, 8)])
+        oversized = add_pages("oversized.pdf", "Big Co", ["\n".join(["x" * 60] * 12)] * 3)
+        storage.create_task(self.app, self.project["project_id"], "parse_documents")
+
+        with patch.object(pdf_text, "PAGE_RANGE_SIZE", 2), patch.object(pdf_text, "parse_worker_count", return_value=2), \
+                patch.object(worker, "MAX_PARSED_CHARS", 2_000):
+            finished = self._run_next_task()
+
+        # 单个文件超出字符上限只让该文件失败，不影响其他文件的并行页段结果。
+        self.assertEqual(finished["status"], "error")
+        self.assertIn("oversized.pdf", finished["error"])
+        documents = {item["document_id"]: item for item in storage.list_documents(self.app, self.project["project_id"])}
+        self.assertEqual(documents[oversized["document_id"]]["parse_status"], "error")
+        parsed = documents[long_bid["document_id"]]
+        self.assertEqual(parsed["parse_status"], "success")
+        self.assertEqual(parsed["page_count"], 7)
+        text = Path(parsed["parsed_path"]).read_text(encoding="utf-8")
+        with fitz.open(storage.document_path(self.app, parsed)) as pdf:
+            expected = "\n\n".join(
+                f"[第{number}页]\n{page.get_text('text', sort=True)}" for number, page in enumerate(pdf, start=1)
+            )
+        self.assertEqual(text, expected)
+        self.assertEqual(parsed["text_length"], len(expected))
+        self.assertEqual(list(Path(parsed["parsed_path"]).parent.glob("*.partial")), [])
+        # 解析时同步写出页偏移索引，按页随机读取与整份文本逐字一致。
+        self.assertTrue(parsed_text.index_path(parsed["parsed_path"]).is_file())
+        document = parsed_text.ParsedText(parsed["parsed_path"])
+        self.assertEqual(document.page_numbers, list(range(1, 8)))
+        self.assertEqual(
+            "\n\n".join(f"[第{page}页]\n{value}" for page, value in document.read_pages().items()), expected,
+        )
+        self.assertIn("Page body 4", document.read_page(4))
+        self.assertEqual(list(document.read_pages(3, 5)), [3, 4, 5])
+
+    def test_page_render_pool_matches_in_process_and_predicts_oversized_scale(self):
+        from dashboard.evaluation_workbench import page_render
+
+        pdf = fitz.open()
+        for index in range(3):
+            pdf.new_page().insert_text((72, 72), f"Certificate {index}")
+        # 噪点图压缩率极低，用于模拟超出体积上限的扫描图纸。
+        noise = fitz.Pixmap(fitz.csRGB, 600, 600, random.Random(5).randbytes(600 * 600 * 3), False)
+        pdf.new_page(width=1190, height=842).insert_image(fitz.Rect(0, 0, 1190, 842), pixmap=noise)
+        path = self.temp_dir / "render-pool.pdf"
+        pdf.save(path)
+        pdf.close()
+        requests = [(page, 1.5, 82) for page in range(1, 5)]
+        options = {"byte_limit": 400_000, "max_pixels": worker._VISION_MAX_PIXELS_PER_PAGE,
+                   "fallback": worker._VISION_RENDER_FALLBACK}
+
+        encoded = []
+        original_encode = page_render._encode
+
+        def counting_encode(page, scale, quality):
+            encoded.append(page.number + 1)
+            return original_encode(page, scale, quality)
+
+        with patch.object(page_render, "render_worker_count", return_value=1), \
+                patch.object(page_render, "_encode", side_effect=counting_encode):
+            serial = page_render.render_batch(str(path), requests, **options)
+        try:
+            with patch.object(page_render, "render_worker_count", return_value=2):
+                pooled = page_render.render_batch(str(path), requests, **options)
+        finally:
+            page_render.shutdown_render_pool()
+
+        # 其他线程已关闭进程池时回到进程内串行，结果不变。
+        closed_pool = page_render.ProcessPoolExecutor(max_workers=1)
+        closed_pool.shutdown()
+        with patch.object(page_render, "render_worker_count", return_value=2), \
+                patch.object(page_render, "_render_pool", return_value=closed_pool):
+            after_shutdown = page_render.render_batch(str(path), requests, **options)
+
+        self.assertEqual(pooled, serial)
+        self.assertEqual(after_shutdown, serial)
+        self.assertEqual([serial[page][1] for page in range(1, 5)], [False, False, False, True])
+        self.assertLessEqual(len(serial[4][0]), options["byte_limit"])
+        # 超大页按试渲染预测比例：一次低清试渲染加一次正式编码，不再逐级重试。
+        self.assertEqual(encoded.count(4), 2)
+        with self.assertRaises(IndexError):
+            page_render.render_pages(str(path), [(0, 1.0, 80)], **options)
+
+    def test_parsed_text_indexes_legacy_files_and_rebuilds_stale_index(self):
+        path = self.temp_dir / "legacy.txt"
+        path.write_text("[第1页]\n第一页\n报价：100元\n\n[第3页]\n第三页正文\n", encoding="utf-8")
+
+        document = parsed_text.ParsedText(path)
+
+        self.assertEqual(document.read_pages(), {1: "第一页\n报价：100元", 3: "第三页正文\n"})
+        self.assertEqual(document.page_chars(), {1: 11, 3: 6})
+        self.assertEqual(list(document.iter_lines())[:2], [("第一页", 1), ("报价：100元", 1)])
+        self.assertTrue(parsed_text.index_path(path).is_file())
+
+        path.write_text("[第1页]\n改写后的第一页\n\n[第2页]\n第二页", encoding="utf-8")
+        self.assertEqual(parsed_text.ParsedText(path).read_pages(2, 2), {2: "第二页"})
+
+        path.write_text("无页码的 DOCX 文本\n第二行", encoding="utf-8")
+        document = parsed_text.ParsedText(path)
+        self.assertEqual(document.page_numbers, [])
+        self.assertEqual(list(document.iter_lines()), [("无页码的 DOCX 文本", None), ("第二行", None)])
+
     def test_parse_task_reuses_successful_parse_cache(self):
         self._add_pdf("bid.pdf", "bid", "甲公司", "技术方案：稳定运行。")
         storage.create_task(self.app, self.project["project_id"], "parse_documents")
@@ -1051,6 +1357,52 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         popen.assert_not_called()
 
+    def test_project_polling_uses_change_sequence_etag_and_incremental_tasks(self):
+        client = self.app.test_client()
+        base = f"/api/evaluation-workbench/projects/{self.project['project_id']}"
+        first = storage.create_task(self.app, self.project["project_id"], "parse_documents")
+        with patch("dashboard.blueprints.evaluation_workbench.subprocess.Popen"):
+            loaded = client.get(base)
+            unchanged = client.get(base, headers={"If-None-Match": loaded.headers["ETag"]})
+            # 测试客户端相当于同步 worker：不挂起请求，前端据 long_poll=false 改为短轮询。
+            started = time.monotonic()
+            idle = client.get(f"{base}/changes?since={loaded.json['change_token']}&wait=20").json
+            idle_seconds = time.monotonic() - started
+            cursor = client.get(f"{base}/tasks?since=0").json["change_seq"]
+
+            storage.update_task(self.app, first["task_id"], status="error", error="解析失败")
+            second = storage.create_task(self.app, self.project["project_id"], "compare_documents")
+            changed = client.get(base, headers={"If-None-Match": loaded.headers["ETag"]})
+            event = client.get(f"{base}/changes?since={loaded.json['change_token']}&wait=5").json
+            increment = client.get(f"{base}/tasks?since={cursor}").json
+            latest = client.get(f"{base}/tasks?since={increment['change_seq']}").json
+            with patch.object(storage, "TASK_LIST_LIMIT", 1):
+                first_page = client.get(f"{base}/tasks?since={cursor}").json
+                second_page = client.get(f"{base}/tasks?since={first_page['change_seq']}").json
+            with patch.dict(os.environ, {"EVALUATION_WORKBENCH_LONG_POLL": "1"}):
+                forced = client.get(f"{base}/changes?since={changed.json['change_token']}&wait=0").json
+
+        self.assertEqual(loaded.status_code, 200)
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertFalse(idle["changed"])
+        self.assertFalse(idle["long_poll"])
+        self.assertLess(idle_seconds, 2)
+        self.assertTrue(forced["long_poll"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], loaded.headers["ETag"])
+        self.assertEqual((event["changed"], event["change_token"]), (True, changed.json["change_token"]))
+        self.assertEqual(
+            sorted(task["task_id"] for task in increment["tasks"]),
+            sorted([first["task_id"], second["task_id"]]),
+        )
+        self.assertEqual(latest["tasks"], [])
+        # 超过单次上限时游标只推进到已返回的任务，较早变更的任务不会被跳过。
+        self.assertEqual(
+            [task["task_id"] for task in first_page["tasks"] + second_page["tasks"]],
+            [first["task_id"], second["task_id"]],
+        )
+        self.assertEqual(first_page["change_seq"], first_page["tasks"][0]["change_seq"])
+
     def test_worker_log_is_bounded_to_current_file_and_one_backup(self):
         log_path = storage.data_dir(self.app) / "worker.log"
         log_path.write_bytes(b"x" * (2 * 1024 * 1024))
@@ -1101,6 +1453,40 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertIn("cross_bid_analysis", finished["result"])
         self.assertEqual(finished["result"]["cross_bid_analysis"]["statutory_collusion_condition"], "not_assessed")
 
+    def test_compare_reuses_unchanged_pairs_after_a_bid_is_added(self):
+        self._add_pdf("tender.pdf", "tender", "", "采购需求：稳定运行。")
+        self._add_cjk_pdf("bid-a.pdf", "bid", "甲公司", "联系人：张三 电话 13800138000 邮箱 zhangsan@example.com")
+        self._add_cjk_pdf("bid-b.pdf", "bid", "乙公司", "联系人：张三 电话 13800138000 邮箱 zhangsan@example.com")
+        storage.create_task(self.app, self.project["project_id"], "compare_documents")
+        first = self._run_next_task()
+        self._add_cjk_pdf("bid-c.pdf", "bid", "丙公司", "技术方案：分期实施，驻场维护。")
+        task = storage.create_task(self.app, self.project["project_id"], "compare_documents")
+
+        with patch.object(worker.CollusionDetector, "find_collisions", autospec=True,
+                          side_effect=worker.CollusionDetector.find_collisions) as compute:
+            second = self._run_next_task()
+
+        self.assertEqual(second["status"], "success")
+        self.assertEqual(second["result"]["pair_count"], 3)
+        self.assertEqual(second["result"]["reused_pair_count"], 1)
+        self.assertEqual(compute.call_count, 2)
+        self.assertEqual(len(storage.list_compare_pairs(self.app, task["task_id"])), 3)
+        reused_summary, original_summary = (
+            next(item for item in run["result"]["cross_bid_analysis"]["pair_summaries"]
+                 if (item["bidder_a"], item["bidder_b"]) == ("甲公司", "乙公司"))
+            for run in (second, first)
+        )
+        self.assertEqual(reused_summary["dimensions"], original_summary["dimensions"])
+        original_pair = storage.list_compare_pairs(self.app, first["task_id"])[0]
+        reused_pair = next(
+            item["result"] for item in storage.list_compare_pairs(self.app, task["task_id"])
+            if (item["document_a_id"], item["document_b_id"]) == (original_pair["document_a_id"], original_pair["document_b_id"])
+        )
+        original_pair = original_pair["result"]
+        self.assertEqual(reused_pair, original_pair)
+        self.assertEqual(reused_pair["summary"]["entity"], 3)
+        self.assertEqual(reused_summary["text_coverage"], original_summary["text_coverage"])
+
     def test_cross_bid_analysis_separates_dimensions_and_never_auto_determines_collusion(self):
         left = {"document_id": "a", "bidder_name": "甲公司", "original_name": "a.pdf"}
         right = {"document_id": "b", "bidder_name": "乙公司", "original_name": "b.pdf"}
@@ -3202,6 +3588,11 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(values[0]["text"], "证书编号 A123")
         local_pages.assert_called_once()
 
+    @staticmethod
+    def _ocr_pixels(image_hash: str) -> dict:
+        return {"samples": bytes(2 * 2 * 3), "width": 2, "height": 2, "dpi": (96, 96), "quality": 80,
+                "image_hash": image_hash}
+
     def test_local_ocr_page_cache_avoids_starting_a_subprocess_again(self):
         document = self._add_pdf("bid.pdf", "bid", "甲公司", "扫描件候选页")
         rendered = worker._render_ocr_page(self.app, document, 1, "fast")
@@ -3217,6 +3608,34 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(values[0]["text"], "本地缓存文字")
         local_process.assert_not_called()
 
+    def test_ocr_page_cache_hit_skips_rendering_until_render_profile_changes(self):
+        document = self._add_pdf("bid.pdf", "bid", "甲公司", "扫描件候选页")
+        image_hash = worker._render_ocr_pixels(self.app, document, 1, "fast")["image_hash"]
+        storage.save_ocr_page_cache(self.app, document["document_id"], 1, image_hash, local_ocr_gateway.LOCAL_OCR_SERVICE, {
+            "service": local_ocr_gateway.LOCAL_OCR_SERVICE, "text": "本地缓存文字", "parser_version": local_ocr_gateway.LOCAL_OCR_PARSER_VERSION,
+        })
+        task = {}
+
+        with patch("dashboard.evaluation_workbench.worker.fitz.open") as open_pdf, \
+             patch("dashboard.evaluation_workbench.worker.request_local_ocr") as local_process:
+            values, _ = worker._local_ocr_page_texts(self.app, document, [1], task=task)
+
+        # 文件 sha256 + 页码 + 渲染档位命中：既不打开 PDF，也不启动 OCR。
+        self.assertEqual(values[0]["text"], "本地缓存文字")
+        open_pdf.assert_not_called()
+        local_process.assert_not_called()
+        self.assertEqual(worker._task_performance_metrics(task)["ocr_render_skipped_count"], 1)
+
+        with patch.object(worker, "OCR_RENDER_PROFILE_VERSION", worker.OCR_RENDER_PROFILE_VERSION + 1), \
+             patch("dashboard.evaluation_workbench.worker._render_ocr_pixels", wraps=worker._render_ocr_pixels) as render, \
+             patch("dashboard.evaluation_workbench.worker.request_local_ocr") as local_process:
+            values, _ = worker._local_ocr_page_texts(self.app, document, [1])
+
+        # 渲染档位变化后回到渲染 + 图片哈希核对；图片未变时仍复用原缓存。
+        render.assert_called_once()
+        local_process.assert_not_called()
+        self.assertEqual(values[0]["text"], "本地缓存文字")
+
     def test_local_ocr_gateway_converts_subprocess_result_without_importing_rapidocr(self):
         with tempfile.TemporaryDirectory(prefix="local_ocr_test_") as folder:
             image_path = Path(folder) / "page.jpg"
@@ -3378,9 +3797,38 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(metrics["ocr_render_seconds_count"], 1)
         self.assertEqual(metrics["ocr_render_cache_hit_count"], 1)
 
+    def test_page_renders_are_shared_on_disk_across_tasks_vision_and_ocr(self):
+        document = self._add_pdf("render-cache.pdf", "bid", "甲公司", "Certificate page")
+        first_task, second_task = {}, {}
+        rendered = worker._render_vision_images(self.app, document, [1], "high", task=first_task)
+        with patch("dashboard.evaluation_workbench.worker.fitz.open") as open_pdf:
+            reused = worker._render_vision_images(self.app, document, [1], "high", task=second_task)
+            # 高强度图片档位与 OCR 精确档位同为 2.0 倍、质量 88，同一页图直接复用。
+            ocr_content, _ = worker._render_ocr_page(self.app, document, 1, "accurate", task=second_task)
+
+        open_pdf.assert_not_called()
+        self.assertEqual(reused[0]["image_bytes"], rendered[0]["image_bytes"])
+        self.assertEqual(ocr_content, rendered[0]["image_bytes"])
+        self.assertEqual(worker._task_performance_metrics(first_task)["page_render_disk_cache_miss_count"], 1)
+        self.assertEqual(worker._task_performance_metrics(second_task)["page_render_disk_cache_hit_count"], 2)
+
+        with patch.object(storage, "PAGE_RENDER_CACHE_MB", 1):
+            for page_number in (2, 3):
+                storage.save_page_render_cache(
+                    self.app, document["sha256"], page_number, 1.0, 80, "test", b"x" * 600_000,
+                )
+            with storage.connection(self.app) as conn:
+                remaining = [row["page_number"] for row in conn.execute(
+                    "SELECT page_number FROM ew_page_render_cache WHERE renderer='test'"
+                ).fetchall()]
+                files = sum(1 for path in storage.page_render_cache_dir(self.app).rglob("*.jpg"))
+        # 超出上限时按最近使用时间淘汰，索引与文件一并删除。
+        self.assertEqual(remaining, [3])
+        self.assertEqual(files, 1)
+
     def test_local_ocr_caches_empty_page_and_reports_failed_page(self):
         document = self._add_pdf("bid.pdf", "bid", "甲公司", "扫描件候选页")
-        with patch("dashboard.evaluation_workbench.worker._render_ocr_page", return_value=(b"jpeg", "local-empty")), \
+        with patch("dashboard.evaluation_workbench.worker._render_ocr_pixels", return_value=self._ocr_pixels("local-empty")), \
              patch("dashboard.evaluation_workbench.worker.request_local_ocr", return_value=([
                  {"page": 1, "service": local_ocr_gateway.LOCAL_OCR_SERVICE, "state": "empty"},
              ], None)):
@@ -3426,7 +3874,7 @@ class EvaluationWorkbenchTests(unittest.TestCase):
     def test_local_ocr_uses_high_quality_rendering_for_high_strength_certificate_rule(self):
         document = self._add_pdf("bid.pdf", "bid", "甲公司", "扫描件候选页")
         rule = {"title": "认证证书", "check_rule": "核验证书编号与有效期"}
-        with patch("dashboard.evaluation_workbench.worker._render_ocr_page", return_value=(b"jpeg", "quality-hash")) as render, \
+        with patch("dashboard.evaluation_workbench.worker._render_ocr_pixels", return_value=self._ocr_pixels("quality-hash")) as render, \
              patch("dashboard.evaluation_workbench.worker.request_local_ocr", return_value=([
                  {"page": 1, "service": local_ocr_gateway.LOCAL_OCR_SERVICE, "state": "recognized", "text": "证书编号A123"},
              ], None)):
@@ -3434,6 +3882,76 @@ class EvaluationWorkbenchTests(unittest.TestCase):
 
         self.assertEqual(render.call_args.args[3], "accurate")
 
+    def test_local_ocr_hands_rendered_pixels_over_shared_memory(self):
+        from dashboard.evaluation_workbench import rapidocr_worker
+
+        document = self._add_pdf("bid.pdf", "bid", "甲公司", "扫描件候选页")
+        seen = {}
+
+        def fake_request(pages, metrics=None):
+            # 模拟子进程：按段名映射像素，得到 RapidOCR 约定的 BGR 数组。
+            seen["items"] = pages
+            seen["image"] = rapidocr_worker._shared_memory_image(pages[0])
+            return [{"page": 1, "service": local_ocr_gateway.LOCAL_OCR_SERVICE, "state": "recognized", "text": "识别文字"}], None
+
+        with patch("dashboard.evaluation_workbench.worker.request_local_ocr", side_effect=fake_request):
+            values, failure = worker._local_ocr_page_texts(self.app, document, [1])
+
+        self.assertEqual(failure, "")
+        self.assertEqual(values[0]["text"], "识别文字")
+        item = seen["items"][0]
+        self.assertNotIn("path", item)
+        rendered = worker._render_ocr_pixels(self.app, document, 1, "fast")
+        self.assertEqual((item["width"], item["height"]), (rendered["width"], rendered["height"]))
+        self.assertEqual(seen["image"].shape, (rendered["height"], rendered["width"], 3))
+        self.assertEqual(seen["image"][..., ::-1].tobytes(), rendered["samples"])
+        # 请求结束后父进程已删除共享内存段。
+        from multiprocessing import shared_memory
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=item["shm"])
+
+    def test_local_ocr_falls_back_to_jpeg_file_when_shared_memory_is_disabled(self):
+        document = self._add_pdf("bid.pdf", "bid", "甲公司", "扫描件候选页")
+        with patch.dict(os.environ, {"RAPIDOCR_IMAGE_TRANSPORT": "file"}, clear=False), \
+             patch("dashboard.evaluation_workbench.worker.request_local_ocr", return_value=([], None)) as local_process:
+            worker._local_ocr_page_texts(self.app, document, [1])
+
+        item = local_process.call_args.args[0][0]
+        self.assertTrue(item["path"].endswith(".jpg"))
+        self.assertNotIn("shm", item)
+        # 超出单批共享内存预算的页面同样回退为临时文件。
+        with local_ocr_gateway.LocalOcrImageBatch(max_bytes=12) as batch:
+            self.assertIsNotNone(batch.add_pixels(1, bytes(12), 2, 2))
+            self.assertIsNone(batch.add_pixels(2, bytes(12), 2, 2))
+        # 并行批次合用进程级额度：前一批释放前，后一批回退为临时文件，不会写爆 /dev/shm。
+        with patch.object(local_ocr_gateway, "_SHARED_IMAGE_PROCESS_BYTES", 12):
+            first = local_ocr_gateway.LocalOcrImageBatch()
+            with local_ocr_gateway.LocalOcrImageBatch() as second:
+                self.assertIsNotNone(first.add_pixels(1, bytes(12), 2, 2))
+                self.assertIsNone(second.add_pixels(1, bytes(12), 2, 2))
+                first.close()
+                self.assertIsNotNone(second.add_pixels(1, bytes(12), 2, 2))
+        self.assertEqual(local_ocr_gateway._shared_image_bytes_in_use, 0)
+
+    def test_local_ocr_probes_legacy_jpeg_cache_only_when_page_has_cache_rows(self):
+        document = self._add_pdf("bid.pdf", "bid", "甲公司", "扫描件候选页")
+        with patch("dashboard.evaluation_workbench.worker.request_local_ocr", return_value=([], None)), \
+             patch("dashboard.evaluation_workbench.worker._ocr_pixels_jpeg", wraps=worker._ocr_pixels_jpeg) as encode:
+            worker._local_ocr_page_texts(self.app, document, [1])
+        encode.assert_not_called()
+
+        # 升级前按 JPEG 哈希保存的结果仍能找回，并迁移到像素哈希下。
+        rendered = worker._render_ocr_pixels(self.app, document, 1, "general_basic")
+        legacy_hash = hashlib.sha256(worker._ocr_pixels_jpeg(rendered)).hexdigest()
+        storage.save_ocr_page_cache(
+            self.app, document["document_id"], 1, legacy_hash, worker.LOCAL_OCR_SERVICE,
+            {"service": worker.LOCAL_OCR_SERVICE, "text": "旧缓存文字", "parser_version": worker.LOCAL_OCR_PARSER_VERSION},
+        )
+        with patch("dashboard.evaluation_workbench.worker.request_local_ocr") as local_process:
+            values, _ = worker._local_ocr_page_texts(self.app, document, [1])
+        local_process.assert_not_called()
+        self.assertEqual(values[0]["text"], "旧缓存文字")
+
     def test_local_ocr_runtime_environment_scopes_model_home_and_threads(self):
         with patch.dict(os.environ, {"RAPIDOCR_MODEL_HOME": "/tmp/rapidocr-model"}, clear=False):
             value = local_ocr_gateway._runtime_env()
@@ -3452,6 +3970,72 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         with patch.dict(os.environ, {"RAPIDOCR_LIMIT_SIDE_LEN": "invalid"}, clear=False):
             self.assertEqual(rapidocr_worker._detector_limit_side_len(), 960)
 
+    def test_rapidocr_batched_mode_pools_recognition_across_pages(self):
+        from types import SimpleNamespace
+
+        from dashboard.evaluation_workbench import rapidocr_worker
+
+        class RapidOCRError(Exception):
+            pass
+
+        # 每张“图片”就是该页的文字行；空文字与低于阈值的行按引擎规则过滤。
+        page_lines = {
+            "a.jpg": [("第一行", 0.9), ("  ", 0.9), ("低分行", 0.3)],
+            "b.jpg": [],
+            "c.jpg": [("第三页", 0.8)],
+        }
+
+        class FakeEngine:
+            text_score = 0.5
+
+            def __init__(self):
+                self.rec_calls = []
+
+            def load_img(self, image):
+                return image
+
+            def preprocess_img(self, image):
+                return image, {}
+
+            def detect_and_crop(self, image, op_record):
+                if not page_lines[Path(image).name]:
+                    raise RapidOCRError("The text detection result is empty")
+                return list(page_lines[Path(image).name]), SimpleNamespace()
+
+            def recognize_txt(self, crops):
+                self.rec_calls.append(len(crops))
+                return SimpleNamespace(txts=tuple(txt for txt, _ in crops), scores=tuple(score for _, score in crops))
+
+            def __call__(self, image, use_cls=None):
+                kept = [(txt, score) for txt, score in page_lines[Path(image).name]
+                        if txt.strip() and score >= self.text_score]
+                return SimpleNamespace(
+                    txts=tuple(txt for txt, _ in kept), scores=tuple(score for _, score in kept),
+                    elapse=0.0, elapse_list=[0.0, 0.0, 0.0],
+                )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            items = []
+            for page, name in enumerate(page_lines, start=1):
+                (Path(temp_dir) / name).write_bytes(b"jpg")
+                items.append({"page": page, "path": str(Path(temp_dir) / name)})
+            items.append({"page": 4, "path": str(Path(temp_dir) / "missing.jpg")})
+            engine = FakeEngine()
+            with patch.dict(os.environ, {"RAPIDOCR_BATCH_PAGES": "1"}, clear=False):
+                serial = rapidocr_worker._recognize_pages(engine, items)
+            stages: dict = {}
+            with patch.dict(os.environ, {"RAPIDOCR_BATCH_PAGES": "8"}, clear=False):
+                batched = rapidocr_worker._recognize_pages(engine, items, stages)
+                metrics = rapidocr_worker._metrics_payload(time.perf_counter(), stages)
+
+        drop_elapsed = lambda values: [{k: v for k, v in value.items() if k != "elapsed_seconds"} for value in values]
+        self.assertEqual(drop_elapsed(batched), drop_elapsed(serial))
+        self.assertEqual([value.get("text") for value in batched[:3]], ["第一行", "", "第三页"])
+        self.assertIn("error", batched[3])
+        self.assertEqual(engine.rec_calls, [4])
+        self.assertEqual(metrics["batch_pages"], 8)
+        self.assertEqual(set(metrics["stage_ms"]), {"input", "det", "rec"})
+
     def test_objective_ocr_fallback_keeps_summary_without_raw_page_text(self):
         original = {"evidence": "文字层已识别5项候选证书", "suggested_score": 3}
         raw_text = "身份证号码 410000000000000000\n合同金额 9001781元"
@@ -4635,6 +5219,112 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertIn("营业执照", context["text"])
         self.assertNotIn("[第3页]", context["text"])
 
+    def test_partial_page_context_packs_each_rules_best_page_instead_of_truncating_by_page_order(self):
+        parsed = self.temp_dir / "parsed-packed.txt"
+        filler = "本页为一般性实施说明。" * 50
+        texts = {1: "营业执照复印件。" + filler, 6: "售后服务承诺书。" + filler}
+        parsed.write_text(
+            "\n\n".join(f"[第{page}页]\n{texts.get(page, filler)}" for page in range(1, 7)) + "\n",
+            encoding="utf-8",
+        )
+        rules = [
+            {"rule_id": "license", "title": "营业执照", "source_text": "提供营业执照"},
+            {"rule_id": "service", "title": "售后服务承诺", "source_text": "提供售后服务承诺书"},
+        ]
+
+        context = build_rule_context(parsed, rules, 1_200, allow_partial=True, token_budget=2_000)
+
+        self.assertEqual(context["mode"], "retrieved_pages")
+        self.assertEqual(context["pages"], [1, 6])
+        self.assertEqual(context["dropped_pages"], [2, 5])
+        self.assertIn("营业执照", context["text"])
+        self.assertIn("售后服务承诺书", context["text"])
+        self.assertLessEqual(len(context["text"]), 1_200)
+        self.assertEqual(estimate_tokens("营业执照abcd"), 4)
+
+    def test_semantic_pages_fill_rules_without_lexical_anchor_and_reuse_saved_index(self):
+        import numpy as np
+
+        parsed = self.temp_dir / "parsed-semantic.txt"
+        parsed.write_text(
+            "[第1页]\n营业执照复印件。\n\n[第2页]\n技术方案和实施计划。\n\n[第3页]\n报价明细。\n\n"
+            "[第4页]\n电子标书的机器码和创建者信息。\n\n[第5页]\n售后服务承诺。\n",
+            encoding="utf-8",
+        )
+        rules = [
+            {"rule_id": "matched", "title": "营业执照", "source_text": "提供营业执照"},
+            {"rule_id": "semantic", "title": "串通投标", "source_text": "不同投标人由同一单位编制"},
+        ]
+        encoded: list[str] = []
+
+        def encode(texts):
+            encoded.extend(texts)
+            vectors = np.array([[
+                1.0 if any(word in text for word in ("串通", "机器码", "创建者")) else 0.0,
+                1.0 if "执照" in text else 0.0,
+                0.3,
+            ] for text in texts])
+            return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        lexical = build_rule_context(parsed, rules, 1000, allow_partial=True)
+        with patch.dict(os.environ, {"EVALUATION_WORKBENCH_SEMANTIC_PAGES": "1"}), \
+                patch.object(page_embeddings, "_encoder", return_value=encode):
+            context = build_rule_context(parsed, rules, 1000, allow_partial=True)
+            window_encodes = len(encoded)
+            page_embeddings._INDEX_CACHE.clear()
+            again = build_rule_context(parsed, rules, 1000, allow_partial=True)
+
+        self.assertEqual(lexical["unmatched_rule_ids"], ["semantic"])
+        self.assertEqual(context["mode"], "retrieved_pages")
+        self.assertEqual(context["unmatched_rule_ids"], [])
+        self.assertEqual(context["semantic_pages"], [4])
+        self.assertIn("机器码", context["text"])
+        self.assertTrue(page_embeddings.index_path(parsed).exists())
+        self.assertEqual(again, context)
+        self.assertEqual(len(encoded), window_encodes)
+
+    def test_semantic_page_index_is_built_at_parse_time_and_failed_builds_are_not_retried(self):
+        import numpy as np
+
+        parsed = self.temp_dir / "parsed-prebuilt.txt"
+        parsed.write_text("[第1页]\n营业执照复印件。\n\n[第2页]\n电子标书的机器码。\n", encoding="utf-8")
+        rule = {"rule_id": "semantic", "title": "串通投标", "source_text": "同一单位编制"}
+        calls: list[int] = []
+
+        def encode(texts):
+            calls.append(len(texts))
+            return np.ones((len(texts), 2)) / np.sqrt(2)
+
+        page_embeddings._INDEX_CACHE.clear()
+        with patch.dict(os.environ, {"EVALUATION_WORKBENCH_SEMANTIC_PAGES": "1"}), \
+                patch.object(page_embeddings, "_encoder", return_value=encode):
+            self.assertTrue(page_embeddings.build_page_embeddings(parsed))
+            self.assertTrue(page_embeddings.index_path(parsed).exists())
+            page_embeddings._INDEX_CACHE.clear()
+            calls.clear()
+            # 评审阶段只读取解析时写好的旁路文件，只编码规则文本。
+            page_embeddings.rank_pages(parsed, {1: "营业执照复印件。", 2: "电子标书的机器码。"}, rule, 4)
+        self.assertEqual(calls, [1])
+
+        broken = self.temp_dir / "parsed-broken.txt"
+        broken.write_text("[第1页]\n甲。\n\n[第2页]\n乙。\n", encoding="utf-8")
+        failing = Mock(side_effect=MemoryError())
+        with patch.dict(os.environ, {"EVALUATION_WORKBENCH_SEMANTIC_PAGES": "1"}), \
+                patch.object(page_embeddings, "_encoder", return_value=failing):
+            self.assertFalse(page_embeddings.build_page_embeddings(broken))
+            for _ in range(3):
+                self.assertEqual(page_embeddings.rank_pages(broken, {1: "甲。", 2: "乙。"}, rule, 4), [])
+        self.assertEqual(failing.call_count, 1)
+        self.assertFalse(page_embeddings.index_path(broken).exists())
+
+        self._add_pdf("bid.pdf", "bid", "甲公司", "本公司已提供营业执照。")
+        storage.create_task(self.app, self.project["project_id"], "parse_documents")
+        with patch.dict(os.environ, {"EVALUATION_WORKBENCH_SEMANTIC_PAGES": "1"}), \
+                patch.object(page_embeddings, "build_page_embeddings", return_value=True) as build:
+            self._run_next_task()
+        document = storage.list_documents(self.app, self.project["project_id"])[0]
+        build.assert_called_once_with(Path(document["parsed_path"]))
+
     def test_performance_rule_keeps_short_section_anchors_and_selects_performance_pages(self):
         parsed = self.temp_dir / "performance-pages.txt"
         parsed.write_text(
@@ -4683,6 +5373,15 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertGreater(mapping["a"][0]["offset"], 1000)
         self.assertIn("类似项目", mapping["a"][0]["anchor"])
 
+    def test_text_index_counts_match_plain_string_counts(self):
+        texts = ["类似项目业绩业绩情况表", "合同业绩", "aaaa 业", "", "项目人员证书业绩类似"]
+        index = _text_index(texts)
+
+        for term in ("业绩", "类似项目", "类似项目业绩", "业绩情况表", "aa", "aaa", "业", "a", "人员证书", "不存在"):
+            expected = {position: text.count(term) for position, text in enumerate(texts) if term in text}
+            self.assertEqual(index.counts(term), expected, term)
+        self.assertIs(_text_index(list(texts)), index)
+
     def test_rule_execution_metadata_is_persisted_and_overrides_legacy_keyword_routing(self):
         rule = storage.add_rule(self.app, self.project["project_id"], {
             "category": "qualification", "title": "综合材料", "check_rule": "核验材料完整性",
@@ -5309,6 +6008,107 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(failed, 5)
         self.assertEqual(queued, 5)
 
+    def test_fair_task_order_rotates_projects_and_keeps_project_fifo(self):
+        queued = [
+            {"task_id": "a1", "project_id": "A", "task_type": "evaluate_all", "created_at": "2026-01-01T00:00:01"},
+            {"task_id": "a2", "project_id": "A", "task_type": "parse_documents", "created_at": "2026-01-01T00:00:02"},
+            {"task_id": "b1", "project_id": "B", "task_type": "parse_documents", "created_at": "2026-01-01T00:00:03"},
+            {"task_id": "c1", "project_id": "C", "task_type": "compare_documents", "created_at": "2026-01-01T00:00:04"},
+        ]
+
+        self.assertEqual([item["task_id"] for item in storage.fair_task_order(queued)], ["a1", "b1", "c1", "a2"])
+        # 刚被调度过的项目排到最后，未调度过的项目优先。
+        self.assertEqual(
+            [item["task_id"] for item in storage.fair_task_order(queued, {"A": 10.0, "B": 5.0})],
+            ["c1", "b1", "a1", "a2"],
+        )
+
+    def _scheduler_with_gates(self, limits, memory_probe=None):
+        from dashboard.evaluation_workbench.task_scheduler import TaskScheduler
+
+        gates: dict[str, threading.Event] = {}
+        started: list[str] = []
+        lock = threading.Lock()
+
+        def runner(app, task):
+            with lock:
+                started.append(task["task_id"])
+                gate = gates.setdefault(task["task_id"], threading.Event())
+            gate.wait(timeout=10)
+            storage.update_task(app, task["task_id"], status="success", progress=100)
+
+        def release(task_id):
+            with lock:
+                gates.setdefault(task_id, threading.Event()).set()
+
+        scheduler = TaskScheduler(self.app, runner, limits=limits, memory_probe=memory_probe, poll_seconds=0.05)
+        return scheduler, started, release
+
+    def _wait_until(self, predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return predicate()
+
+    def test_task_scheduler_runs_other_projects_while_model_task_waits(self):
+        """长时间等待模型的综合评审不再阻塞其他项目的解析和价格计算。"""
+        second = storage.create_project(self.app, "第二项目", "TEST-02")
+        third = storage.create_project(self.app, "第三项目", "TEST-03")
+        evaluate = storage.create_task(self.app, self.project["project_id"], "evaluate_all")
+        later_same_project = storage.create_task(self.app, self.project["project_id"], "extract_rules")
+        parse = storage.create_task(self.app, second["project_id"], "parse_documents")
+        price = storage.create_task(self.app, third["project_id"], "calculate_price_scores")
+        scheduler, started, release = self._scheduler_with_gates(
+            {"total": 3, "cpu": 1, "network": 2, "memory_reserve_mb": 0},
+        )
+        runner_thread = threading.Thread(target=scheduler.run)
+        runner_thread.start()
+        try:
+            self.assertTrue(self._wait_until(lambda: len(started) == 3))
+            self.assertEqual(set(started), {evaluate["task_id"], parse["task_id"], price["task_id"]})
+            # 同项目后续任务必须等待前序任务结束。
+            self.assertEqual(storage.get_task(self.app, later_same_project["task_id"])["status"], "queued")
+            release(parse["task_id"])
+            release(price["task_id"])
+            release(evaluate["task_id"])
+            self.assertTrue(self._wait_until(lambda: later_same_project["task_id"] in started))
+            release(later_same_project["task_id"])
+        finally:
+            for task_id in list(started) + [later_same_project["task_id"]]:
+                release(task_id)
+            runner_thread.join(timeout=10)
+        self.assertFalse(runner_thread.is_alive())
+        statuses = {storage.get_task(self.app, task["task_id"])["status"]
+                    for task in (evaluate, later_same_project, parse, price)}
+        self.assertEqual(statuses, {"success"})
+
+    def test_task_scheduler_respects_resource_class_and_memory_admission(self):
+        projects = [storage.create_project(self.app, f"调度项目{i}", f"S-{i}")["project_id"] for i in range(3)]
+        first_parse = storage.create_task(self.app, projects[0], "parse_documents")
+        second_parse = storage.create_task(self.app, projects[1], "parse_documents")
+        evaluate = storage.create_task(self.app, projects[2], "evaluate_all")
+        available = {"mb": 600.0}
+        scheduler, started, release = self._scheduler_with_gates(
+            {"total": 3, "cpu": 1, "network": 2, "memory_reserve_mb": 100}, memory_probe=lambda: available["mb"],
+        )
+
+        try:
+            first = scheduler.dispatch()
+
+            # CPU 类只有一个槽位；综合评审估算 700 MB，可用 600 MB 时暂缓。
+            self.assertEqual([task["task_id"] for task in first], [first_parse["task_id"]])
+            self.assertEqual(storage.get_task(self.app, second_parse["task_id"])["status"], "queued")
+            self.assertEqual(storage.get_task(self.app, evaluate["task_id"])["status"], "queued")
+            available["mb"] = 4096.0
+            self.assertEqual([task["task_id"] for task in scheduler.dispatch()], [evaluate["task_id"]])
+        finally:
+            for task_id in (first_parse["task_id"], evaluate["task_id"], second_parse["task_id"]):
+                release(task_id)
+        scheduler.run()
+        self.assertEqual(storage.get_task(self.app, second_parse["task_id"])["status"], "success")
+
     def test_long_document_is_fully_scanned_before_rule_group_synthesis(self):
         self._add_pdf("bid.pdf", "bid", "甲公司", "近年的类似项目情况表：项目一。")
         storage.create_task(self.app, self.project["project_id"], "parse_documents")
@@ -7880,6 +8680,222 @@ class EvaluationWorkbenchTests(unittest.TestCase):
         self.assertEqual(request_json.call_args_list[0].kwargs["max_tokens"], 12_000)
         self.assertEqual(request_json.call_args_list[1].args[0]["thinking_mode"], "disabled")
 
+    def test_stream_aborted_group_keeps_complete_results_and_retries_only_the_rest(self):
+        self._add_pdf("bid.pdf", "bid", "甲公司", "本公司已提供营业执照、纳税证明及社保证明。")
+        storage.create_task(self.app, self.project["project_id"], "parse_documents")
+        self._run_next_task()
+        document = next(item for item in storage.list_documents(self.app, self.project["project_id"]) if item["role"] == "bid")
+        rules = [
+            storage.add_rule(self.app, self.project["project_id"], {
+                "category": "qualification", "title": title, "check_rule": f"核验{title}", "source_text": title,
+            })
+            for title in ("营业执照", "纳税证明", "社保证明")
+        ]
+        task = storage.create_task(self.app, self.project["project_id"], "evaluate_all")
+        profile = storage.get_model_profile(self.app, None)
+        profile["thinking_mode"] = "disabled"
+
+        def result(rule):
+            return {"rule_id": rule["rule_id"], "status": "satisfied", "evidence": rule["title"], "reason": "已提供",
+                    "risk_level": "low", "confidence": "high", "evidence_quality": "sufficient"}
+
+        streamed = '{"results":[' + ",".join(json.dumps(result(rule), ensure_ascii=False) for rule in rules[:2]) + ',{"rule_id":"'
+        with patch("dashboard.evaluation_workbench.worker.request_json", side_effect=[
+            worker.InvalidJsonResponse(streamed, "length", stream_aborted=True), {"results": [result(rules[2])]},
+        ]) as request_json:
+            results, _, split_count, manual_count, mode = worker._run_combined_batch(
+                self.app, task, profile, document, "review", rules, "综合评审系统提示", 60_000, "资格规则组",
+            )
+
+        self.assertEqual(mode, "full_document+stream_partial+missing_retry")
+        self.assertEqual((split_count, manual_count), (0, 0))
+        self.assertEqual([item["rule_id"] for item in results], [rule["rule_id"] for rule in rules])
+        self.assertEqual(request_json.call_count, 2)
+        self.assertEqual(request_json.call_args_list[0].kwargs["stream_field"], "results")
+        self.assertEqual(request_json.call_args_list[0].kwargs["expected_items"], 3)
+        self.assertNotIn("核验营业执照", request_json.call_args_list[1].args[2])
+
+    def test_streamed_group_results_reach_item_sink_except_incomplete_items(self):
+        self._add_pdf("bid.pdf", "bid", "甲公司", "本公司已提供营业执照、纳税证明及社保证明。")
+        storage.create_task(self.app, self.project["project_id"], "parse_documents")
+        self._run_next_task()
+        document = next(item for item in storage.list_documents(self.app, self.project["project_id"]) if item["role"] == "bid")
+        rules = [
+            storage.add_rule(self.app, self.project["project_id"], {
+                "category": "qualification", "title": title, "check_rule": f"核验{title}", "source_text": title,
+            })
+            for title in ("营业执照", "纳税证明", "社保证明")
+        ]
+        task = storage.create_task(self.app, self.project["project_id"], "evaluate_all")
+        profile = storage.get_model_profile(self.app, None)
+        profile["thinking_mode"] = "disabled"
+
+        def result(rule, reason="已提供"):
+            return {"rule_id": rule["rule_id"], "status": "satisfied", "evidence": rule["title"], "reason": reason,
+                    "risk_level": "low", "confidence": "high", "evidence_quality": "sufficient"}
+
+        first = [result(rules[0]), result(rules[1]), result(rules[2], "结论依据→已填写，但")]
+
+        def respond(profile, system_prompt, prompt, **kwargs):
+            if kwargs.get("item_callback") is None:
+                return {"results": [result(rules[2])]}
+            for item in first:
+                kwargs["item_callback"](item)
+            return {"results": first}
+
+        sunk = []
+        with patch("dashboard.evaluation_workbench.worker.request_json", side_effect=respond) as request_json:
+            results, _, _, _, mode = worker._run_combined_batch(
+                self.app, task, profile, document, "review", rules, "综合评审系统提示", 60_000, "资格规则组",
+                item_sink=sunk.extend,
+            )
+
+        self.assertEqual(request_json.call_count, 2)
+        self.assertEqual(mode, "full_document+incomplete_retry")
+        self.assertEqual([item["rule_id"] for item in sunk], [rules[0]["rule_id"], rules[1]["rule_id"]])
+        self.assertEqual(sunk[0]["status"], results[0]["status"])
+
+    def _run_cross_document_pair(self, request_side_effect):
+        self._add_pdf("bid-a.pdf", "bid", "甲公司", "本公司已提供营业执照。")
+        self._add_pdf("bid-b.pdf", "bid", "乙公司", "本公司营业执照见附件。")
+        storage.create_task(self.app, self.project["project_id"], "parse_documents")
+        self._run_next_task()
+        documents = [item for item in storage.list_documents(self.app, self.project["project_id"]) if item["role"] == "bid"]
+        rule = storage.add_rule(self.app, self.project["project_id"], {
+            "category": "qualification", "title": "营业执照", "check_rule": "核验营业执照", "source_text": "营业执照",
+        })
+        task = storage.create_task(self.app, self.project["project_id"], "evaluate_all")
+        profile = storage.get_model_profile(self.app, None)
+        profile["thinking_mode"] = "disabled"
+        batcher = worker._CrossDocumentBatcher(wait_seconds=5)
+        task["_cross_document_batcher"] = batcher
+        for document in documents:
+            batcher.enter(document["document_id"])
+        outcomes = {}
+
+        def run(document):
+            outcomes[document["bidder_name"]] = worker._run_combined_batch(
+                self.app, task, profile, document, "review", [rule], "综合评审系统提示", 60_000, document["bidder_name"],
+            )
+
+        with patch("dashboard.evaluation_workbench.worker.request_json", side_effect=request_side_effect) as request_json:
+            threads = [threading.Thread(target=run, args=(document,)) for document in documents]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+        return rule, outcomes, request_json
+
+    @staticmethod
+    def _cross_document_entry(rule_id: str, key: str, bidder: str) -> dict:
+        return {"document_key": key, "results": [{
+            "rule_id": rule_id, "status": "satisfied", "evidence": f"{bidder}营业执照", "reason": "已提供",
+            "risk_level": "low", "confidence": "high", "evidence_quality": "sufficient",
+        }]}
+
+    def test_cross_document_batching_sends_one_request_and_keeps_bidder_results_separate(self):
+        def respond(profile, system_prompt, prompt, **kwargs):
+            rule_id = re.search(r'"rule_id":"([0-9a-f-]{36})"', prompt).group(1)
+            entries = re.findall(r"【文件 (D\d)】投标文件：[^；]+；投标人：(\S+)", prompt)
+            return {"documents": [self._cross_document_entry(rule_id, key, bidder) for key, bidder in entries]}
+
+        rule, outcomes, request_json = self._run_cross_document_pair(respond)
+
+        self.assertEqual(request_json.call_count, 1)
+        prompt = request_json.call_args.args[2]
+        self.assertIn("【文件 D2】", prompt)
+        self.assertEqual(prompt.count("核验营业执照"), 1)
+        for bidder in ("甲公司", "乙公司"):
+            results, _, _, _, mode = outcomes[bidder]
+            self.assertEqual(mode, "full_document+cross_document")
+            self.assertEqual(results[0]["rule_id"], rule["rule_id"])
+            self.assertEqual(results[0]["evidence"], f"{bidder}营业执照")
+        with storage.connection(self.app) as conn:
+            call = conn.execute(
+                "SELECT document_id, document_ids FROM ew_model_calls WHERE phase LIKE '%cross_document_batch'"
+            ).fetchone()
+        self.assertIsNone(call["document_id"])
+        bid_ids = {item["document_id"] for item in storage.list_documents(self.app, self.project["project_id"])
+                   if item["role"] == "bid"}
+        self.assertEqual(set(json.loads(call["document_ids"])), bid_ids)
+
+    def test_cross_document_batch_members_observe_task_cancellation(self):
+        cancelled = threading.Event()
+
+        def check():
+            if cancelled.is_set():
+                raise worker.TaskCancellationRequested()
+
+        def member(document_id):
+            return {"document_id": document_id, "chars": 100, "output_tokens": 100}
+
+        # 同伴等待发起方期间任务被终止：同伴退出本批，发起方只剩自己，不再发送合并请求。
+        batcher = worker._CrossDocumentBatcher(wait_seconds=5)
+        for document_id in ("a", "b", "c"):
+            batcher.enter(document_id)
+        outcomes = {}
+        send = Mock(return_value={})
+
+        def submit(document_id, cancellation_check):
+            try:
+                outcomes[document_id] = batcher.submit("rules", member(document_id), send, cancellation_check)
+            except worker.TaskCancellationRequested:
+                outcomes[document_id] = "cancelled"
+
+        initiator = threading.Thread(target=submit, args=("a", None))
+        initiator.start()
+        while "rules" not in batcher.open_batches:
+            time.sleep(0.01)
+        joiner = threading.Thread(target=submit, args=("b", check))
+        joiner.start()
+        while len(batcher.open_batches["rules"]["members"]) < 2:
+            time.sleep(0.01)
+        cancelled.set()
+        joiner.join(timeout=5)
+        self.assertEqual(outcomes["b"], "cancelled")
+        batcher.pass_key("rules", "c")
+        initiator.join(timeout=5)
+        self.assertIsNone(outcomes["a"])
+        send.assert_not_called()
+
+        # 发起方因终止退出时，同伴抛出终止异常而不是返回 None 改发单文件请求。
+        cancelled.clear()
+        batcher = worker._CrossDocumentBatcher(wait_seconds=5)
+        for document_id in ("a", "b", "c"):
+            batcher.enter(document_id)
+        outcomes.clear()
+        initiator = threading.Thread(target=submit, args=("a", check))
+        initiator.start()
+        while "rules" not in batcher.open_batches:
+            time.sleep(0.01)
+        joiner = threading.Thread(target=submit, args=("b", None))
+        joiner.start()
+        while len(batcher.open_batches["rules"]["members"]) < 2:
+            time.sleep(0.01)
+        cancelled.set()
+        initiator.join(timeout=5)
+        joiner.join(timeout=5)
+        self.assertEqual(outcomes, {"a": "cancelled", "b": "cancelled"})
+        send.assert_not_called()
+
+    def test_cross_document_batching_falls_back_per_document_after_truncation(self):
+        def respond(profile, system_prompt, prompt, **kwargs):
+            rule_id = re.search(r'"rule_id":"([0-9a-f-]{36})"', prompt).group(1)
+            entries = re.findall(r"【文件 (D\d)】投标文件：[^；]+；投标人：(\S+)", prompt)
+            if not entries:
+                bidder = re.search(r"投标人：(\S+)", prompt).group(1)
+                return {"results": self._cross_document_entry(rule_id, "", f"单独{bidder}")["results"]}
+            complete = json.dumps(self._cross_document_entry(rule_id, *entries[0]), ensure_ascii=False)
+            raise worker.InvalidJsonResponse('{"documents":[' + complete + ',{"document_key":"D2","results":[{"rule_', "length")
+
+        _, outcomes, request_json = self._run_cross_document_pair(respond)
+
+        self.assertEqual(request_json.call_count, 2)
+        modes = sorted(outcome[4] for outcome in outcomes.values())
+        self.assertEqual(modes, ["full_document", "full_document+cross_document"])
+        fallback = next(bidder for bidder, outcome in outcomes.items() if outcome[4] == "full_document")
+        self.assertEqual(outcomes[fallback][0][0]["evidence"], f"单独{fallback}营业执照")
+
     def test_combined_evaluation_retries_only_truncated_rule_with_compact_prompt(self):
         self._add_pdf("bid.pdf", "bid", "甲公司", "本公司已提供中小企业声明函及全部字段。")
         storage.create_task(self.app, self.project["project_id"], "parse_documents")
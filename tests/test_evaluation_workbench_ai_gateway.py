@@ -1,7 +1,10 @@
+import json
 import os
+import threading
 import unittest
 from unittest.mock import Mock, patch
 
+from dashboard.evaluation_workbench import ai_gateway
 from dashboard.evaluation_workbench.ai_gateway import (
     InvalidJsonResponse, ModelResponseEnvelopeError, _balanced_object_candidates, _decode_json_content,
     _recover_complete_json_array, build_vision_user_content, model_capabilities, request_json, test_connection,
@@ -116,6 +119,72 @@ class EvaluationWorkbenchAiGatewayTests(unittest.TestCase):
         self.assertEqual(metadata["requested_max_tokens"], 5120)
         self.assertEqual(metadata["response_chars"], 0)
 
+    @staticmethod
+    def _event_stream(content_pieces, *, finish_reason="stop", usage=None):
+        lines = [
+            "data: " + json.dumps({"choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+            for piece in content_pieces
+        ]
+        lines.append("data: " + json.dumps({"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}))
+        if usage:
+            lines.append("data: " + json.dumps({"choices": [], "usage": usage}))
+        lines.append("data: [DONE]")
+        response = Mock(ok=True, headers={"Content-Type": "text/event-stream; charset=utf-8"})
+        response.iter_lines.return_value = [line.encode("utf-8") for line in lines]
+        return response
+
+    def test_streaming_request_reports_each_completed_item_and_returns_the_same_result(self):
+        content = '{"results":[{"rule_id":"R1","reason":"含}与\\"引号"},{"rule_id":"R2","reason":"已提供"}]}'
+        response = self._event_stream([content[:17], content[17:40], content[40:]], usage={"completion_tokens": 30})
+        items, usage, metadata = [], {}, {}
+
+        with patch.dict(os.environ, {"EVALUATION_WORKBENCH_STREAM_RESPONSES": "1"}), \
+                patch("dashboard.evaluation_workbench.ai_gateway._http_post", return_value=response) as post:
+            result = request_json(
+                self._profile(), "system", "user", max_tokens=2000, stream_field="results",
+                item_callback=items.append, expected_items=2, usage_callback=usage.update,
+                response_metadata_callback=metadata.update,
+            )
+
+        self.assertEqual(result, json.loads(content))
+        self.assertEqual([item["rule_id"] for item in items], ["R1", "R2"])
+        self.assertTrue(post.call_args.kwargs["json"]["stream"])
+        self.assertTrue(post.call_args.kwargs["stream"])
+        self.assertEqual(usage["completion_tokens"], 30)
+        self.assertEqual(metadata["finish_reason"], "stop")
+
+    def test_streaming_request_stops_early_when_output_cannot_fit(self):
+        item = '{"rule_id":"R%d","reason":"' + "长" * 200 + '"}'
+        pieces = ['{"results":[' + item % 1, "," + item % 2, "," + item % 3, "," + item % 4]
+        response = self._event_stream(pieces)
+        metadata = {}
+
+        with patch.dict(os.environ, {"EVALUATION_WORKBENCH_STREAM_RESPONSES": "1"}), \
+                patch("dashboard.evaluation_workbench.ai_gateway._http_post", return_value=response):
+            with self.assertRaises(InvalidJsonResponse) as error:
+                request_json(
+                    self._profile(), "system", "user", max_tokens=600, stream_field="results", expected_items=10,
+                    response_metadata_callback=metadata.update,
+                )
+
+        self.assertTrue(error.exception.stream_aborted)
+        self.assertEqual(error.exception.finish_reason, "length")
+        response.close.assert_called_once()
+        self.assertEqual(metadata["parse_status"], "stream_aborted")
+        recovered = _recover_complete_json_array(error.exception.raw_content, "results")
+        self.assertEqual([value["rule_id"] for value in recovered["results"]], ["R1", "R2"])
+
+    def test_streaming_is_off_unless_enabled(self):
+        response = Mock(ok=True)
+        response.json.return_value = {"choices": [{"message": {"content": '{"results":[]}'}, "finish_reason": "stop"}]}
+
+        with patch.dict(os.environ, {"EVALUATION_WORKBENCH_STREAM_RESPONSES": ""}), \
+                patch("dashboard.evaluation_workbench.ai_gateway._http_post", return_value=response) as post:
+            request_json(self._profile(), "system", "user", stream_field="results", expected_items=3)
+
+        self.assertNotIn("stream", post.call_args.kwargs["json"])
+        self.assertNotIn("stream", post.call_args.kwargs)
+
     def test_request_json_treats_minimax_token_limit_business_code_as_length(self):
         response = Mock(ok=True)
         response.json.return_value = {"base_resp": {"status_code": 1039, "status_msg": "token limit"}}
@@ -295,3 +364,23 @@ class EvaluationWorkbenchAiGatewayTests(unittest.TestCase):
             self.assertEqual(model_capabilities(profile)["parallel_limit"], 3)
         with patch.dict(os.environ, {"MINIMAX_PARALLEL_LIMIT": "3"}, clear=False):
             self.assertEqual(model_capabilities(profile)["parallel_limit"], 3)
+
+    def test_worker_threads_keep_separate_sessions_but_share_one_connection_pool(self):
+        sessions = []
+
+        def capture(session, *args, **kwargs):
+            sessions.append(session)
+            return Mock()
+
+        with patch.object(ai_gateway, "_SHARED_ADAPTER", None), \
+                patch.object(ai_gateway, "_REQUEST_SESSIONS", threading.local()), \
+                patch("requests.Session.post", autospec=True, side_effect=capture):
+            threads = [threading.Thread(target=ai_gateway._http_post, args=("https://example.test/v1",)) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(sessions), 2)
+        self.assertIsNot(sessions[0], sessions[1])
+        self.assertIs(sessions[0].get_adapter("https://example.test"), sessions[1].get_adapter("https://example.test"))
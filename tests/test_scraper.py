@@ -1,14 +1,28 @@
+import importlib.util
+import json
 import os
 import tempfile
+import threading
 import unittest
+from pathlib import Path
 from unittest import mock
 
 import pandas as pd
 from bs4 import BeautifulSoup
 
+import multi_pattern
+import region_gazetteer
+import scrape_queue
+import scrape_worker
 import scraper
 
 
+BENCHMARK_PATH = Path(__file__).resolve().parents[1] / "scripts" / "scraper_benchmark.py"
+BENCHMARK_SPEC = importlib.util.spec_from_file_location("scraper_benchmark", BENCHMARK_PATH)
+scraper_benchmark = importlib.util.module_from_spec(BENCHMARK_SPEC)
+BENCHMARK_SPEC.loader.exec_module(scraper_benchmark)
+
+
 class ScraperTests(unittest.TestCase):
     def test_high_confidence_title_rules_cover_real_information_projects(self):
         self.assertTrue(scraper._has_strong_it_title_evidence(
@@ -181,6 +195,26 @@ class ScraperTests(unittest.TestCase):
         self.assertIn("partial", reason)
         self.assertTrue(save_valid, save_reason)
 
+    def test_http_sessions_are_per_thread_over_one_shared_pool(self):
+        sessions = []
+        threads = [
+            threading.Thread(target=lambda: sessions.append(scraper._get_http_session()))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(session) for session in sessions}), 3)
+        self.assertIs(scraper._get_http_session(), scraper._get_http_session())
+        adapters = {
+            id(session.get_adapter(url))
+            for session in sessions + [scraper._get_http_session()]
+            for url in ("http://www.ccgp.gov.cn/", "https://www.ccgp.gov.cn/")
+        }
+        self.assertEqual(adapters, {id(scraper._shared_http_adapter())})
+
     def test_detail_cache_round_trip(self):
         with tempfile.TemporaryDirectory() as temp_dir, \
              mock.patch.object(scraper, "DETAIL_CACHE_DB", os.path.join(temp_dir, "cache.db")), \
@@ -193,5 +227,156 @@ class ScraperTests(unittest.TestCase):
         self.assertEqual(cached["采购人名称"], "测试单位")
 
 
+class RegionGazetteerTests(unittest.TestCase):
+    def test_region_corpus_matches_labels(self):
+        corpus_path = os.path.join(os.path.dirname(__file__), "fixtures", "region_corpus.json")
+        with open(corpus_path, encoding="utf-8") as handle:
+            corpus = json.load(handle)
+        resolved = region_gazetteer.resolve_regions(corpus)
+        for row, actual in zip(corpus, resolved):
+            with self.subTest(title=row["标题"]):
+                self.assertEqual(actual, (row["地区（市）"], row["地区（县）"]))
+
+    def test_single_character_county_requires_boundary(self):
+        self.assertEqual(
+            scraper.extract_region("", "吕梁市兴县政务云", "", ""), ("吕梁市", "兴县")
+        )
+        self.assertEqual(
+            scraper.extract_region("", "乡村振兴县域平台", "", ""), ("未知市", "")
+        )
+
+    def test_agency_district_does_not_override_project_city(self):
+        self.assertEqual(
+            scraper.extract_region("未找到", "晋中市智慧城市", "", "太原市小店区某代理公司"),
+            ("晋中市", ""),
+        )
+
+    def test_title_district_does_not_override_location_city(self):
+        self.assertEqual(
+            region_gazetteer.resolve_region("大同市公共资源交易中心", "小店区某学校信息化采购", "", ""),
+            ("大同市", ""),
+        )
+        self.assertEqual(
+            region_gazetteer.resolve_region("太原市公共资源交易中心", "小店区某学校信息化采购", "", ""),
+            ("太原市", "小店区"),
+        )
+
+
+class MultiPatternTests(unittest.TestCase):
+    def test_found_terms_matches_substring_checks_for_nested_and_overlapping_terms(self):
+        terms = ["信息", "信息化", "信息化系统", "化系", "系统", "统集成", "aa", "aaa", "a", "集"]
+        texts = ["信息化系统集成", "aaaa", "系统系统", "无关文本", "", "信息", "系统集成信息化"]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(multi_pattern.found_terms(text, terms), {term for term in terms if term in text})
+                self.assertEqual(multi_pattern.contains_any(text, terms), any(term in text for term in terms))
+
+    def test_iter_matches_reports_every_occurrence_with_values(self):
+        compiled = multi_pattern.PatternMatcher([("城区", "generic"), ("阳泉市城区", "district"), ("市城", "x")])
+        matches = list(compiled.iter_matches("阳泉市城区和城区"))
+
+        self.assertEqual(matches, [(0, 5, "district"), (2, 4, "x"), (3, 5, "generic"), (6, 8, "generic")])
+        self.assertIs(multi_pattern.matcher(["系统", "平台"]), multi_pattern.matcher(("平台", "系统")))
+
+
+class ScraperBenchmarkTests(unittest.TestCase):
+    def test_replay_benchmark_runs_full_scrape_offline(self):
+        report = scraper_benchmark.run_benchmark(scraper_benchmark.DEFAULT_FIXTURES)
+
+        self.assertEqual(report["status"], "success")
+        self.assertEqual(report["records"], 25)
+        # 2 页搜索 + 3 个无结果关键词 + 25 个详情页，另含更正公告按项目编号回溯的搜索。
+        self.assertGreaterEqual(report["http_requests"], 30)
+        self.assertGreater(report["requests_per_second"], 0)
+        self.assertEqual(
+            set(report["timings"]), {"search", "detail", "parse", "classification", "total"}
+        )
+        connections = report["connections"]
+        self.assertEqual(connections["requests"], report["http_requests"])
+        # 搜索与 3 个详情线程共用一个连接池，连接数不随请求数增长。
+        self.assertLessEqual(connections["new_connections"], 4)
+        self.assertGreater(connections["reused_connections"], 20)
+
+    def test_injected_waf_pages_are_retried(self):
+        with mock.patch.object(scraper.time, "sleep"):
+            report = scraper_benchmark.run_benchmark(
+                scraper_benchmark.DEFAULT_FIXTURES, waf_every=7
+            )
+
+        self.assertGreater(report["waf_responses"], 0)
+        self.assertEqual(report["status"], "success")
+        self.assertEqual(report["records"], 25)
+
+
+class ScrapeQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(
+            scrape_queue, "QUEUE_DB", os.path.join(self.temp_dir.name, "queue.db")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_duplicate_dates_coalesce_with_queued_and_running_jobs(self):
+        added, coalesced = scrape_queue.enqueue_dates(["2026-07-13", "2026-07-14"])
+        self.assertEqual(added, ["2026-07-13", "2026-07-14"])
+        self.assertEqual(coalesced, [])
+
+        running = scrape_queue.claim_next_job()
+        self.assertEqual(running["date"], "2026-07-13")
+        added, coalesced = scrape_queue.enqueue_dates(
+            ["2026-07-13", "2026-07-14", "2026-07-15"], scheduled=True
+        )
+
+        self.assertEqual(added, ["2026-07-15"])
+        self.assertEqual(coalesced, ["2026-07-13", "2026-07-14"])
+        jobs = {job["date"]: job for job in scrape_queue.list_jobs()}
+        self.assertEqual(jobs["2026-07-14"]["requests"], 2)
+        self.assertTrue(jobs["2026-07-14"]["scheduled"])
+        self.assertEqual(scrape_queue.pending_count(), 2)
+
+    def test_finished_date_can_be_requeued(self):
+        scrape_queue.enqueue_dates(["2026-07-13"])
+        job = scrape_queue.claim_next_job()
+        scrape_queue.finish_job(job["id"], {"status": "success"})
+
+        added, _ = scrape_queue.enqueue_dates(["2026-07-13"])
+
+        self.assertEqual(added, ["2026-07-13"])
+
+    def test_full_queue_rejects_new_dates_without_partial_insert(self):
+        with mock.patch.object(scrape_queue, "MAX_QUEUED_DATES", 2):
+            scrape_queue.enqueue_dates(["2026-07-13"])
+            with self.assertRaises(ValueError):
+                scrape_queue.enqueue_dates(["2026-07-14", "2026-07-15"])
+
+        self.assertEqual(scrape_queue.pending_count(), 1)
+
+    def test_worker_drains_queue_in_order_and_requeues_interrupted_job(self):
+        scrape_queue.enqueue_dates(["2026-07-13", "2026-07-14"])
+        scrape_queue.claim_next_job()  # 模拟上一个子进程执行中崩溃
+        scrape_queue.enqueue_dates(["2026-07-15"])
+        seen = []
+
+        def fake_run(chinese_date):
+            seen.append(chinese_date)
+            if chinese_date == "2026年07月14日":
+                scrape_queue.enqueue_dates(["2026-07-16"])
+            return {"status": "success", "total": 1, "file": None}
+
+        with mock.patch.object(scraper, "run_scraper_for_date", side_effect=fake_run), \
+             mock.patch.object(scraper, "release_model"), \
+             mock.patch.object(scrape_worker, "emit_event"):
+            exit_code = scrape_worker.main(["--queue"])
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(seen, [
+            "2026年07月13日", "2026年07月14日", "2026年07月15日", "2026年07月16日",
+        ])
+        self.assertEqual(scrape_queue.pending_count(), 0)
+        self.assertTrue(all(job["status"] == "success" for job in scrape_queue.list_jobs()))
+
+
 if __name__ == "__main__":
     unittest.main()
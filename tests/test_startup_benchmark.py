@@ -0,0 +1,51 @@
+import importlib.util
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPT_PATH = REPO_ROOT / "scripts" / "startup_benchmark.py"
+SPEC = importlib.util.spec_from_file_location("startup_benchmark", SCRIPT_PATH)
+startup_benchmark = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(startup_benchmark)
+
+
+class StartupBenchmarkTests(unittest.TestCase):
+    def test_parse_importtime_keeps_nesting_depth(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       113 |        113 |   dashboard",
+            "import time:       221 |        221 |     dashboard.blueprints",
+            "import time:      8150 |       8371 |   dashboard.blueprints.knowledge",
+            "Dashboard started",
+            "import time:     76806 |     467401 | dashboard.app",
+        ])
+
+        rows = startup_benchmark.parse_importtime(stderr)
+
+        self.assertEqual([row["module"] for row in rows], [
+            "dashboard", "dashboard.blueprints", "dashboard.blueprints.knowledge", "dashboard.app",
+        ])
+        self.assertEqual([row["depth"] for row in rows], [1, 2, 1, 0])
+        self.assertEqual(rows[-1]["cumulative_us"], 467401)
+
+    def test_blueprints_do_not_load_deferred_modules(self):
+        # 只导入蓝图模块（无数据库、调度器副作用），确认重型依赖仍在首次调用时才加载。
+        probe = (
+            "import json, sys\n"
+            "import dashboard.blueprints.knowledge, dashboard.blueprints.experts\n"
+            "print(json.dumps(sorted(sys.modules)))\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", probe], cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+        loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(startup_benchmark._deferred_loaded(loaded), [])
+
+
+if __name__ == "__main__":
+    unittest.main()